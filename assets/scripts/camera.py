@@ -11,6 +11,9 @@ if TYPE_CHECKING:
 
 
 class Camera(MonoBehaviour):
+    reads = frozenset({"own.transform"})
+    writes = frozenset()
+    main_thread = True
     def __init__(self, game_object: GameObject, app: App, near_distance: float, far_distance: float, horizontal_fov_deg: float) -> None:
         super().__init__(game_object, app)
         self.near_distance = near_distance
@@ -41,8 +44,9 @@ class Camera(MonoBehaviour):
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.depth_texture, 0)
 
-    def update(self):
-        self.app.renderer.render_objects_to_fbo(self.app.game_objects, self.projection_matrix, mat4.inverse(self.game_object.local_transform.model_matrix), self.fbo, flip=False)
+    def render(self):
+        """Draws the scene from this camera into color_texture, called by the app after every script has updated"""
+        self.app.renderer.render_objects_to_fbo(self.app.game_objects, self.projection_matrix, mat4.inverse(self.app.interpolator.get_model_matrix(self.game_object)), self.fbo, flip=False)
 
     def end(self):
         glDeleteFramebuffers(1, (self.fbo,))
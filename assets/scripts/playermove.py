@@ -8,6 +8,9 @@ from classes.gameobject import GameObject
 
 """This class changes the object's transform based on user input"""
 class PlayerMove(MonoBehaviour):
+    reads = frozenset({"input"})
+    writes = frozenset({"own.transform"})
+    main_thread = True # pygame's mouse and keyboard
     def __init__(self, game_object: GameObject, app, speed: float, sens: float) -> None:
         super().__init__(game_object, app)
         self.speed = speed
@@ -20,6 +23,8 @@ class PlayerMove(MonoBehaviour):
 
     def update(self):
         self.rotate()
+
+    def fixed_update(self):
         self.move()
 
     def rotate(self):
@@ -0,0 +1,74 @@
+"""Picking with and without the broadphase, and the cost of its updates and queries. Run from the project root with python -m benchmarks.broadphase [object count]"""
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.rendercomponent import RenderComponent
+from classes.broadphase import Broadphase
+from classes.vec3 import Vec3
+from classes import raytracing
+import pyrr.matrix44 as mat4
+import pygame as pg
+import random
+import time
+import sys
+
+class BenchmarkApp:
+    def __init__(self) -> None:
+        self.transform_store = None
+        self.broadphase = Broadphase()
+        self.game_objects: list[GameObject] = []
+
+def create_scene(app: BenchmarkApp, count: int) -> list[GameObject]:
+    """Cubes and teapots scattered through a box, a fifth of them children of others"""
+    size = count ** (1 / 3) * 4
+    game_objects: list[GameObject] = []
+    for i in range(count):
+        obj_path = "assets/objects/teapot.obj" if i % 10 == 0 else "assets/objects/Cube.obj"
+        position = Vec3(random.uniform(-size, size), random.uniform(-size, size), random.uniform(-size, size))
+        game_object = GameObject(app, f"object {i}", Transform(position, Vec3.one() * random.uniform(0.5, 1.5), Vec3.zero()), render_component=RenderComponent(obj_path, "assets/images/grey.png"))
+        if game_objects and i % 5 == 0:
+            random.choice(game_objects).add_child(game_object)
+        else:
+            game_objects.append(game_object)
+    return game_objects
+
+def time_call(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    pg.init()
+    pg.display.set_mode((64, 64), pg.OPENGL|pg.DOUBLEBUF) # Meshes need a GL context
+    random.seed(0)
+    app = BenchmarkApp()
+    app.game_objects = create_scene(app, object_count)
+    every_object = list(app.broadphase.slots)
+    view_matrix = mat4.create_from_translation([0, 0, object_count ** (1 / 3) * 6])
+    rays = [Vec3(random.uniform(-0.5, 0.5), random.uniform(-0.5, 0.5), 1) for _ in range(20)]
+
+    start = time.perf_counter()
+    app.broadphase.update()
+    print(f"{object_count} objects")
+    print(f"build, with matrices  {(time.perf_counter() - start) * 1000:10.2f} ms")
+
+    naive = time_call(lambda: raytracing.ray_cast_game_objects(Vec3.zero(), rays[0], app.game_objects, view_matrix), 1)
+    picks = iter(rays * 10)
+    with_broadphase = time_call(lambda: raytracing.ray_cast_game_objects(Vec3.zero(), next(picks), app.game_objects, view_matrix, broadphase=app.broadphase), len(rays))
+    print(f"pick, every object    {naive * 1000:10.2f} ms")
+    print(f"pick, broadphase      {with_broadphase * 1000:10.2f} ms  ({naive / with_broadphase:.0f}x)")
+
+    def move_some():
+        for game_object in random.sample(every_object, object_count // 100):
+            transform = game_object.local_transform
+            game_object.update_transform(Transform(transform.pos + Vec3(random.uniform(-1, 1), 0, 0), transform.scale, transform.rotation))
+        app.broadphase.update()
+    print(f"move 1%, refit        {time_call(move_some, 20) * 1000:10.2f} ms")
+
+    def rebuild():
+        app.broadphase.is_tree_dirty = True
+        app.broadphase.update()
+    print(f"rebuild               {time_call(rebuild, 5) * 1000:10.2f} ms")
+    print(f"overlap query         {time_call(lambda: app.broadphase.overlap_query(Vec3(-5, -5, -5), Vec3(5, 5, 5)), 100) * 1000:10.3f} ms")
+    print(f"10 nearest query      {time_call(lambda: app.broadphase.nearest_query(Vec3(1, 2, 3), 10), 100) * 1000:10.3f} ms")
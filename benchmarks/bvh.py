@@ -0,0 +1,68 @@
+"""Ray query times of the BVH against testing every triangle, and its build and cached load times. Run from the project root with python -m benchmarks.bvh [triangle count]"""
+from classes.bvh import BVH, ray_triangles_intersection
+from classes.mesh import load_obj
+from classes import meshcache
+from benchmarks.obj_loader import write_grid_obj
+import numpy as np
+import tempfile
+import time
+import sys
+import os
+
+def load_triangles(obj_path: str) -> np.ndarray:
+    return np.ascontiguousarray(load_obj(obj_path).reshape(-1, 8)[:, 0:3]).reshape(-1, 3, 3)
+
+def create_rays(triangles: np.ndarray, count: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Rays from around the mesh aimed near random triangles, so most of them hit"""
+    rng = np.random.default_rng(0)
+    points = triangles.reshape(-1, 3)
+    center = points.mean(axis=0)
+    size = np.ptp(points, axis=0).max()
+    rays = []
+    for _ in range(count):
+        origin = center + rng.normal(size=3) * size * 2
+        target = triangles[rng.integers(len(triangles))].mean(axis=0) + rng.normal(size=3) * size * 0.01
+        rays.append((origin, target - origin))
+    return rays
+
+def time_queries(query, rays: list[tuple[np.ndarray, np.ndarray]]) -> tuple[float, list]:
+    """Returns the mean time per ray in seconds and the results"""
+    results = []
+    start = time.perf_counter()
+    for origin, dir in rays:
+        results.append(query(origin, dir))
+    return (time.perf_counter() - start) / len(rays), results
+
+def report(name: str, triangles: np.ndarray, bvh: BVH, build_time: float, ray_count: int):
+    rays = create_rays(triangles, ray_count)
+    brute_force, expected = time_queries(lambda origin, dir: ray_triangles_intersection(origin, dir, triangles), rays)
+    closest, hits = time_queries(bvh.closest_hit, rays)
+    any_hit, any_hits = time_queries(bvh.any_hit, rays)
+
+    mismatches = sum((a is None) != (b is None) or (a is not None and abs(a[0] - b[0]) > 1e-5) for a, b in zip(expected, hits))
+    mismatches += sum((a is not None) != b for a, b in zip(expected, any_hits))
+    print(f"{name:<24}{len(triangles):>9}{build_time * 1000:10.1f} ms{brute_force * 1000:10.3f} ms{closest * 1000:10.3f} ms{any_hit * 1000:10.3f} ms{brute_force / closest:8.1f}x  {mismatches} mismatches")
+
+if __name__ == "__main__":
+    synthetic_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'mesh':<24}{'triangles':>9}{'build':>13}{'all tris':>13}{'closest':>13}{'any hit':>13}")
+    for name in ("car.obj", "teapot.obj"):
+        triangles = load_triangles(os.path.join("assets/objects", name))
+        start = time.perf_counter()
+        bvh = BVH(triangles, *BVH.build(triangles))
+        report(name, triangles, bvh, time.perf_counter() - start, 500)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grid.obj")
+        write_grid_obj(path, synthetic_triangles)
+        triangles = load_triangles(path)
+        build = lambda obj_path: BVH.build(triangles)
+        names = ("bvh_bounds", "bvh_data", "bvh_order")
+        start = time.perf_counter()
+        meshcache.load_cached_arrays(path, names, build, directory)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        bvh = BVH(triangles, *meshcache.load_cached_arrays(path, names, build, directory))
+        load_time = time.perf_counter() - start
+        report("grid", triangles, bvh, build_time, 50)
+        print(f"cached load of the grid bvh {load_time * 1000:.1f} ms")
@@ -0,0 +1,43 @@
+"""Frame times of a large open scene with and without frustum culling. Run from the project root with python -m benchmarks.culling [object count]"""
+from classes.renderer import Renderer
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.rendercomponent import RenderComponent
+from classes.vec3 import Vec3
+from classes.editorcamera import EditorCamera
+from benchmarks.instancing import time_frames
+import random
+import sys
+
+def create_open_scene(count: int, size: float) -> list[GameObject]:
+    """Cubes and teapots spread over a flat square around the origin"""
+    game_objects: list[GameObject] = []
+    for i in range(count):
+        obj_path = "assets/objects/teapot.obj" if i % 10 == 0 else "assets/objects/Cube.obj"
+        position = Vec3(random.uniform(-size, size), random.uniform(-2, 2), random.uniform(-size, size))
+        game_objects.append(GameObject(None, f"object {i}", Transform(position, Vec3.one(), Vec3(0, random.uniform(0, 6), 0)), render_component=RenderComponent(obj_path, "assets/images/grey.png")))
+    return game_objects
+
+if __name__ == "__main__":
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    frame_count = 20
+    random.seed(0)
+    renderer = Renderer(1280, 720)
+    game_objects = create_open_scene(object_count, 300)
+    camera = EditorCamera(5, 0.005, 1280, 720, (0, 0, 1280, 720), 0.1, 1000, 90, 1280 / 720)
+    projection_matrix = camera.projection_matrix
+    view_matrix = camera.get_view_matrix()
+
+    # Best of a few runs, frame times on a shared machine are noisy
+    times = {}
+    for use_culling in (False, True, False, True, False, True):
+        renderer.use_culling = use_culling
+        frame_time = time_frames(renderer, game_objects, projection_matrix, view_matrix, frame_count)
+        if frame_time < times.get(use_culling, (float("inf"), 0))[0]:
+            times[use_culling] = (frame_time, renderer.cull_time) # Spheres, culling and lods of the last frame
+    (everything, everything_cull_time), (culled, cull_time) = times[False], times[True]
+
+    print(f"{object_count} objects, {frame_count} frames")
+    print(f"no culling  {everything * 1000:8.2f} ms/frame  (spheres and lods {everything_cull_time * 1000:.2f} ms)")
+    print(f"culling     {culled * 1000:8.2f} ms/frame  (spheres, culling and lods {cull_time * 1000:.2f} ms)  ({everything / culled:.1f}x)")
+    print(f"drawn {renderer.drawn_count}, culled {renderer.culled_count}")
@@ -0,0 +1,83 @@
+"""Runs a scene headless for a fixed number of frames with the camera on a scripted path, and prints the time of each phase of the frame as JSON.
+Works without a display or GPU. Run from the project root with python -m benchmarks.frames [scene json] [--frames N] [--output path]"""
+import os
+# Before pygame and OpenGL are imported, so they pick the offscreen EGL surface
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # Keeps stdout pure JSON
+
+from main import App
+from classes.transform import Transform
+from classes.vec3 import Vec3
+from math import pi, sin, cos
+import numpy as np
+import argparse
+import json
+
+class BenchmarkApp(App):
+    """An App whose camera follows a fixed path instead of the player's input"""
+    def __init__(self, width: int, height: int, FPS: int, scene_path: str, frame_count: int) -> None:
+        self.frame_count = frame_count
+        self.frame = 0
+        super().__init__(width, height, FPS, headless=True, scene_path=scene_path)
+        camera = self.find_camera()
+        self.camera_object = camera.game_object if camera else None
+        self.camera_start = self.camera_object.local_transform.pos if camera else Vec3.zero()
+
+    def update_game_objects(self):
+        super().update_game_objects()
+        if self.camera_object:
+            # One full turn while swaying side to side and back and forth
+            progress = self.frame / max(self.frame_count, 1)
+            angle = progress * 2 * pi
+            position = self.camera_start + Vec3(sin(angle * 2) * 2, 0, (1 - cos(angle)) * 2)
+            self.camera_object.update_transform(Transform(position, self.camera_object.local_transform.scale, Vec3(0, 0, angle)))
+
+    def run_frames(self) -> list[dict[str, float]]:
+        """Runs frame_count frames with a fixed time step, returning the phase times of each"""
+        self.delta_time = 1 / self.FPS
+        self.update_frame() # Warm up so building caches isn't timed
+        frames = []
+        for self.frame in range(self.frame_count):
+            self.delta_time = 1 / self.FPS
+            self.update_frame()
+            frames.append(dict(self.phase_times))
+        return frames
+
+def summarize(times: list[float]) -> dict[str, float]:
+    milliseconds = np.array(times) * 1000
+    return {
+        "mean_ms": round(float(milliseconds.mean()), 3),
+        "median_ms": round(float(np.median(milliseconds)), 3),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 3),
+        "max_ms": round(float(milliseconds.max()), 3)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scene", nargs="?", default="gameobjects.json")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    app = BenchmarkApp(args.width, args.height, args.fps, args.scene, args.frames)
+    frames = app.run_frames()
+    app.destroy()
+
+    phases = list(frames[0]) if frames else []
+    report = {
+        "scene": args.scene,
+        "frames": args.frames,
+        "resolution": [args.width, args.height],
+        "time_step": 1 / args.fps,
+        "phases": {phase: summarize([frame[phase] for frame in frames]) for phase in phases},
+        "frame": summarize([sum(frame.values()) for frame in frames]) if frames else {}
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
@@ -0,0 +1,30 @@
+"""Vertex buffer sizes of the loaded meshes before and after welding them into indexed geometry, which of the two is kept, and the weld times. Run from the project root with python -m benchmarks.indexed [triangle count]"""
+from classes.mesh import load_obj, load_indexed_obj, weld_vertices
+from benchmarks.obj_loader import write_grid_obj
+import tempfile
+import time
+import sys
+import os
+
+def report(name: str, path: str):
+    vertices = load_obj(path)
+    start = time.perf_counter()
+    unique_vertices, indices = weld_vertices(vertices)
+    elapsed = time.perf_counter() - start
+    indexed_size = unique_vertices.nbytes + indices.nbytes
+    loaded_vertices, loaded_indices = load_indexed_obj(path)
+    loaded_size = loaded_vertices.nbytes + loaded_indices.nbytes
+    kept = "indexed" if len(loaded_indices) else "expanded"
+    print(f"{name:<24}{vertices.nbytes / 1024:10.1f} KiB{indexed_size / 1024:10.1f} KiB{loaded_size / 1024:10.1f} KiB {kept:<9}{vertices.nbytes / loaded_size:5.1f}x{elapsed * 1000:10.1f} ms")
+
+if __name__ == "__main__":
+    synthetic_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'mesh':<24}{'expanded':>14}{'indexed':>14}{'loaded':>14}{'':>16}{'weld':>13}")
+    for name in sorted(os.listdir("assets/objects")):
+        if name.endswith(".obj"):
+            report(name, os.path.join("assets/objects", name))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grid.obj")
+        write_grid_obj(path, synthetic_triangles)
+        report(f"grid ({synthetic_triangles} tris)", path)
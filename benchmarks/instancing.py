@@ -0,0 +1,48 @@
+"""Frame times of a scene of cubes drawn one by one and instanced. Run from the project root with python -m benchmarks.instancing [cube count]"""
+from classes.renderer import Renderer
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.rendercomponent import RenderComponent
+from classes.vec3 import Vec3
+from classes.editorcamera import EditorCamera
+from OpenGL.GL import glFinish
+import time
+import sys
+
+def create_cubes(count: int) -> list[GameObject]:
+    cubes: list[GameObject] = []
+    side = int(count ** (1 / 3)) + 1
+    for i in range(count):
+        position = Vec3(i % side * 3 - side * 1.5, i // side % side * 3 - side * 1.5, i // side // side * 3 + 5)
+        cube = GameObject(None, f"cube {i}", Transform(position, Vec3.one(), Vec3.zero()), render_component=RenderComponent("assets/objects/Cube.obj", "assets/images/grey.png"))
+        cubes.append(cube)
+    return cubes
+
+def time_frames(renderer: Renderer, cubes: list[GameObject], projection_matrix, view_matrix, frame_count: int) -> float:
+    """Returns the mean frame time in seconds"""
+    renderer.render_objects_to_fbo(cubes, projection_matrix, view_matrix, flip=False) # Warm up
+    glFinish()
+    start = time.perf_counter()
+    for _ in range(frame_count):
+        renderer.render_objects_to_fbo(cubes, projection_matrix, view_matrix, flip=False)
+    glFinish()
+    return (time.perf_counter() - start) / frame_count
+
+if __name__ == "__main__":
+    cube_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    frame_count = 50
+    renderer = Renderer(1280, 720)
+    cubes = create_cubes(cube_count)
+    camera = EditorCamera(5, 0.005, 1280, 720, (0, 0, 1280, 720), 0.1, 1000, 90, 1280 / 720)
+    projection_matrix = camera.projection_matrix
+    view_matrix = camera.get_view_matrix()
+
+    renderer.use_instancing = False
+    separate = time_frames(renderer, cubes, projection_matrix, view_matrix, frame_count)
+    renderer.use_instancing = True
+    instanced = time_frames(renderer, cubes, projection_matrix, view_matrix, frame_count)
+
+    print(f"{cube_count} cubes, {frame_count} frames")
+    print(f"separate draws  {separate * 1000:8.2f} ms/frame")
+    print(f"instanced       {instanced * 1000:8.2f} ms/frame  ({separate / instanced:.1f}x)")
+    print(f"skipped gl calls {renderer.state.skipped_calls}")
@@ -0,0 +1,39 @@
+"""Frame times of a field of teapots and cars stretching into the distance, with and without LODs. Run from the project root with python -m benchmarks.lod [object count]"""
+from classes.renderer import Renderer
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.rendercomponent import RenderComponent
+from classes.vec3 import Vec3
+from classes.editorcamera import EditorCamera
+from benchmarks.instancing import time_frames
+import random
+import sys
+
+def create_deep_scene(count: int, width: float, depth: float) -> list[GameObject]:
+    """Teapots and cars in front of the camera, most of them far away"""
+    game_objects: list[GameObject] = []
+    for i in range(count):
+        obj_path = "assets/objects/teapot.obj" if i % 2 == 0 else "assets/objects/car.obj"
+        position = Vec3(random.uniform(-width, width), random.uniform(-2, 2), random.uniform(5, depth))
+        game_objects.append(GameObject(None, f"object {i}", Transform(position, Vec3.one(), Vec3(0, random.uniform(0, 6), 0)), render_component=RenderComponent(obj_path, "assets/images/grey.png")))
+    return game_objects
+
+if __name__ == "__main__":
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    frame_count = 20
+    random.seed(0)
+    renderer = Renderer(1280, 720)
+    game_objects = create_deep_scene(object_count, 100, 400)
+    camera = EditorCamera(5, 0.005, 1280, 720, (0, 0, 1280, 720), 0.1, 1000, 90, 1280 / 720)
+    projection_matrix = camera.projection_matrix
+    view_matrix = camera.get_view_matrix()
+
+    renderer.use_lods = False
+    full_detail = time_frames(renderer, game_objects, projection_matrix, view_matrix, frame_count)
+    renderer.use_lods = True
+    simplified = time_frames(renderer, game_objects, projection_matrix, view_matrix, frame_count)
+
+    print(f"{object_count} objects, {frame_count} frames, {renderer.drawn_count} drawn")
+    print(f"no lods  {full_detail * 1000:8.2f} ms/frame")
+    print(f"lods     {simplified * 1000:8.2f} ms/frame  ({full_detail / simplified:.1f}x)")
+    print(f"drawn at each level {renderer.lod_counts}")
@@ -0,0 +1,119 @@
+"""Compares the vectorized obj loader with the old line by line loader. Run from the project root with python -m benchmarks.obj_loader"""
+from classes.mesh import load_obj
+import numpy as np
+import tempfile
+import time
+import os
+import sys
+
+def legacy_load_obj(file_path: str) -> np.ndarray:
+    """The per line loader that load_obj replaced"""
+    vertices: list[float] = []
+    faces: list[str] = []
+    positions = []
+    normals = []
+    uvs = []
+    with open(file_path) as file:
+        lines = [l.strip('\n\r') for l in file]
+        if "car" in file_path or "monkey" in file_path:
+            return legacy_load_obj_other_format(lines)
+        for line in lines:
+            split_line = line.split(" ")
+            split_line = [x for x in split_line if x != ""]
+            match split_line[0]:
+                case "v":
+                    positions.append([split_line[1], split_line[2], split_line[3]])
+                case "vt":
+                    uvs.append([split_line[1], split_line[2]])
+                case "vn":
+                    normals.append([split_line[1], split_line[2], split_line[3]])
+                case "f":
+                    faces.append(split_line[1])
+                    faces.append(split_line[2])
+                    faces.append(split_line[3])
+
+        for face in faces:
+            indices = face.split("/")
+            indices = [int(num) - 1 for num in indices]
+            position = positions[indices[0]]
+            uv = uvs[indices[1]]
+            normal = normals[indices[2]]
+            vertices.extend([float(num) for num in position])
+            vertices.extend([float(num) for num in normal])
+            vertices.extend([float(num) for num in uv])
+
+    return np.array(vertices, dtype=np.float32)
+
+def legacy_load_obj_other_format(lines) -> np.ndarray:
+    vertices: list[float] = []
+    positions: list[tuple[float, float, float]] = []
+    normals: list[tuple[float, float, float]] = []
+    triangles = []
+    for line in lines:
+        if line:
+            split_line = line.split()
+            match split_line[0]:
+                case "v":
+                    positions.append((float(split_line[1]), float(split_line[2]), float(split_line[3])))
+                case "vn":
+                    normals.append((float(split_line[1]), float(split_line[2]), float(split_line[3])))
+                case "f":
+                    triangles.append([[int(x) - 1 for x in split_line[i].split("//")] for i in range(1, 4)])
+    for a, b, c in triangles:
+        vertices.extend(positions[a[0]])
+        vertices.extend(normals[a[1]])
+        vertices.extend([0, 0])
+        vertices.extend(positions[b[0]])
+        vertices.extend(normals[b[1]])
+        vertices.extend([1, 0])
+        vertices.extend(positions[c[0]])
+        vertices.extend(normals[c[1]])
+        vertices.extend([0, 1])
+    return np.array(vertices, dtype=np.float32)
+
+def write_grid_obj(path: str, triangle_count: int):
+    """Writes a flat p/t/n grid mesh with about triangle_count triangles"""
+    size = int((triangle_count / 2) ** 0.5) + 1
+    xs, zs = np.meshgrid(np.arange(size + 1, dtype=np.float32), np.arange(size + 1, dtype=np.float32))
+    positions = np.stack((xs.ravel(), np.zeros(xs.size, dtype=np.float32), zs.ravel()), axis=1)
+    uvs = positions[:, [0, 2]] / size
+
+    quads = np.arange((size + 1) * size).reshape(size, size + 1)[:, :size].ravel() + 1
+    corners = np.stack((quads, quads + 1, quads + size + 2, quads, quads + size + 2, quads + size + 1), axis=1).reshape(-1, 3)
+    with open(path, "w") as file:
+        file.write("".join(f"v {x} {y} {z}\n" for x, y, z in positions))
+        file.write("".join(f"vt {u} {v}\n" for u, v in uvs))
+        file.write("vn 0 1 0\n")
+        file.write("".join(f"f {a}/{a}/1 {b}/{b}/1 {c}/{c}/1\n" for a, b, c in corners))
+
+def time_loader(loader, path: str, repeats: int) -> float | None:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            loader(path)
+        except Exception:
+            return None
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def report(name: str, path: str, repeats: int):
+    legacy = time_loader(legacy_load_obj, path, repeats)
+    vectorized = time_loader(load_obj, path, repeats)
+    legacy_text = f"{legacy * 1000:10.1f} ms" if legacy is not None else "    failed   "
+    speedup = f"{legacy / vectorized:6.1f}x" if legacy is not None else ""
+    print(f"{name:<24}{legacy_text}{vectorized * 1000:10.1f} ms  {speedup}")
+
+if __name__ == "__main__":
+    synthetic_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'mesh':<24}{'legacy':>13}{'vectorized':>13}")
+    for name in sorted(os.listdir("assets/objects")):
+        if name.endswith(".obj"):
+            report(name, os.path.join("assets/objects", name), 5)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grid.obj")
+        write_grid_obj(path, synthetic_triangles)
+        report(f"grid ({synthetic_triangles} tris)", path, 1)
@@ -0,0 +1,29 @@
+"""Cost of a profiler scope when disabled and enabled, against the bare call. Run from the project root with python -m benchmarks.profiler [scope count]"""
+from classes.profiler import Profiler
+import time
+import sys
+
+def work():
+    pass
+
+def time_bare(count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        work()
+    return (time.perf_counter() - start) / count
+
+def time_scoped(profiler: Profiler, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        with profiler.scope("work"):
+            work()
+    return (time.perf_counter() - start) / count
+
+if __name__ == "__main__":
+    scope_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    bare = time_bare(scope_count)
+    disabled = time_scoped(Profiler(), scope_count)
+    enabled = time_scoped(Profiler(enabled=True), scope_count)
+    print(f"bare call        {bare * 1e9:8.1f} ns")
+    print(f"disabled scope   {disabled * 1e9:8.1f} ns  (+{(disabled - bare) * 1e9:.1f} ns)")
+    print(f"enabled scope    {enabled * 1e9:8.1f} ns  (+{(enabled - bare) * 1e9:.1f} ns)")
@@ -0,0 +1,57 @@
+"""Script update times run one by one and in parallel by the scheduler, for scripts whose NumPy work releases the GIL. Run from the project root with python -m benchmarks.scheduler [object count] [worker count]"""
+from classes.gameobject import GameObject
+from classes.monobehaviour import MonoBehaviour
+from classes.scheduler import ScriptScheduler
+import numpy as np
+import time
+import sys
+
+class BenchmarkApp:
+    def __init__(self) -> None:
+        self.transform_store = None
+        self.broadphase = None
+        self.scheduler = None
+        self.game_objects: list[GameObject] = []
+
+class SortSamples(MonoBehaviour):
+    """Stands in for a simulation heavy script, like particles or cloth"""
+    reads = frozenset({"time"})
+    writes = frozenset({"own.samples"})
+
+    def __init__(self, game_object: GameObject, app, sample_count: int) -> None:
+        super().__init__(game_object, app)
+        self.samples = np.random.default_rng(len(app.game_objects)).random(sample_count)
+
+    def update(self):
+        self.samples = np.sort(self.samples + self.delta_time)[::-1].copy()
+
+def create_scene(app: BenchmarkApp, count: int, sample_count: int) -> list[GameObject]:
+    """Objects with a script each, a third of them children"""
+    for i in range(count):
+        game_object = GameObject(app, f"object {i}", script_data=[(SortSamples, [sample_count])])
+        if app.game_objects and i % 3 == 0:
+            app.game_objects[-1].add_child(game_object)
+        else:
+            app.game_objects.append(game_object)
+    return app.game_objects
+
+def time_updates(scheduler: ScriptScheduler, game_objects: list[GameObject], frame_count: int) -> float:
+    scheduler.run(game_objects, "update", 1 / 60) # Warm up
+    start = time.perf_counter()
+    for _ in range(frame_count):
+        scheduler.run(game_objects, "update", 1 / 60)
+    return (time.perf_counter() - start) / frame_count
+
+if __name__ == "__main__":
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    frame_count = 20
+    app = BenchmarkApp()
+    game_objects = create_scene(app, object_count, 200_000)
+    serial = time_updates(ScriptScheduler(1), game_objects, frame_count)
+    scheduler = ScriptScheduler(worker_count)
+    parallel = time_updates(scheduler, game_objects, frame_count)
+    scheduler.destroy()
+    print(f"{object_count} scripts, {scheduler.worker_count} workers")
+    print(f"one by one  {serial * 1000:8.2f} ms/frame")
+    print(f"parallel    {parallel * 1000:8.2f} ms/frame  ({serial / parallel:.1f}x)")
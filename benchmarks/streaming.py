@@ -0,0 +1,74 @@
+"""Time to the first frame and to the whole scene of a large generated scene file, loaded all at once and streamed over frames.
+Works without a display or GPU. Run from the project root with python -m benchmarks.streaming [object count]"""
+import os
+# Before pygame and OpenGL are imported, so they pick the offscreen EGL surface
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+
+from main import App
+from classes.mesh import load_mesh_arrays
+import tempfile
+import random
+import json
+import time
+import sys
+
+MESH_PATHS = ("assets/objects/Cube.obj", "assets/objects/teapot.obj", "assets/objects/monkey.obj", "assets/objects/car.obj")
+
+def create_object_dict(name: str, obj_path: str | None, position: tuple[float, float, float], scripts: list[dict] | None = None) -> dict:
+    return {
+        "name": name,
+        "transform": {
+            "pos": dict(zip("xyz", position)),
+            "rot": {"x": 0, "y": random.uniform(0, 6), "z": 0},
+            "scale": {"x": 1, "y": 1, "z": 1}
+        },
+        "children": [],
+        "render_component": {"obj_path": obj_path, "image_path": "assets/images/grey.png"} if obj_path else None,
+        "scripts": scripts or []
+    }
+
+def write_scene(path: str, count: int, size: float = 300):
+    """A camera and count objects spread over a flat square around the origin"""
+    camera = create_object_dict("camera", None, (0, 0, 0), [{"name": "Camera", "args": [0.1, 1000, 90]}])
+    objects = [camera] + [
+        create_object_dict(f"object {i}", MESH_PATHS[i % len(MESH_PATHS)], (random.uniform(-size, size), random.uniform(-2, 2), random.uniform(-size, size)))
+        for i in range(count)
+    ]
+    with open(path, "w") as file:
+        json.dump({"objects": objects}, file)
+
+def time_loading(path: str, stream_scene: bool) -> tuple[float, float, int, float]:
+    """(seconds to the end of the first frame, seconds until the whole scene is loaded, frames drawn meanwhile, seconds of the longest frame, the first counting the loading before it)"""
+    start = time.perf_counter()
+    app = App(1280, 720, 60, headless=True, scene_path=path, stream_scene=stream_scene)
+    app.delta_time = 1 / 60
+    app.update_frame()
+    first_frame = time.perf_counter() - start
+    frame_count = 1
+    longest_frame = first_frame
+    while app.scene_streamer:
+        frame_start = time.perf_counter()
+        app.update_frame()
+        longest_frame = max(longest_frame, time.perf_counter() - frame_start)
+        frame_count += 1
+    total = time.perf_counter() - start
+    app.destroy()
+    return first_frame, total, frame_count, longest_frame
+
+if __name__ == "__main__":
+    object_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    random.seed(0)
+    for obj_path in MESH_PATHS:
+        load_mesh_arrays(obj_path) # Fills the mesh cache, so both ways read the same files
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scene.json")
+        write_scene(path, object_count)
+        size = os.path.getsize(path)
+        all_at_once = time_loading(path, False)
+        streamed = time_loading(path, True)
+
+    print(f"{object_count} objects, {size / 1e6:.1f} MB")
+    print(f"{'':12}{'first frame':>14}{'whole scene':>14}{'frames':>8}{'longest frame':>16}")
+    for name, (first_frame, total, frame_count, longest_frame) in (("all at once", all_at_once), ("streamed", streamed)):
+        print(f"{name:12}{first_frame * 1000:11.1f} ms{total * 1000:11.1f} ms{frame_count:8}{longest_frame * 1000:13.1f} ms")
@@ -0,0 +1,88 @@
+"""Cost of moving objects in a deep hierarchy with the old eager matrix rebuilds, the lazy dirty flags and the transform store. Run from the project root with python -m benchmarks.transforms"""
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.vec3 import Vec3
+from classes.transformstore import TransformStore
+import classes.transform as transform
+import numpy as np
+import random
+import time
+
+class BenchmarkApp:
+    def __init__(self, use_transform_store: bool) -> None:
+        self.transform_store = TransformStore() if use_transform_store else None
+
+def create_hierarchy(depth: int, level_size: int, app: BenchmarkApp | None = None) -> tuple[list[GameObject], list[GameObject]]:
+    """Returns (top level objects, every object), each object's parent is a random object on the level above"""
+    levels: list[list[GameObject]] = []
+    for level in range(depth):
+        objects = [GameObject(app, f"{level} {i}", Transform(Vec3(1, 0, 0), Vec3.one(), Vec3(0.1, 0, 0))) for i in range(level_size)]
+        if levels:
+            for game_object in objects:
+                random.choice(levels[-1]).add_child(game_object)
+        levels.append(objects)
+    return levels[0], [game_object for level in levels for game_object in level]
+
+def legacy_update_transform(game_object: GameObject, new_transform: Transform, world_matrices: dict[GameObject, np.ndarray]):
+    """The old GameObject.update_transform, rebuilding the whole parent chain of every descendant"""
+    game_object.local_transform = new_transform
+    world_matrices[game_object] = transform.create_entire_model_matrix(game_object.local_transform, game_object.parent)
+    for child in game_object.children:
+        legacy_update_transform(child, child.local_transform, world_matrices)
+
+def time_frames(frame_count: int, update) -> float:
+    start = time.perf_counter()
+    for frame in range(frame_count):
+        update(frame)
+    return (time.perf_counter() - start) / frame_count
+
+if __name__ == "__main__":
+    random.seed(0)
+    depth = 10
+    roots, game_objects = create_hierarchy(depth, 1000)
+    random.seed(0)
+    store_roots, store_game_objects = create_hierarchy(depth, 1000, BenchmarkApp(True))
+    moved = roots[:10] # Moving these changes about 1% of the scene
+    frame_count = 5
+
+    def legacy_frame(frame: int):
+        world_matrices: dict[GameObject, np.ndarray] = {}
+        for game_object in moved:
+            legacy_update_transform(game_object, Transform(Vec3(frame, 0, 0), Vec3.one(), Vec3.zero()), world_matrices)
+
+    def lazy_frame(frame: int):
+        for game_object in moved:
+            game_object.update_transform(Transform(Vec3(frame, 0, 0), Vec3.one(), Vec3.zero()))
+        for game_object in game_objects: # What the renderer reads
+            game_object.local_transform.model_matrix
+
+    def legacy_all_frame(frame: int):
+        world_matrices: dict[GameObject, np.ndarray] = {}
+        for game_object in roots:
+            legacy_update_transform(game_object, Transform(Vec3(frame, 0, 0), Vec3.one(), Vec3.zero()), world_matrices)
+
+    def lazy_all_frame(frame: int):
+        for game_object in roots:
+            game_object.update_transform(Transform(Vec3(frame, 0, 0), Vec3.one(), Vec3.zero()))
+        for game_object in game_objects:
+            game_object.local_transform.model_matrix
+
+    def store_frame(frame: int):
+        for game_object in store_roots[:10]:
+            game_object.update_transform(Transform(Vec3(frame, 0, 0), Vec3.one(), Vec3.zero()))
+        store_roots[0].local_transform.store.update()
+
+    def store_all_frame(frame: int):
+        # Scripts driving many objects can write the arrays directly
+        store = store_roots[0].local_transform.store
+        store.positions[[root.local_transform.index for root in store_roots], 0] = frame
+        store.is_dirty = True
+        store.update()
+
+    lazy_frame(-1) # Build every matrix once
+    print(f"{len(game_objects)} objects, {depth} levels")
+    print(f"{'':<20}{'legacy':>12}{'dirty flags':>12}{'store':>12}")
+    results = [time_frames(frame_count, frame) for frame in (legacy_frame, lazy_frame, store_frame)]
+    print(f"{'move 10 roots':<20}" + "".join(f"{result * 1000:9.1f} ms" for result in results))
+    results = [time_frames(frame_count, frame) for frame in (legacy_all_frame, lazy_all_frame, store_all_frame)]
+    print(f"{'move every root':<20}" + "".join(f"{result * 1000:9.1f} ms" for result in results))
@@ -0,0 +1,80 @@
+"""Time to handle button presses and patch the rows of the editor's hierarchy with 10k entries, and a dispatch table lookup against the linear scan
+over every button it replaced. Works without a display. Run from the project root with python -m benchmarks.uidispatch [entry count]"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+
+import pygame as pg
+import pygame_gui as pgui
+from classes.gameobject import GameObject
+from classes.editoritems import Hierarchy
+from classes.uidispatcher import UIDispatcher
+import random
+import time
+import sys
+
+class SceneStub:
+    """Stands in for the app, game objects only need its list"""
+    def __init__(self) -> None:
+        self.game_objects: list[GameObject] = []
+
+def create_tree(app: SceneStub, count: int) -> list[GameObject]:
+    """count objects, half of them children of an earlier one"""
+    game_objects: list[GameObject] = []
+    for i in range(count):
+        game_object = GameObject(app, f"object {i}")
+        if game_objects and random.random() < 0.5:
+            random.choice(game_objects).add_child(game_object)
+        else:
+            app.game_objects.append(game_object)
+        game_objects.append(game_object)
+    return game_objects
+
+def time_per_call(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    entry_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    random.seed(0)
+    pg.init()
+    pg.display.set_mode((1280, 720))
+    ui_manager = pgui.UIManager((1280, 720))
+    dispatcher = UIDispatcher()
+    app = SceneStub()
+    create_tree(app, entry_count)
+
+    start = time.perf_counter()
+    hierarchy = Hierarchy(pg.Rect(25, 75, 256, 620), ui_manager, app.game_objects, dispatcher, lambda game_object: hierarchy.build(game_object))
+    build_time = time.perf_counter() - start
+
+    # Scrolled half way down, press the first row in view, which selects it like the editor does
+    hierarchy.update_y_scroll(-hierarchy.y_distance / 2)
+    hierarchy.build(None)
+    scroll_time = time_per_call(lambda: (hierarchy.update_y_scroll(-20), hierarchy.scroll()), 50)
+    event = pg.event.Event(pgui.UI_BUTTON_PRESSED, ui_element=next(iter(hierarchy.game_object_buttons)))
+    press_time = time_per_call(lambda: dispatcher.dispatch(event), 200)
+    # Taking rows out and putting them back where they were, as deleting and undoing or moving does
+    game_objects = random.sample(hierarchy.rows, 200)
+    patch_time = time_per_call(lambda: (hierarchy.remove_object(game_objects[-1][0]), hierarchy.add_object(game_objects.pop()[0])), 200)
+
+    # The lookup alone against scanning a button per entry, as check_events did
+    elements = [object() for _ in range(entry_count)]
+    for element in elements:
+        dispatcher.register(pgui.UI_BUTTON_PRESSED, element, lambda event: None)
+    last_event = pg.event.Event(pgui.UI_BUTTON_PRESSED, ui_element=elements[-1])
+    def scan():
+        for element in elements:
+            if last_event.ui_element == element:
+                break
+    scan_time = time_per_call(scan, 200)
+    lookup_time = time_per_call(lambda: dispatcher.dispatch(last_event), 2000)
+
+    print(f"{entry_count} hierarchy entries, {len(hierarchy.buttons)} buttons made")
+    print(f"build hierarchy     {build_time * 1000:9.3f} ms")
+    print(f"scroll a notch      {scroll_time * 1000:9.3f} ms")
+    print(f"press and select    {press_time * 1000:9.3f} ms")
+    print(f"remove and add rows {patch_time * 1000:9.3f} ms")
+    print(f"scan {entry_count} buttons  {scan_time * 1000:9.3f} ms")
+    print(f"dispatch lookup     {lookup_time * 1000:9.3f} ms  ({scan_time / lookup_time:.0f}x)")
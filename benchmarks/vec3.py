@@ -0,0 +1,92 @@
+"""Per operation times and memory of Vec3 against the old dict based Vec3, and of Vec3Array for bulk math. Run from the project root with python -m benchmarks.vec3"""
+from classes.vec3 import Vec3, Vec3Array
+from collections import namedtuple
+from math import sqrt
+import numpy as np
+import tracemalloc
+import timeit
+
+class LegacyVec3:
+    """The Vec3 before __slots__ and in place methods"""
+    def __init__(self, x: float, y: float, z: float) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __add__(self, other):
+        if type(other) == LegacyVec3:
+            return LegacyVec3(self.x + other.x, self.y + other.y, self.z + other.z)
+        raise TypeError
+
+    def __mul__(self, other):
+        if type(other) in [float, int, np.float64, np.float32]:
+            return LegacyVec3(self.x * other, self.y * other, self.z * other)
+        elif type(other) == LegacyVec3:
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        raise TypeError
+
+    def __truediv__(self, other):
+        if type(other) in [float, int]:
+            return LegacyVec3(self.x / other, self.y / other, self.z / other)
+
+    def __abs__(self):
+        return sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    def normalize(self):
+        if abs(self) != 0:
+            return self / abs(self)
+        return self
+
+    def mat_mul(self, other, transpose = False):
+        if type(other) == np.ndarray and type(other[0]) == np.ndarray:
+            Vec4 = namedtuple('Vec4', "x y z w")
+            self4 = Vec4(self.x, self.y, self.z, 1)
+            return LegacyVec3(
+                self4.x * other[0][0] + self4.y * other[1][0] + self4.z * other[2][0] + self4.w * other[3][0],
+                self4.x * other[0][1] + self4.y * other[1][1] + self4.z * other[2][1] + self4.w * other[3][1],
+                self4.x * other[0][2] + self4.y * other[1][2] + self4.z * other[2][2] + self4.w * other[3][2]
+            )
+        raise TypeError
+
+def time_op(statement: str, namespace: dict, number: int) -> float:
+    """Best time of one run of statement in nanoseconds"""
+    return min(timeit.repeat(statement, globals=namespace, number=number, repeat=5)) / number * 1e9
+
+def measure_memory(create, count: int) -> float:
+    """Bytes per object"""
+    tracemalloc.start()
+    objects = [create(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+if __name__ == "__main__":
+    matrix = np.random.rand(4, 4).astype(np.float32)
+    operations = [
+        ("a + b", 200_000),
+        ("a * 2.0", 200_000),
+        ("a * b", 200_000),
+        ("a.normalize()", 200_000),
+        ("a.mat_mul(matrix, True)", 20_000),
+    ]
+    print(f"{'operation':<26}{'legacy':>10}{'Vec3':>10}")
+    for statement, number in operations:
+        legacy = time_op(statement, {"a": LegacyVec3(1.0, 2.0, 3.0), "b": LegacyVec3(3.0, 2.0, 1.0), "matrix": matrix}, number)
+        new = time_op(statement, {"a": Vec3(1.0, 2.0, 3.0), "b": Vec3(3.0, 2.0, 1.0), "matrix": matrix}, number)
+        print(f"{statement:<26}{legacy:7.0f} ns{new:7.0f} ns  ({legacy / new:.1f}x)")
+    in_place = time_op("a.add_in_place(b)", {"a": Vec3(1.0, 2.0, 3.0), "b": Vec3(3.0, 2.0, 1.0)}, 200_000)
+    print(f"{'a.add_in_place(b)':<26}{'':>10}{in_place:7.0f} ns")
+
+    count = 100_000
+    legacy_size = measure_memory(lambda i: LegacyVec3(float(i), 0.0, 0.0), count)
+    new_size = measure_memory(lambda i: Vec3(float(i), 0.0, 0.0), count)
+    array_size = Vec3Array.zeros(count).data.nbytes / count
+    print(f"\nbytes per vector: legacy {legacy_size:.0f}, Vec3 {new_size:.0f}, Vec3Array {array_size:.0f}")
+
+    vectors = [Vec3(float(i), 1.0, 2.0) for i in range(count)]
+    array = Vec3Array(vectors)
+    offset = Vec3(1.0, 2.0, 3.0)
+    loop = min(timeit.repeat(lambda: [(vector + offset).normalize() for vector in vectors], number=1, repeat=3))
+    bulk = min(timeit.repeat(lambda: (array + offset).normalize(), number=1, repeat=3))
+    print(f"add + normalize {count} vectors: Vec3 loop {loop * 1000:.1f} ms, Vec3Array {bulk * 1000:.2f} ms ({loop / bulk:.0f}x)")
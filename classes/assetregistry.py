@@ -0,0 +1,125 @@
+from __future__ import annotations
+from classes.mesh import Mesh, load_mesh_arrays
+from classes.texture import Texture2D
+from concurrent.futures import ThreadPoolExecutor, Future
+import logging
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from classes.rendercomponent import RenderComponent
+
+# Drawn in place of meshes that are still loading, or that failed to
+PLACEHOLDER_MESH_PATH = "assets/objects/Default.obj"
+
+logger = logging.getLogger(__name__)
+
+class AssetRegistry:
+    """Hands out shared meshes and textures by path, deleting the GPU objects once nothing uses them"""
+    def __init__(self) -> None:
+        self.meshes: dict[str, Mesh] = {}
+        self.textures: dict[str, Texture2D] = {}
+        self.ref_counts: dict[Mesh | Texture2D, int] = {}
+
+        # Meshes being read on background threads, and the components to give them to once they are
+        self.loader: ThreadPoolExecutor | None = None
+        self.loading_meshes: dict[str, Future] = {}
+        self.waiting_components: dict[str, list[RenderComponent]] = {}
+
+    def get_mesh(self, obj_path: str) -> Mesh:
+        mesh = self.meshes.get(obj_path)
+        if mesh is None:
+            mesh = Mesh(obj_path)
+            self.meshes[obj_path] = mesh
+            self.ref_counts[mesh] = 0
+        self.ref_counts[mesh] += 1
+        return mesh
+
+    def get_mesh_streamed(self, obj_path: str, component: RenderComponent) -> Mesh:
+        """The mesh if it's loaded. Otherwise starts loading it in the background and returns the placeholder mesh,
+        load_finished_meshes gives component the real one later"""
+        if obj_path in self.meshes:
+            return self.get_mesh(obj_path)
+        if obj_path not in self.loading_meshes:
+            if self.loader is None:
+                self.loader = ThreadPoolExecutor(2, thread_name_prefix="meshes")
+            self.loading_meshes[obj_path] = self.loader.submit(load_mesh_arrays, obj_path)
+        self.waiting_components.setdefault(obj_path, []).append(component)
+        return self.get_mesh(PLACEHOLDER_MESH_PATH)
+
+    def cancel_streamed_mesh(self, obj_path: str, component: RenderComponent):
+        """Stops component waiting for a mesh, it still holds the placeholder"""
+        components = self.waiting_components.get(obj_path)
+        if components and component in components:
+            components.remove(component)
+
+    def load_finished_meshes(self) -> list[RenderComponent]:
+        """Makes the GL buffers of the meshes that finished loading and swaps them into the components waiting for them.
+        Returns those components. Components whose mesh failed to load keep the placeholder"""
+        loaded_components: list[RenderComponent] = []
+        for obj_path, future in list(self.loading_meshes.items()):
+            if not future.done():
+                continue
+            del self.loading_meshes[obj_path]
+            components = self.waiting_components.pop(obj_path, [])
+            try:
+                vertices, indices = future.result()
+            except Exception as exception: # A missing or broken file shouldn't stop the scene
+                logger.error("Couldn't load %s, drawing %d objects with the placeholder mesh", obj_path, len(components), exc_info=exception)
+                continue
+            if not components:
+                continue
+            if obj_path not in self.meshes: # Unless it was loaded synchronously meanwhile
+                mesh = Mesh(obj_path, vertices, indices)
+                self.meshes[obj_path] = mesh
+                self.ref_counts[mesh] = 0
+            for component in components:
+                placeholder = component.mesh
+                component.set_mesh(self.get_mesh(obj_path))
+                self.release_mesh(placeholder)
+            loaded_components.extend(components)
+        return loaded_components
+
+    def is_loading(self) -> bool:
+        return bool(self.loading_meshes)
+
+    def get_texture(self, image_path: str) -> Texture2D:
+        texture2d = self.textures.get(image_path)
+        if texture2d is None:
+            texture2d = Texture2D(image_path)
+            self.textures[image_path] = texture2d
+            self.ref_counts[texture2d] = 0
+        self.ref_counts[texture2d] += 1
+        return texture2d
+
+    def release_mesh(self, mesh: Mesh):
+        if self.release(mesh):
+            del self.meshes[mesh.obj_path]
+
+    def release_texture(self, texture2d: Texture2D):
+        if self.release(texture2d):
+            del self.textures[texture2d.image_path]
+
+    def release(self, asset: Mesh | Texture2D) -> bool:
+        """Drops a reference to the asset, returns whether it was the last one"""
+        self.ref_counts[asset] -= 1
+        if self.ref_counts[asset] > 0:
+            return False
+        del self.ref_counts[asset]
+        asset.destroy()
+        return True
+
+    def get_ref_count(self, asset: Mesh | Texture2D) -> int:
+        return self.ref_counts.get(asset, 0)
+
+    def destroy(self):
+        if self.loader is not None:
+            self.loader.shutdown(cancel_futures=True)
+            self.loader = None
+        self.loading_meshes.clear()
+        self.waiting_components.clear()
+        for asset in self.ref_counts:
+            asset.destroy()
+        self.meshes.clear()
+        self.textures.clear()
+        self.ref_counts.clear()
+
+registry = AssetRegistry()
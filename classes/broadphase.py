@@ -0,0 +1,211 @@
+from __future__ import annotations
+from classes.bvh import build_bvh, get_leaf_positions, get_ray_box_distances, get_surface_areas
+from classes.rendercomponent import RenderComponent
+from classes.vec3 import Vec3, VECTOR_TYPES
+from threading import RLock
+import numpy as np
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from classes.gameobject import GameObject
+
+class Broadphase:
+    """World space bounding boxes of every game object in flat arrays, with a BVH over them for ray, overlap and nearest queries.
+    Moved objects only have their boxes recomputed and the tree refit. The tree is rebuilt when objects are added or removed, or once refitting has made it too loose"""
+    def __init__(self, capacity: int = 64) -> None:
+        self.bounds = np.zeros((capacity, 6), dtype=np.float32) # min xyz, max xyz of each slot
+        self.game_objects: list[GameObject | None] = [] # Of each slot
+        self.slots: dict[GameObject, int] = {}
+        self.free_slots: list[int] = []
+        self.dirty_objects: set[GameObject] = set() # Moved since their boxes were last computed
+        self.default_render_component: RenderComponent | None = None # Used for the bounds of objects without an active one
+
+        # The tree, whose leaves hold ranges of order, which holds slots
+        self.node_bounds = np.zeros((0, 6), dtype=np.float32)
+        self.node_data = np.zeros((0, 3), dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.levels: list[np.ndarray] = [] # Inner nodes of each depth, for refitting from the bottom up
+        self.leaves = np.zeros(0, dtype=np.int64) # Sorted by where their range starts
+        self.built_area = 0.0 # Total node surface area right after the last build
+        self.is_tree_dirty = False
+        self.max_loosening = 2.0 # Rebuild once refitting has grown the total node surface area by this much
+        self.lock = RLock() # Scripts on the scheduler's pool move objects and query at the same time
+
+    def add(self, game_object: GameObject):
+        if game_object in self.slots:
+            return
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.game_objects[slot] = game_object
+        else:
+            slot = len(self.game_objects)
+            if slot == len(self.bounds):
+                bounds = np.zeros((len(self.bounds) * 2, 6), dtype=np.float32)
+                bounds[:slot] = self.bounds
+                self.bounds = bounds
+            self.game_objects.append(game_object)
+        self.slots[game_object] = slot
+        self.dirty_objects.add(game_object)
+        self.is_tree_dirty = True
+
+    def remove(self, game_object: GameObject):
+        slot = self.slots.pop(game_object, None)
+        if slot is None:
+            return
+        self.game_objects[slot] = None
+        self.free_slots.append(slot)
+        self.dirty_objects.discard(game_object)
+        self.is_tree_dirty = True
+
+    def mark_dirty(self, game_object: GameObject):
+        if game_object in self.slots:
+            with self.lock:
+                self.dirty_objects.add(game_object)
+
+    def set_default_render_component(self, render_component: RenderComponent | None):
+        self.default_render_component = render_component
+        self.dirty_objects.update(self.slots)
+
+    def get_local_bounds(self, game_object: GameObject) -> np.ndarray:
+        """Model space bounds of the object's mesh, objects without one are a point at their origin"""
+        render_component = game_object.render_component
+        if not render_component.is_active and self.default_render_component:
+            render_component = self.default_render_component
+        if render_component.is_active:
+            return render_component.mesh.get_bounds()
+        return np.zeros(6, dtype=np.float32)
+
+    def update(self):
+        """Recomputes the boxes of moved objects and refits or rebuilds the tree"""
+        with self.lock: # Reentrant, queries hold it while they read the tree
+            if self.dirty_objects:
+                game_objects = list(self.dirty_objects)
+                self.dirty_objects.clear()
+                slots = [self.slots[game_object] for game_object in game_objects]
+                local_bounds = np.array([self.get_local_bounds(game_object) for game_object in game_objects], dtype=np.float32)
+                matrices = np.array([game_object.local_transform.model_matrix for game_object in game_objects], dtype=np.float32)
+
+                # The box around the transformed box, from its center and half size
+                centers = (local_bounds[:, 0:3] + local_bounds[:, 3:6]) / 2
+                extents = (local_bounds[:, 3:6] - local_bounds[:, 0:3]) / 2
+                world_centers = np.einsum("ni,nij->nj", centers, matrices[:, 0:3, 0:3]) + matrices[:, 3, 0:3]
+                world_extents = np.einsum("ni,nij->nj", extents, np.abs(matrices[:, 0:3, 0:3]))
+                self.bounds[slots, 0:3] = world_centers - world_extents
+                self.bounds[slots, 3:6] = world_centers + world_extents
+                if not self.is_tree_dirty:
+                    self.refit()
+            if self.is_tree_dirty:
+                self.rebuild()
+
+    def rebuild(self):
+        used = np.array(sorted(self.slots.values()), dtype=np.int64)
+        self.node_bounds, self.node_data, order = build_bvh(self.bounds[used, 0:3], self.bounds[used, 3:6], leaf_size=4, max_leaf_size=16)
+        self.order = used[order]
+
+        self.levels = []
+        nodes = np.array([0]) if len(self.node_data) else np.zeros(0, dtype=np.int64)
+        while len(nodes):
+            first_children = self.node_data[nodes, 0]
+            inner_nodes = nodes[first_children >= 0]
+            if len(inner_nodes):
+                self.levels.append(inner_nodes)
+            first_children = first_children[first_children >= 0]
+            nodes = np.concatenate((first_children, first_children + 1))
+        leaves = np.flatnonzero(self.node_data[:, 0] < 0)
+        self.leaves = leaves[np.argsort(self.node_data[leaves, 1])]
+        self.built_area = float(get_surface_areas(self.node_bounds[:, 0:3], self.node_bounds[:, 3:6]).sum())
+        self.is_tree_dirty = False
+
+    def refit(self):
+        """Grows or shrinks every node to fit the current boxes without changing the tree"""
+        if len(self.node_data) == 0:
+            return
+        bounds = self.bounds[self.order]
+        starts = self.node_data[self.leaves, 1]
+        self.node_bounds[self.leaves, 0:3] = np.minimum.reduceat(bounds[:, 0:3], starts)
+        self.node_bounds[self.leaves, 3:6] = np.maximum.reduceat(bounds[:, 3:6], starts)
+        for nodes in reversed(self.levels):
+            first_children = self.node_data[nodes, 0]
+            self.node_bounds[nodes, 0:3] = np.minimum(self.node_bounds[first_children, 0:3], self.node_bounds[first_children + 1, 0:3])
+            self.node_bounds[nodes, 3:6] = np.maximum(self.node_bounds[first_children, 3:6], self.node_bounds[first_children + 1, 3:6])
+        if get_surface_areas(self.node_bounds[:, 0:3], self.node_bounds[:, 3:6]).sum() > self.built_area * self.max_loosening:
+            self.is_tree_dirty = True
+
+    def find_slots(self, box_test) -> np.ndarray:
+        """Slots whose boxes pass box_test, which takes (n, 6) bounds and returns a mask. Nodes failing it are skipped with everything in them"""
+        with self.lock:
+            self.update()
+            found = []
+            nodes = np.array([0]) if len(self.node_data) else np.zeros(0, dtype=np.int64)
+            while len(nodes):
+                nodes = nodes[box_test(self.node_bounds[nodes])]
+                first_children = self.node_data[nodes, 0]
+                leaves = nodes[first_children < 0]
+                if len(leaves):
+                    slots = self.order[get_leaf_positions(self.node_data, leaves)]
+                    found.append(slots[box_test(self.bounds[slots])])
+                first_children = first_children[first_children >= 0]
+                nodes = np.concatenate((first_children, first_children + 1))
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def ray_query(self, origin: Vec3 | np.ndarray, dir: Vec3 | np.ndarray, t_max: float = np.inf) -> list[tuple[float, GameObject]]:
+        """(t where the ray enters the box, game object) of every box the world space ray hits before t_max, closest first"""
+        origin = to_array(origin)
+        dir = to_array(dir)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_dir = 1 / dir
+            def is_hit(bounds: np.ndarray) -> np.ndarray:
+                t_enter, t_exit = get_ray_box_distances(bounds, origin, inv_dir)
+                return (t_exit >= np.maximum(t_enter, 0)) & (t_enter < t_max)
+            with self.lock:
+                slots = self.find_slots(is_hit)
+                t_enter = np.maximum(get_ray_box_distances(self.bounds[slots], origin, inv_dir)[0], 0)
+        order = np.argsort(t_enter, kind="stable")
+        return [(t, self.game_objects[slot]) for t, slot in zip(t_enter[order].tolist(), slots[order].tolist())]
+
+    def overlap_query(self, bounds_min: Vec3 | np.ndarray, bounds_max: Vec3 | np.ndarray) -> list[GameObject]:
+        """Every game object whose box overlaps the world space box"""
+        bounds_min = to_array(bounds_min)
+        bounds_max = to_array(bounds_max)
+        def is_overlapping(bounds: np.ndarray) -> np.ndarray:
+            return np.all(bounds[:, 0:3] <= bounds_max, axis=1) & np.all(bounds[:, 3:6] >= bounds_min, axis=1)
+        return [self.game_objects[slot] for slot in self.find_slots(is_overlapping).tolist()]
+
+    def nearest_query(self, point: Vec3 | np.ndarray, k: int = 1) -> list[GameObject]:
+        """The k game objects whose boxes are closest to the world space point, closest first"""
+        with self.lock:
+            self.update()
+            point = to_array(point)
+            if k <= 0 or len(self.node_data) == 0:
+                return []
+            found_slots = np.zeros(0, dtype=np.int64)
+            found_distances = np.zeros(0)
+            max_distance = np.inf # Of the kth closest found so far, nodes further than it can't have closer objects
+            nodes = np.array([0])
+            while len(nodes):
+                nodes = nodes[get_box_distances(self.node_bounds[nodes], point) <= max_distance]
+                first_children = self.node_data[nodes, 0]
+                leaves = nodes[first_children < 0]
+                if len(leaves):
+                    slots = self.order[get_leaf_positions(self.node_data, leaves)]
+                    found_slots = np.concatenate((found_slots, slots))
+                    found_distances = np.concatenate((found_distances, get_box_distances(self.bounds[slots], point)))
+                    if len(found_slots) > k:
+                        closest = np.argpartition(found_distances, k - 1)[:k]
+                        found_slots = found_slots[closest]
+                        found_distances = found_distances[closest]
+                    if len(found_slots) == k:
+                        max_distance = found_distances.max()
+                first_children = first_children[first_children >= 0]
+                nodes = np.concatenate((first_children, first_children + 1))
+            order = np.argsort(found_distances, kind="stable")
+            return [self.game_objects[slot] for slot in found_slots[order].tolist()]
+
+def get_box_distances(bounds: np.ndarray, point: np.ndarray) -> np.ndarray:
+    """Distance from the point to each box, 0 inside it"""
+    offsets = np.maximum(np.maximum(bounds[:, 0:3] - point, point - bounds[:, 3:6]), 0)
+    return np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+
+def to_array(vector: Vec3 | np.ndarray) -> np.ndarray:
+    if type(vector) in VECTOR_TYPES:
+        return np.array(vector.to_list(), dtype=np.float64)
+    return np.asarray(vector, dtype=np.float64)[0:3]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import numpy as np
+
+# Meshes with at most this many triangles are quicker to test all at once than level by level
+BRUTE_FORCE_TRIANGLE_COUNT = 4096
+
+class BVH:
+    """A bounding volume hierarchy over a mesh's triangles, stored in flat arrays:
+    node_bounds (n, 6): min xyz, max xyz
+    node_data (n, 3): first child (the second is the one after it, -1 for leaves), first triangle, triangle count
+    triangle_order (m,): the original index of each triangle, leaves own contiguous ranges of it"""
+    def __init__(self, triangles: np.ndarray, node_bounds: np.ndarray, node_data: np.ndarray, triangle_order: np.ndarray) -> None:
+        self.node_bounds = node_bounds
+        self.node_data = node_data
+        self.triangle_order = triangle_order
+        self.triangles = triangles[triangle_order] # Reordered so each leaf's triangles are next to each other
+
+    @staticmethod
+    def build(triangles: np.ndarray, leaf_size: int = 16, max_leaf_size: int = 64, bin_count: int = 16) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (node_bounds, node_data, triangle_order) for the triangles"""
+        return build_bvh(triangles.min(axis=1), triangles.max(axis=1), leaf_size, max_leaf_size, bin_count)
+
+    def get_leaf_triangles(self, leaves: np.ndarray) -> np.ndarray:
+        """Positions in self.triangles of every triangle in the leaves"""
+        return get_leaf_positions(self.node_data, leaves)
+
+    def intersect_nodes(self, nodes: np.ndarray, origin: np.ndarray, inv_dir: np.ndarray, t_max: float) -> np.ndarray:
+        """Returns which nodes' boxes the ray enters before t_max"""
+        t_enter, t_exit = get_ray_box_distances(self.node_bounds[nodes], origin, inv_dir)
+        return (t_exit >= np.maximum(t_enter, 0)) & (t_enter < t_max)
+
+    def closest_hit(self, origin: np.ndarray, dir: np.ndarray, t_max: float = np.inf) -> tuple[float, int, float, float] | None:
+        """Same as ray_triangles_intersection on the whole mesh: (t, triangle index, u, v) of the closest hit"""
+        return self.traverse(origin, dir, t_max, False)
+
+    def any_hit(self, origin: np.ndarray, dir: np.ndarray, t_max: float = np.inf) -> bool:
+        """Whether the ray hits anything before t_max, stopping at the first hit found"""
+        return self.traverse(origin, dir, t_max, True) is not None
+
+    def traverse(self, origin: np.ndarray, dir: np.ndarray, t_max: float, stop_at_first_hit: bool) -> tuple[float, int, float, float] | None:
+        """Tests a whole level of the tree at a time, skipping nodes further than the closest hit so far"""
+        if len(self.node_data) == 0 or len(self.triangles) == 0:
+            return None
+        origin = np.asarray(origin, dtype=np.float64)
+        dir = np.asarray(dir, dtype=np.float64)
+        if len(self.triangles) <= BRUTE_FORCE_TRIANGLE_COUNT:
+            hit = ray_triangles_intersection(origin, dir, self.triangles)
+            if hit is None or hit[0] >= t_max:
+                return None
+            return hit[0], int(self.triangle_order[hit[1]]), hit[2], hit[3]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.traverse_levels(origin, dir, 1 / dir, t_max, stop_at_first_hit)
+
+    def traverse_levels(self, origin: np.ndarray, dir: np.ndarray, inv_dir: np.ndarray, t_max: float, stop_at_first_hit: bool) -> tuple[float, int, float, float] | None:
+        closest_hit = None
+        nodes = np.array([0])
+        while len(nodes):
+            nodes = nodes[self.intersect_nodes(nodes, origin, inv_dir, t_max)]
+            first_children = self.node_data[nodes, 0]
+            leaves = nodes[first_children < 0]
+            if len(leaves):
+                triangle_positions = self.get_leaf_triangles(leaves)
+                hit = ray_triangles_intersection(origin, dir, self.triangles[triangle_positions])
+                if hit and hit[0] < t_max:
+                    t_max = hit[0]
+                    closest_hit = (hit[0], int(self.triangle_order[triangle_positions[hit[1]]]), hit[2], hit[3])
+                    if stop_at_first_hit:
+                        return closest_hit
+            first_children = first_children[first_children >= 0]
+            nodes = np.concatenate((first_children, first_children + 1))
+        return closest_hit
+
+def build_bvh(mins: np.ndarray, maxs: np.ndarray, leaf_size: int = 16, max_leaf_size: int = 64, bin_count: int = 16) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Binned SAH construction over (n, 3) box bounds, splitting every node of a level at once. Returns (node_bounds, node_data, order)"""
+    box_count = len(mins)
+    if box_count == 0:
+        return np.zeros((0, 6), dtype=np.float32), np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    order = np.zeros(box_count, dtype=np.int64)
+    node_bounds = np.zeros((max(1, 2 * box_count // leaf_size + 1), 6), dtype=np.float32) # Grown as nodes are added
+    node_data = np.full((len(node_bounds), 3), -1, dtype=np.int64)
+    node_count = 1
+
+    # The boxes of the nodes still to be split or made leaves, grouped by node
+    indices = np.arange(box_count, dtype=np.int64)
+    centroids = (mins + maxs) / 2
+    level_nodes = np.array([0])
+    level_starts = np.array([0]) # Where each node's boxes begin in order
+    counts = np.array([box_count])
+    while len(level_nodes):
+        segment_count = len(level_nodes)
+        segment_offsets = np.cumsum(counts) - counts
+        segments = np.repeat(np.arange(segment_count), counts)
+
+        # Node bounds and centroid bounds
+        bounds_min = np.minimum.reduceat(mins, segment_offsets)
+        bounds_max = np.maximum.reduceat(maxs, segment_offsets)
+        node_bounds[level_nodes, 0:3] = bounds_min
+        node_bounds[level_nodes, 3:6] = bounds_max
+        centroid_min = np.minimum.reduceat(centroids, segment_offsets)
+        extents = np.maximum.reduceat(centroids, segment_offsets) - centroid_min
+        axes = np.argmax(extents, axis=1)
+        axis_extents = extents[np.arange(segment_count), axes]
+
+        # Bin the centroids along each node's longest axis
+        box_axes = axes[segments]
+        scale = bin_count / np.where(axis_extents > 0, axis_extents, 1)
+        bins = ((centroids[np.arange(len(segments)), box_axes] - centroid_min[segments, box_axes]) * scale[segments]).astype(np.int64)
+        bins = np.clip(bins, 0, bin_count - 1)
+        keys = segments * bin_count + bins
+        bin_counts = np.bincount(keys, minlength=segment_count * bin_count).reshape(segment_count, bin_count)
+
+        key_order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[key_order]
+        group_starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        bin_min = np.full((segment_count * bin_count, 3), np.inf, dtype=np.float32)
+        bin_max = np.full((segment_count * bin_count, 3), -np.inf, dtype=np.float32)
+        bin_min[sorted_keys[group_starts]] = np.minimum.reduceat(mins[key_order], group_starts)
+        bin_max[sorted_keys[group_starts]] = np.maximum.reduceat(maxs[key_order], group_starts)
+        bin_min = bin_min.reshape(segment_count, bin_count, 3)
+        bin_max = bin_max.reshape(segment_count, bin_count, 3)
+
+        # Cost of splitting after each bin: surface area * box count of each side
+        left_area = get_surface_areas(np.minimum.accumulate(bin_min, axis=1), np.maximum.accumulate(bin_max, axis=1))
+        right_area = get_surface_areas(np.minimum.accumulate(bin_min[:, ::-1], axis=1)[:, ::-1], np.maximum.accumulate(bin_max[:, ::-1], axis=1)[:, ::-1])
+        left_counts = np.cumsum(bin_counts, axis=1)
+        right_counts = counts[:, None] - left_counts + bin_counts
+        costs = left_area[:, :-1] * left_counts[:, :-1] + right_area[:, 1:] * right_counts[:, 1:]
+        costs = np.where((left_counts[:, :-1] == 0) | (right_counts[:, 1:] == 0), np.inf, costs)
+        best_bins = np.argmin(costs, axis=1)
+        best_costs = costs[np.arange(segment_count), best_bins]
+        leaf_costs = get_surface_areas(bounds_min, bounds_max) * counts
+
+        is_leaf = (counts <= leaf_size) | (axis_extents <= 0) | ~np.isfinite(best_costs) | ((best_costs >= leaf_costs) & (counts <= max_leaf_size))
+        node_data[level_nodes[is_leaf], 1] = level_starts[is_leaf]
+        node_data[level_nodes[is_leaf], 2] = counts[is_leaf]
+        is_leaf_box = is_leaf[segments]
+        leaf_positions = level_starts[segments] + np.arange(len(segments)) - segment_offsets[segments]
+        order[leaf_positions[is_leaf_box]] = indices[is_leaf_box]
+
+        # Children are added in pairs, and their boxes are kept in the same order with each left side before its right side
+        splitting = np.flatnonzero(~is_leaf)
+        left_sizes = left_counts[splitting, best_bins[splitting]]
+        children = node_count + 2 * np.arange(len(splitting))
+        node_count += 2 * len(splitting)
+        if node_count > len(node_bounds):
+            node_bounds = np.concatenate((node_bounds, np.zeros((node_count, 6), dtype=np.float32)))
+            node_data = np.concatenate((node_data, np.full((node_count, 3), -1, dtype=np.int64)))
+        node_data[level_nodes[splitting], 0] = children
+
+        kept = np.flatnonzero(~is_leaf_box)
+        kept = kept[np.argsort(segments[kept] * 2 + (bins[kept] > best_bins[segments[kept]]), kind="stable")]
+        indices = indices[kept]
+        mins = mins[kept]
+        maxs = maxs[kept]
+        centroids = centroids[kept]
+
+        starts = level_starts[splitting]
+        level_nodes = np.stack((children, children + 1), axis=1).ravel()
+        level_starts = np.stack((starts, starts + left_sizes), axis=1).ravel()
+        counts = np.stack((left_sizes, counts[splitting] - left_sizes), axis=1).ravel()
+
+    return node_bounds[:node_count], node_data[:node_count], order
+
+def get_leaf_positions(node_data: np.ndarray, leaves: np.ndarray) -> np.ndarray:
+    """Positions in the order array of everything in the leaves"""
+    counts = node_data[leaves, 2]
+    offsets = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) - np.repeat(offsets - node_data[leaves, 1], counts)
+
+def get_ray_box_distances(bounds: np.ndarray, origin: np.ndarray, inv_dir: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The t values where a ray enters and exits each (min xyz, max xyz) box, missed boxes have exit < enter"""
+    t = (bounds.reshape(-1, 2, 3) - origin) * inv_dir
+    # fmin/fmax ignore the nans from 0 * inf when the ray lies on a box plane
+    t_enter = np.fmax.reduce(np.fmin(t[:, 0], t[:, 1]), axis=1)
+    t_exit = np.fmin.reduce(np.fmax(t[:, 0], t[:, 1]), axis=1)
+    return t_enter, t_exit
+
+def get_surface_areas(bounds_min: np.ndarray, bounds_max: np.ndarray) -> np.ndarray:
+    """Surface areas of boxes, 0 for empty (inverted) ones"""
+    size = np.maximum(bounds_max - bounds_min, 0)
+    return size[..., 0] * size[..., 1] + size[..., 1] * size[..., 2] + size[..., 2] * size[..., 0]
+
+def ray_triangles_intersection(origin: np.ndarray, dir: np.ndarray, triangles: np.ndarray) -> tuple[float, int, float, float] | None:
+    """Moller-Trumbore against every (3, 3) triangle at once. Returns (t, triangle index, u, v) of the closest hit"""
+    epsilon = 1e-6
+
+    vertex_0 = triangles[:, 0]
+    edge_1 = triangles[:, 1] - vertex_0
+    edge_2 = triangles[:, 2] - vertex_0
+    ray_cross_e2 = cross(dir, edge_2)
+    det = np.einsum("ij,ij->i", edge_1, ray_cross_e2)
+
+    is_parallel = np.abs(det) < 1e-12
+    inv_det = 1 / np.where(is_parallel, 1, det)
+    s = origin - vertex_0
+    u = np.einsum("ij,ij->i", s, ray_cross_e2) * inv_det
+    s_cross_e1 = cross(s, edge_1)
+    v = (s_cross_e1 @ dir) * inv_det
+    t = np.einsum("ij,ij->i", edge_2, s_cross_e1) * inv_det
+
+    is_hit = ~is_parallel & (u >= 0) & (u <= 1) & (v >= 0) & (u + v <= 1) & (t > epsilon)
+    if not is_hit.any():
+        return None
+    index = int(np.argmin(np.where(is_hit, t, np.inf)))
+    return float(t[index]), index, float(u[index]), float(v[index])
+
+def cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """np.cross for (..., 3) arrays, which has a lot of overhead for the small arrays of a BVH leaf"""
+    return np.stack((
+        a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+        a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+        a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    ), axis=-1)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from classes.monobehaviour import MonoBehaviour
+
+class ComponentIndex:
+    """Every live component of an app by type, so finding them doesn't walk the scene tree"""
+    def __init__(self) -> None:
+        # Dicts as insertion ordered sets, oldest component first
+        self.components: dict[type, dict[MonoBehaviour, None]] = {}
+        # The registered types that are a type or its subclasses, cleared when a new type is registered
+        self.subclasses: dict[type, list[type]] = {}
+
+    def add(self, component: MonoBehaviour):
+        components = self.components.get(type(component))
+        if components is None:
+            components = self.components[type(component)] = {}
+            self.subclasses.clear()
+        components[component] = None
+
+    def remove(self, component: MonoBehaviour):
+        components = self.components.get(type(component))
+        if components is not None:
+            components.pop(component, None)
+
+    def get_types(self, wanted_type: type) -> list[type]:
+        types = self.subclasses.get(wanted_type)
+        if types is None:
+            types = self.subclasses[wanted_type] = [component_type for component_type in self.components if issubclass(component_type, wanted_type)]
+        return types
+
+    def get_components(self, wanted_type: type) -> list[MonoBehaviour]:
+        """Every live component that is a wanted_type, including subclasses"""
+        return [component for component_type in self.get_types(wanted_type) for component in self.components[component_type]]
+
+    def get_component(self, wanted_type: type) -> MonoBehaviour | None:
+        """The oldest live component of the exact type, or else of a subclass"""
+        components = self.components.get(wanted_type)
+        if components:
+            return next(iter(components))
+        for component_type in self.get_types(wanted_type):
+            for component in self.components[component_type]:
+                return component
+        return None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from threading import Thread, Event, Lock
+from pathlib import Path
+import os
+
+# (name, path, is a folder, size in bytes) of a file or folder
+FileEntry = tuple[str, str, bool, int]
+
+class DirectoryIndex:
+    """The contents of every folder under root, listed on a worker thread and polled for changes every poll_interval seconds,
+    so browsing folders never waits on the disk"""
+    def __init__(self, root: str, poll_interval: float = 2.0) -> None:
+        self.root = Path(root)
+        self.poll_interval = poll_interval
+        # Folders first then files, both by name. A folder's list is replaced rather than changed, so it can be compared by identity
+        self.folders: dict[Path, list[FileEntry]] = {}
+        self.lock = Lock()
+        self.is_ready = Event() # Set after the first walk
+        self.stopping = Event()
+        self.thread = Thread(target=self.run, name="directory index", daemon=True)
+        self.thread.start()
+
+    def get_entries(self, folder: Path | str) -> list[FileEntry] | None:
+        """The folder's contents, None if it hasn't been listed yet or doesn't exist"""
+        with self.lock:
+            return self.folders.get(Path(folder))
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.update()
+            self.is_ready.set()
+            self.stopping.wait(self.poll_interval)
+
+    def update(self):
+        """Lists every folder again, swapping in the lists that changed and dropping folders that are gone"""
+        folders: dict[Path, list[FileEntry]] = {}
+        to_list = [self.root]
+        listed: set[str] = set() # Real paths, so links back up the tree aren't followed forever
+        while to_list:
+            folder = to_list.pop()
+            real_path = os.path.realpath(folder)
+            if real_path in listed:
+                continue
+            listed.add(real_path)
+            entries = list_folder(folder)
+            if entries is None:
+                continue
+            folders[folder] = entries
+            to_list.extend(Path(path) for _, path, is_folder, _ in entries if is_folder)
+        with self.lock:
+            for folder, entries in folders.items():
+                if self.folders.get(folder) != entries:
+                    self.folders[folder] = entries
+            for folder in self.folders.keys() - folders.keys():
+                del self.folders[folder]
+
+    def destroy(self):
+        self.stopping.set()
+        self.thread.join()
+
+def list_folder(folder: Path) -> list[FileEntry] | None:
+    try:
+        with os.scandir(folder) as scan:
+            entries = []
+            for entry in scan:
+                try:
+                    is_folder = entry.is_dir()
+                    size = 0 if is_folder else entry.stat().st_size
+                except OSError: # Removed while listing
+                    continue
+                entries.append((entry.name, str(folder / entry.name), is_folder, size))
+    except OSError:
+        return None
+    entries.sort(key=lambda entry: (not entry[2], entry[0]))
+    return entries
@@ -70,10 +70,10 @@ class EditorCamera:
             move_vector.z += 1
         move_vector = move_vector.normalize() * self.speed * delta_time
         if keys[pg.K_LSHIFT]:
-            move_vector *= 2
+            move_vector.mul_in_place(2)
         
         move_vector = Vec3(move_vector.x * cos(-self.yaw) - move_vector.z * sin(-self.yaw), move_vector.y, move_vector.x * sin(-self.yaw) + move_vector.z * cos(-self.yaw))
-        self.pos += move_vector
+        self.pos.add_in_place(move_vector) # Only the camera holds its position
     
     def get_view_matrix(self, usePosition = True):
         camera_matrix = mat4.create_identity(dtype=np.float32)
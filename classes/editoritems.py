@@ -4,6 +4,8 @@ import pygame_gui as pgui
 from classes.gameobject import GameObject
 from classes.transform import Transform
 from classes.vec3 import Vec3
+from classes.uidispatcher import UIDispatcher
+from classes.directoryindex import DirectoryIndex, FileEntry
 import inspect
 import typing
 from pydoc import locate
@@ -144,7 +146,7 @@ class InputPanel:
             text.kill()
 
 class ScrollableContainer:
-    """Children should have a build function, set the x/y_distance variable, and use x/y_scroll in building themselves. x/y_distance is the size of the content I think"""
+    """Children should have build and scroll functions, set the x/y_distance variable, and use x/y_scroll in building themselves. x/y_distance is the size of the content I think"""
     def __init__(self) -> None:
         self.x_scroll = 0
         self.y_scroll = 0
@@ -173,16 +175,23 @@ class ScrollableContainer:
     def build(self, game_object: GameObject):
         """Function to be overriden that (re)builds the object to take into acount scrolling"""
 
+    def scroll(self):
+        """Function to be overriden that shows the content at the current x/y_scroll, called after updating them"""
+
 class Hierarchy(ScrollableContainer):
-    def __init__(self, rect: pg.Rect, ui_manager: pgui.UIManager, game_objects: list[GameObject]) -> None:
+    """The scene tree as a list of buttons. Only the rows in view have buttons, which are reused as the list scrolls,
+    and the flattened tree is patched when objects are added or removed instead of being rebuilt"""
+    def __init__(self, rect: pg.Rect, ui_manager: pgui.UIManager, game_objects: list[GameObject], dispatcher: UIDispatcher, on_pressed: typing.Callable[[GameObject], None]) -> None:
+        """on_pressed is called with the object of a pressed row"""
         super().__init__()
         self.rect = rect
         self.panel = pgui.elements.UIPanel(self.rect, manager=ui_manager)
         self.ui_manager = ui_manager
         self.game_objects = game_objects
-        self.game_object_buttons: dict[pgui.core.UIElement, GameObject] = {}
+        self.dispatcher = dispatcher
+        self.on_pressed = on_pressed
+        self.selected_object: GameObject | None = None
         self.moving = False
-        self.move_button: pgui.elements.UIButton | None = None
 
         self.x_distance = 0
         self.y_distance = 0
@@ -194,42 +203,139 @@ class Hierarchy(ScrollableContainer):
 
         self.move_button_margin = 10
         self.move_button_size = 50
+        self.move_button = pgui.elements.UIButton(pg.Rect(0, 0, self.move_button_size, self.move_button_size), "", self.ui_manager, self.panel, object_id="@move_button", visible=False)
+        self.dispatcher.register(pgui.UI_BUTTON_PRESSED, self.move_button, lambda event: self.toggle_move_button())
+
+        # (game object, depth) of every row, in the order they're shown
+        self.rows: list[tuple[GameObject, int]] = []
+        # Where each object is in rows. Right for every row before numbered_rows, edits move that back to where they were made
+        # and get_row numbers the rows after it as far as it needs to. Entries of later rows may be out of date
+        self.row_indices: dict[GameObject, int] = {}
+        self.numbered_rows = 0
+        self.depth_counts: dict[int, int] = {} # How many rows have each depth, for the width of the deepest one
+        # Reused for whichever rows are in view, with the object id each was last given
+        self.buttons: dict[pgui.elements.UIButton, str | None] = {}
+        # The buttons in view and the objects they show
+        self.game_object_buttons: dict[pgui.core.UIElement, GameObject] = {}
+        self.build_rows()
         self.build(None)
 
-    def build(self, selected_object: GameObject | None = None):
-        self.destroy()
-        self.current_y = self.y_scroll + self.button_top_margin
-        self.x_distance = 0
-        self.y_distance = 0
-        for game_object in self.game_objects:
-            self.build_object(game_object, selected_object)
-
-    def build_object(self, game_object: GameObject, selected_object: GameObject | None, x_depth: int = 0):
-        x = self.x_margin + self.depth_offset * x_depth + self.x_scroll
-        right = x + self.button_width + self.move_button_margin + self.move_button_size + self.x_margin
-        if right - self.x_scroll > self.x_distance:
-            self.x_distance = right - self.x_scroll
-
-        object_id = None
-        if selected_object == game_object:
-            object_id = "@bright_button"
-            self.move_button = pgui.elements.UIButton(pg.Rect(x + self.button_width + self.move_button_margin, self.current_y, self.move_button_size, self.move_button_size), "", self.ui_manager, self.panel, object_id="@move_button")
-        button = pgui.elements.UIButton(pg.Rect(x, self.current_y, self.button_width, self.button_height), game_object.name, self.ui_manager, container=self.panel, object_id=object_id)
-        self.game_object_buttons[button] = game_object
-
-        self.current_y += self.button_height + self.button_top_margin
+    def build_rows(self):
+        """Flattens the whole tree, patch it with add_object and remove_object after that"""
+        self.rows = []
+        self.row_indices = {}
+        self.numbered_rows = 0
+        self.depth_counts = {}
+        self.insert_rows(0, [row for game_object in self.game_objects for row in get_rows(game_object, 0)])
+
+    def add_object(self, game_object: GameObject):
+        """Adds the rows of a game object and its children where it is in the tree"""
+        parent = game_object.parent
+        parent_row = self.get_row(parent) if parent else None
+        siblings = parent.children if parent else self.game_objects
+        index = siblings.index(game_object)
+        if index > 0: # After the rows of the sibling before it
+            position = self.get_subtree_end(self.get_row(siblings[index - 1]))
+        else:
+            position = 0 if parent_row is None else parent_row + 1
+        depth = 0 if parent_row is None else self.rows[parent_row][1] + 1
+        self.insert_rows(position, get_rows(game_object, depth))
+
+    def remove_object(self, game_object: GameObject):
+        """Removes the rows of a game object and its children, call before moving it or after destroying it"""
+        row = self.get_row(game_object)
+        end = self.get_subtree_end(row)
+        for row_object, depth in self.rows[row:end]:
+            self.row_indices.pop(row_object, None)
+            self.depth_counts[depth] -= 1
+            if not self.depth_counts[depth]:
+                del self.depth_counts[depth]
+        del self.rows[row:end]
+        self.numbered_rows = min(self.numbered_rows, row)
+        self.update_distances()
+
+    def insert_rows(self, position: int, rows: list[tuple[GameObject, int]]):
+        self.rows[position:position] = rows
+        for _, depth in rows:
+            self.depth_counts[depth] = self.depth_counts.get(depth, 0) + 1
+        self.numbered_rows = min(self.numbered_rows, position)
+        self.update_distances()
+
+    def get_row(self, game_object: GameObject) -> int:
+        row = self.row_indices.get(game_object)
+        if row is not None and row < len(self.rows) and self.rows[row][0] is game_object:
+            return row
+        # Every row before numbered_rows has the right entry, so the object is after them
+        for row in range(self.numbered_rows, len(self.rows)):
+            row_object = self.rows[row][0]
+            self.row_indices[row_object] = row
+            if row_object is game_object:
+                self.numbered_rows = row + 1
+                return row
+        self.numbered_rows = len(self.rows)
+        raise ValueError(f"{game_object.name} isn't in the hierarchy")
+
+    def get_subtree_end(self, row: int) -> int:
+        """The row after the last child of the object in row"""
+        depth = self.rows[row][1]
+        end = row + 1
+        while end < len(self.rows) and self.rows[end][1] > depth:
+            end += 1
+        return end
+
+    def update_distances(self):
+        max_depth = max(self.depth_counts, default=0)
+        self.x_distance = self.x_margin + self.depth_offset * max_depth + self.button_width + self.move_button_margin + self.move_button_size + self.x_margin
+        self.y_distance = self.button_top_margin + len(self.rows) * (self.button_height + self.button_top_margin)
+        # Rows may have been removed from under the view
+        self.update_x_scroll(0)
+        self.update_y_scroll(0)
 
-        if self.current_y - self.y_scroll > self.y_distance:
-            self.y_distance = self.current_y - self.y_scroll
+    def build(self, selected_object: GameObject | None = None):
+        """Shows the rows in view, reusing the buttons. Names are refreshed, so also call after renaming"""
+        self.selected_object = selected_object
+        row_pitch = self.button_height + self.button_top_margin
+        first_row = max(int((-self.y_scroll - self.button_top_margin - self.button_height) // row_pitch) + 1, 0)
+        end_row = min(int((self.rect.height - self.button_top_margin - self.y_scroll) // row_pitch) + 1, len(self.rows))
+        buttons = list(self.buttons)
+        self.game_object_buttons = {}
+        self.move_button.hide()
+        for i, row in enumerate(range(first_row, end_row)):
+            game_object, depth = self.rows[row]
+            if i == len(buttons):
+                buttons.append(self.create_button())
+            button = buttons[i]
+            x = self.x_margin + self.depth_offset * depth + self.x_scroll
+            y = self.button_top_margin + row * row_pitch + self.y_scroll
+            button.set_relative_position((x, y))
+            button.set_text(game_object.name)
+            object_id = "@bright_button" if game_object is selected_object else None
+            if self.buttons[button] != object_id:
+                button.change_object_id(object_id)
+                self.buttons[button] = object_id
+            button.show()
+            self.game_object_buttons[button] = game_object
+            if game_object is selected_object:
+                self.move_button.set_relative_position((x + self.button_width + self.move_button_margin, y))
+                self.move_button.show()
+        for button in buttons[len(self.game_object_buttons):]:
+            button.hide()
+
+    def scroll(self):
+        self.build(self.selected_object)
+
+    def create_button(self) -> pgui.elements.UIButton:
+        button = pgui.elements.UIButton(pg.Rect(0, 0, self.button_width, self.button_height), "", self.ui_manager, container=self.panel)
+        self.buttons[button] = None
+        self.dispatcher.register(pgui.UI_BUTTON_PRESSED, button, lambda event: self.on_pressed(self.game_object_buttons[button]))
+        return button
 
-        for child in game_object.children:
-            self.build_object(child, selected_object, x_depth + 1)
-    
     def destroy(self):
-        for button in self.game_object_buttons:
+        for button in list(self.buttons) + [self.move_button]:
+            self.dispatcher.unregister(button)
             button.kill()
-        if self.move_button:
-            self.move_button.kill()
+        self.buttons.clear()
+        self.game_object_buttons.clear()
 
     def toggle_move_button(self):
         if not self.moving:
@@ -238,20 +344,46 @@ class Hierarchy(ScrollableContainer):
             self.move_button.change_object_id("@move_button")
         self.moving = not self.moving
 
+def get_rows(game_object: GameObject, depth: int) -> list[tuple[GameObject, int]]:
+    """(game object, depth) of game_object and everything under it, parents before their children"""
+    rows: list[tuple[GameObject, int]] = []
+    game_objects = [(game_object, depth)]
+    while game_objects:
+        game_object, depth = game_objects.pop()
+        rows.append((game_object, depth))
+        game_objects.extend((child, depth + 1) for child in reversed(game_object.children))
+    return rows
+
 class Inspector(ScrollableContainer):
-    def __init__(self, rect: pg.Rect, ui_manager: pgui.UIManager) -> None:
+    def __init__(
+                self,
+                rect: pg.Rect,
+                ui_manager: pgui.UIManager,
+                dispatcher: UIDispatcher,
+                on_input: typing.Callable[[InputPanel], None],
+                on_delete_component: typing.Callable[[InputPanel], None],
+                on_delete_object: typing.Callable[[], None]
+                ) -> None:
+        """on_input is called with the panel of a field whose text was entered, on_delete_component with the panel whose delete button was pressed"""
         super().__init__()
         self.ui_manager = ui_manager
+        self.dispatcher = dispatcher
+        self.on_input = on_input
+        self.on_delete_component = on_delete_component
+        self.on_delete_object = on_delete_object
         self.rect = rect
         self.panel = pgui.elements.UIPanel(rect, manager=ui_manager)
         self.delete_button: None | pgui.elements.UIButton = None
         
         self.input_panels: list[InputPanel] = []
+        self.game_object: GameObject | None = None
+        self.panels_y_scroll = 0 # The scroll the panels are placed for
 
     @staticmethod
     def render_component_update_function(game_object: GameObject, rows: list[list[pgui.elements.UITextEntryLine]], func_data: list[any]):
         game_object.render_component.update_paths(rows[0][0].text, rows[1][0].text)
         game_object.render_component.is_bright = True
+        game_object.invalidate_bounds()
 
     @staticmethod
     def transform_update_function(game_object: GameObject, rows: list[list[pgui.elements.UITextEntryLine]], func_data: list[any]):
@@ -306,18 +438,21 @@ class Inspector(ScrollableContainer):
         self.build(game_object)
 
     def destroy(self):
-            self.x_distance = 0
-            self.y_distance = 0
-            try:
-                self.delete_button.kill()
-                for input_panel in self.input_panels:
-                    input_panel.destroy()
-                self.input_panels.clear()
-            except:
-                pass
+        self.x_distance = 0
+        self.y_distance = 0
+        if self.delete_button is not None:
+            self.dispatcher.unregister(self.delete_button)
+            self.delete_button.kill()
+            self.delete_button = None
+        for input_panel in self.input_panels:
+            for element in [input_panel.delete_button] + [field for row in input_panel.rows for field in row]:
+                self.dispatcher.unregister(element)
+            input_panel.destroy()
+        self.input_panels.clear()
 
     def build(self, game_object: GameObject):
         self.destroy()
+        self.panels_y_scroll = self.y_scroll
         if game_object:
 
             current_y = self.y_scroll
@@ -325,6 +460,7 @@ class Inspector(ScrollableContainer):
             delete_button_padding = 10
             delete_button_size = 50
             self.delete_button = pgui.elements.UIButton(pg.Rect(self.panel.relative_rect.width - delete_button_padding - delete_button_size, delete_button_padding + current_y, delete_button_size, delete_button_size), "", self.ui_manager, object_id="@delete_button", container=self.panel)
+            self.dispatcher.register(pgui.UI_BUTTON_PRESSED, self.delete_button, lambda event: self.on_delete_object())
             current_y += self.delete_button.rect.height + delete_button_padding
             x_margin = 10
             y_margin = 20
@@ -332,7 +468,7 @@ class Inspector(ScrollableContainer):
             
             # Name panel
             name_panel = InputPanel(self.rect.width, x_margin, current_y, [[game_object.name]], self.name_update_function, self.panel, self.ui_manager, game_object.name, ["Name"], [[""]])
-            self.input_panels.append(name_panel)
+            self.add_input_panel(name_panel)
             current_y += name_panel.rect.height + y_margin
 
             # Transform panel
@@ -346,7 +482,7 @@ class Inspector(ScrollableContainer):
             item_labels.append(["x", "y", "z"])
             item_labels.append(["x", "y", "z"])
             transform_panel = InputPanel(self.rect.width, x_margin, current_y, default_values, self.transform_update_function, self.panel, self.ui_manager, "Transform", row_labels, item_labels)
-            self.input_panels.append(transform_panel)
+            self.add_input_panel(transform_panel)
             current_y += transform_panel.rect.height + y_margin
 
             # Render object panel
@@ -358,7 +494,7 @@ class Inspector(ScrollableContainer):
             row_labels = ["", "", ""]
 
             render_component_panel = InputPanel(self.rect.width, x_margin, current_y, default_values, self.render_component_update_function, self.panel, self.ui_manager, "Render Component", row_labels, item_labels)
-            self.input_panels.append(render_component_panel)
+            self.add_input_panel(render_component_panel)
             current_y += render_component_panel.rect.height + y_margin
 
             # Component panels
@@ -369,40 +505,76 @@ class Inspector(ScrollableContainer):
                     default_values.append([str(arg)])
                     item_labels.append([inspect.getfullargspec(script[0].__init__).args[i + 3]])
                 component_panel = InputPanel(self.rect.width, x_margin, current_y, default_values, self.custom_component_update_function, self.panel, self.ui_manager, script[0].__qualname__, item_labels=item_labels, func_data=[script[0]], delete_function=self.delete_custom_component)
-                self.input_panels.append(component_panel)
+                self.add_input_panel(component_panel)
                 current_y += component_panel.rect.height + y_margin
             
             # Add component panel
             add_component_panel = InputPanel(self.rect.width, x_margin, current_y, [[""]], self.add_component_function, self.panel, self.ui_manager, "Add Component")
-            self.input_panels.append(add_component_panel)
+            self.add_input_panel(add_component_panel)
             current_y += add_component_panel.rect.height + y_margin
 
             self.y_distance = current_y - self.y_scroll
 
+    def add_input_panel(self, input_panel: InputPanel):
+        self.input_panels.append(input_panel)
+        for row in input_panel.rows:
+            for field in row:
+                self.dispatcher.register(pgui.UI_TEXT_ENTRY_FINISHED, field, lambda event: self.on_input(input_panel))
+        if input_panel.delete_button:
+            self.dispatcher.register(pgui.UI_BUTTON_PRESSED, input_panel.delete_button, lambda event: self.on_delete_component(input_panel))
+
+    def scroll(self):
+        """Moves the panels to the current scroll instead of making them again"""
+        offset = self.y_scroll - self.panels_y_scroll
+        elements = [input_panel.panel for input_panel in self.input_panels]
+        if self.delete_button is not None:
+            elements.append(self.delete_button)
+        for element in elements:
+            element.set_relative_position((element.relative_rect.x, element.relative_rect.y + offset))
+        self.panels_y_scroll = self.y_scroll
+
 class CreationButtons:
-    def __init__(self, bottom_rect: pg.Rect, ui_manager: pgui.UIManager) -> None:
+    def __init__(self, bottom_rect: pg.Rect, ui_manager: pgui.UIManager, dispatcher: UIDispatcher, on_create: typing.Callable[[], None], on_create_child: typing.Callable[[], None]) -> None:
         self.bottom_rect = bottom_rect
         self.ui_manager = ui_manager
+        self.dispatcher = dispatcher
+        self.on_create_child = on_create_child
         self.button_width = 190
         self.button_height = 50
         self.button_width_gap = 5
         self.button_height_gap = 5
         self.create_top_level_button = pgui.elements.UIButton(pg.Rect(self.bottom_rect.centerx - self.button_width_gap/2 - self.button_width, self.bottom_rect.top - self.button_height - self.button_height_gap, self.button_width, self.button_height), "Create Game Object")
+        self.dispatcher.register(pgui.UI_BUTTON_PRESSED, self.create_top_level_button, lambda event: on_create())
         self.child_button_rect = pg.Rect(self.bottom_rect.centerx + self.button_width_gap/2, self.bottom_rect.top - self.button_height - self.button_height_gap, self.button_width, self.button_height)
-        self.child_button = pgui.elements.UIButton(self.child_button_rect, "Create Child Game Object", object_id="@grey_button")
+        self.child_button = None
+        self.disable_child_button()
     
     def enable_child_button(self):
-        self.child_button.kill()
-        self.child_button = pgui.elements.UIButton(self.child_button_rect, "Create Child Game Object")
+        self.set_child_button(None)
 
     def disable_child_button(self):
-        self.child_button.kill()
-        self.child_button = pgui.elements.UIButton(self.child_button_rect, "Create Child Game Object", object_id="@grey_button")
+        self.set_child_button("@grey_button")
+
+    def set_child_button(self, object_id: str | None):
+        if self.child_button:
+            self.dispatcher.unregister(self.child_button)
+            self.child_button.kill()
+        self.child_button = pgui.elements.UIButton(self.child_button_rect, "Create Child Game Object", object_id=object_id)
+        self.dispatcher.register(pgui.UI_BUTTON_PRESSED, self.child_button, lambda event: self.on_create_child())
     
+# Buttons of files by extension, other files get the default button
+FILE_BUTTON_IDS = {"py": "@py_file_button", "obj": "@obj_file_button", "png": "@png_file_button"}
+
 class FileDisplay(ScrollableContainer):
-    def __init__(self, rect: pg.Rect, ui_manager: pgui.UIManager, base_path_str: str) -> None:
+    """The files and folders of the current folder as a grid of buttons, read from a directory index so the disk isn't touched.
+    Only the rows in view have buttons"""
+    def __init__(self, rect: pg.Rect, ui_manager: pgui.UIManager, base_path_str: str, index: DirectoryIndex, dispatcher: UIDispatcher, on_file_pressed: typing.Callable[[str], None]) -> None:
+        """on_file_pressed is called with the path of a pressed file, pressing a folder opens it"""
         super().__init__()
         self.rect = rect
+        self.index = index
+        self.dispatcher = dispatcher
+        self.on_file_pressed = on_file_pressed
         self.icon_size = 100
         self.x_margin = 25
         self.y_margin = 25
@@ -421,57 +593,65 @@ class FileDisplay(ScrollableContainer):
         self.base_path = Path(base_path_str)
         self.current_path = Path(base_path_str)
         self.folder_buttons: dict[pgui.elements.UIButton, str] = dict()
-        self.file_buttons: list[pgui.elements.UIButton] = dict()
+        self.file_buttons: dict[pgui.elements.UIButton, str] = dict()
         self.labels: list[pgui.elements.UILabel] = []
+        # The index's list for the current folder when the buttons were made, it's replaced when the folder changes
+        self.shown_entries: list[FileEntry] | None = None
         self.build()
+
+    def update(self):
+        """Rebuilds if the current folder changed on disk, call every frame"""
+        if self.index.get_entries(self.current_path) is not self.shown_entries:
+            self.build()
     
     def build(self, ignore=None):
         self.destroy()
-        row = 0
-        col = 0
-
-        if str(self.base_path) != str(self.current_path):
-            button_rect = pg.Rect(self.x_margin + row * self.x_gap + row * self.icon_size, self.y_margin + col * self.y_gap + col * self.icon_size + self.y_scroll, self.icon_size, self.icon_size)
-            prev_dir_string = str(self.current_path)[0:self.current_path.as_posix().rindex("/")]
-            self.folder_buttons[pgui.elements.UIButton(button_rect, "", self.ui_manager, self.panel, parent_element=self.panel, object_id="@folder_button")] = prev_dir_string
-            self.labels.append(pgui.elements.UILabel(pg.Rect(button_rect.left, button_rect.bottom, button_rect.width, self.y_gap), "...", self.ui_manager, self.panel, self.panel))
-            row += 1
-
-        for sub_dir in [x for x in self.current_path.iterdir() if x.is_dir()]:
-            button_rect = pg.Rect(self.x_margin + row * self.x_gap + row * self.icon_size, self.y_margin + col * self.y_gap + col * self.icon_size + self.y_scroll, self.icon_size, self.icon_size)
-            self.folder_buttons[pgui.elements.UIButton(button_rect, "", self.ui_manager, self.panel, parent_element=self.panel, object_id="@folder_button")] = str(sub_dir)
-            self.labels.append(pgui.elements.UILabel(pg.Rect(button_rect.left, button_rect.bottom, button_rect.width, self.y_gap), sub_dir.as_posix().split("/")[-1], self.ui_manager, self.panel, self.panel))
-            row += 1
-            if row == self.row_size:
-                row = 0
-                col += 1
-
-        for sub_file in [x for x in self.current_path.iterdir() if x.is_file()]:
-            file_extension = str(sub_file).split(".")[-1]
-            object_id = ""
-            match file_extension:
-                case "py":
-                    object_id = "@py_file_button"
-                case "obj":
-                    object_id = "@obj_file_button"
-                case "png":
-                    object_id = "@png_file_button"
-            button_rect = pg.Rect(self.x_margin + row * self.x_gap + row * self.icon_size, self.y_margin + col * self.y_gap + col * self.icon_size + self.y_scroll, self.icon_size, self.icon_size)
-            self.file_buttons[pgui.elements.UIButton(button_rect, "", self.ui_manager, self.panel, parent_element=self.panel, object_id=object_id)] = str(sub_file)
-            self.labels.append(pgui.elements.UILabel(pg.Rect(button_rect.left, button_rect.bottom, button_rect.width, self.y_gap), sub_file.as_posix().split("/")[-1], self.ui_manager, self.panel, self.panel))
-            row += 1
-            if row == self.row_size:
-                row = 0
-                col += 1
-
-        self.y_distance = self.y_margin * 2 + (self.icon_size + self.y_gap) * (col + 1)
+        self.shown_entries = self.index.get_entries(self.current_path)
+
+        # (path, label, object id, is a folder) of each icon
+        items: list[tuple[str, str, str, bool]] = []
+        if self.current_path != self.base_path:
+            items.append((str(self.current_path.parent), "...", "@folder_button", True))
+        for name, path, is_folder, _ in self.shown_entries or []:
+            object_id = "@folder_button" if is_folder else FILE_BUTTON_IDS.get(name.split(".")[-1], "")
+            items.append((path, name, object_id, is_folder))
+
+        # Only the rows in view
+        row_height = self.icon_size + self.y_gap
+        first_row = max(int((-self.y_scroll - self.y_margin) // row_height), 0)
+        end_row = int((self.rect.height - self.y_margin - self.y_scroll) // row_height) + 1
+        for i in range(first_row * self.row_size, min(end_row * self.row_size, len(items))):
+            path, label, object_id, is_folder = items[i]
+            column, row = i % self.row_size, i // self.row_size
+            button_rect = pg.Rect(self.x_margin + column * (self.icon_size + self.x_gap), self.y_margin + row * row_height + self.y_scroll, self.icon_size, self.icon_size)
+            button = pgui.elements.UIButton(button_rect, "", self.ui_manager, self.panel, parent_element=self.panel, object_id=object_id)
+            if is_folder:
+                self.folder_buttons[button] = path
+                self.dispatcher.register(pgui.UI_BUTTON_PRESSED, button, lambda event, path=path: self.open_folder(path))
+            else:
+                self.file_buttons[button] = path
+                self.dispatcher.register(pgui.UI_BUTTON_PRESSED, button, lambda event, path=path: self.on_file_pressed(path))
+            self.labels.append(pgui.elements.UILabel(pg.Rect(button_rect.left, button_rect.bottom, button_rect.width, self.y_gap), label, self.ui_manager, self.panel, self.panel))
+
+        self.y_distance = self.y_margin * 2 + row_height * max(-(-len(items) // self.row_size), 1)
+
+    def scroll(self):
+        self.build()
+
+    def open_folder(self, path: str):
+        self.current_path = Path(path)
+        self.y_scroll = 0
+        self.build()
     
     def destroy(self):
         for file_button in self.folder_buttons:
+            self.dispatcher.unregister(file_button)
             file_button.kill()
         for file_button in self.file_buttons:
+            self.dispatcher.unregister(file_button)
             file_button.kill()
         for label in self.labels:
             label.kill()
         self.folder_buttons = dict()
-        self.file_buttons = dict()
\ No newline at end of file
+        self.file_buttons = dict()
+        self.labels = []
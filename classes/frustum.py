@@ -0,0 +1,28 @@
+import numpy as np
+
+def get_frustum_planes(projection_matrix: np.ndarray, view_matrix: np.ndarray) -> np.ndarray:
+    """The (a, b, c, d) world space planes of the left, right, bottom, top, near and far sides, normals pointing in.
+    Takes the matrices as the renderer does: the projection matrix for column vectors and the view matrix for row vectors"""
+    clip_matrix = np.asarray(projection_matrix, dtype=np.float64) @ np.asarray(view_matrix, dtype=np.float64).T
+    planes = np.array([
+        clip_matrix[3] + clip_matrix[0],
+        clip_matrix[3] - clip_matrix[0],
+        clip_matrix[3] + clip_matrix[1],
+        clip_matrix[3] - clip_matrix[1],
+        clip_matrix[3] + clip_matrix[2],
+        clip_matrix[3] - clip_matrix[2]
+    ])
+    return planes / np.linalg.norm(planes[:, 0:3], axis=1)[:, None]
+
+def get_world_spheres(centers: np.ndarray, radii: np.ndarray, model_matrices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Moves (n, 3) model space sphere centers by (n, 4, 4) model matrices, growing the radii by at least the largest scale of each"""
+    world_centers = np.einsum("ni,nij->nj", centers, model_matrices[:, 0:3, 0:3]) + model_matrices[:, 3, 0:3]
+    # The Frobenius norm, which is never less than the largest stretch. The longest row can be, for the sheared matrix of
+    # a rotated child of a non uniformly scaled parent
+    scales = np.sqrt(np.einsum("nij,nij->n", model_matrices[:, 0:3, 0:3], model_matrices[:, 0:3, 0:3]))
+    return world_centers, radii * scales
+
+def get_spheres_in_frustum(planes: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """Which spheres are at least partly inside all six planes"""
+    distances = centers @ planes[:, 0:3].T + planes[:, 3]
+    return np.all(distances >= -radii[:, None], axis=1)
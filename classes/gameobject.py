@@ -1,7 +1,6 @@
 from __future__ import annotations
 from classes.transform import Transform
 from classes.rendercomponent import RenderComponent
-import classes.transform as transform
 from classes.monobehaviour import MonoBehaviour
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -9,27 +8,38 @@ if TYPE_CHECKING:
 
 # Scripts is a list of (classtype, arguments)
 class GameObject:
-    def __init__(self, app: App, name: str, local_transform: Transform = Transform.identity(), children: list[GameObject] = None, render_component: RenderComponent = None, script_data: list[tuple[type, list[any]]] = None) -> None:
+    def __init__(self, app: App, name: str, local_transform: Transform | None = None, children: list[GameObject] = None, render_component: RenderComponent = None, script_data: list[tuple[type, list[any]]] = None) -> None:
         if children is None:
             children = []
         if script_data is None:
             script_data = []
+        if local_transform is None:
+            local_transform = Transform.identity()
+        if getattr(app, "transform_store", None) is not None:
+            local_transform = app.transform_store.create_view(local_transform)
         self.parent: GameObject | None = None
         self.app = app
         self.children = children
         self.name = name
         self.local_transform = local_transform
+        self.local_transform.on_change = self.invalidate_world_matrix
         self.render_component = render_component
         if self.render_component == None:
             self.render_component = RenderComponent("", "", False)
 
         self.script_data = script_data # For converting to json, [(classname, [arg1, arg2, arg3])]
         self.components: list[MonoBehaviour] = []
+        self.components_by_type: dict[type, list[MonoBehaviour]] = {}
 
         for script in script_data:
-            self.components.append(script[0](self, self.app, *script[1]))
+            self.add_component(script[0](self, self.app, *script[1]))
         for child in self.children:
             child.parent = self
+            child.local_transform.parent = self.local_transform
+        if getattr(app, "broadphase", None) is not None:
+            app.broadphase.add(self)
+        if getattr(app, "scheduler", None) is not None:
+            app.scheduler.mark_dirty()
             
     def update_script_args(self, cls: type, args: list[any]):
         for component in self.components:
@@ -46,22 +56,98 @@ class GameObject:
             self.render_component.destroy()
         for custom_object in self.components:
             custom_object.end()
-        for child in self.children:
+        if getattr(self.app, "component_index", None) is not None:
+            for custom_object in self.components:
+                self.app.component_index.remove(custom_object)
+        for child in list(self.children): # Children remove themselves from the list
             child.destroy()
+        if self.local_transform.is_stored:
+            self.local_transform.store.remove(self.local_transform.index)
+        if getattr(self.app, "broadphase", None) is not None:
+            self.app.broadphase.remove(self)
+        if getattr(self.app, "scheduler", None) is not None:
+            self.app.scheduler.mark_dirty()
         if self in self.app.game_objects:
             self.app.game_objects.remove(self)
     
     def update_transform(self, new_transform: Transform):
+        """Sets the local transform. World matrices are rebuilt lazily, so this only marks this object and its children as changed"""
+        interpolator = getattr(self.app, "interpolator", None)
+        if interpolator is not None and interpolator.is_recording:
+            interpolator.record(self)
+        if self.local_transform.is_stored:
+            # The store rebuilds every matrix at once
+            if new_transform is not self.local_transform:
+                self.local_transform.set(new_transform)
+            self.invalidate_world_matrix()
+            return
         self.local_transform = new_transform
-        if self.render_component:
-            self.local_transform.model_matrix = transform.create_entire_model_matrix(self.local_transform, self.parent)
+        self.local_transform.parent = self.parent.local_transform if self.parent else None
+        self.local_transform.on_change = self.invalidate_world_matrix
+        self.local_transform.set_dirty()
+        self.invalidate_bounds()
         for child in self.children:
-            child.update_transform(child.local_transform)
+            child.local_transform.parent = self.local_transform
+            child.invalidate_world_matrix()
+
+    def invalidate_world_matrix(self):
+        """Marks the world matrices of this object and its children as out of date"""
+        if self.local_transform.is_stored:
+            self.local_transform.store.is_dirty = True
+            if getattr(self.app, "broadphase", None) is not None:
+                game_objects = [self]
+                while game_objects:
+                    game_object = game_objects.pop()
+                    game_object.invalidate_bounds()
+                    game_objects.extend(game_object.children)
+            return
+        game_objects = [self]
+        while game_objects:
+            game_object = game_objects.pop()
+            # Children of an out of date transform are already out of date, and so are their bounds
+            if game_object.local_transform.world_matrix is not None:
+                game_object.local_transform.world_matrix = None
+                game_object.invalidate_bounds()
+                game_objects.extend(game_object.children)
+
+    def invalidate_bounds(self):
+        """Marks the world bounds of this object as out of date in the app's broadphase, call after changing the render component"""
+        if getattr(self.app, "broadphase", None) is not None:
+            self.app.broadphase.mark_dirty(self)
         
-    def get_component(self, wanted_type):
-        for component in self.components:
-            if type(component) == wanted_type:
-                return component
+    def add_component(self, component: MonoBehaviour):
+        self.components.append(component)
+        self.components_by_type.setdefault(type(component), []).append(component)
+        if getattr(self.app, "component_index", None) is not None:
+            self.app.component_index.add(component)
+        if getattr(self.app, "scheduler", None) is not None:
+            self.app.scheduler.mark_dirty()
+
+    def remove_component(self, component: MonoBehaviour):
+        """Removes a component without calling its end"""
+        self.components.remove(component)
+        components = self.components_by_type[type(component)]
+        components.remove(component)
+        if not components:
+            del self.components_by_type[type(component)]
+        if getattr(self.app, "component_index", None) is not None:
+            self.app.component_index.remove(component)
+        if getattr(self.app, "scheduler", None) is not None:
+            self.app.scheduler.mark_dirty()
+
+    def get_component(self, wanted_type: type) -> MonoBehaviour | None:
+        """The first component of the exact type, or else of a subclass"""
+        components = self.components_by_type.get(wanted_type)
+        if components:
+            return components[0]
+        for component_type, components in self.components_by_type.items():
+            if issubclass(component_type, wanted_type):
+                return components[0]
+        return None
+
+    def get_components(self, wanted_type: type) -> list[MonoBehaviour]:
+        """Every component that is a wanted_type, including subclasses"""
+        return [component for component in self.components if isinstance(component, wanted_type)]
     
     def add_child(self, child: GameObject, index: int | None = None):
         if child.parent:
@@ -70,4 +156,8 @@ class GameObject:
             self.children.append(child)
         else:
             self.children.insert(index, child)
-        child.parent = self
\ No newline at end of file
+        child.parent = self
+        child.local_transform.parent = self.local_transform
+        child.invalidate_world_matrix()
+        if getattr(self.app, "scheduler", None) is not None:
+            self.app.scheduler.mark_dirty()
\ No newline at end of file
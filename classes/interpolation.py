@@ -0,0 +1,87 @@
+from __future__ import annotations
+from classes.transform import Transform, create_model_matrix
+from classes.vec3 import Vec3
+import pyrr.matrix44 as mat4
+import numpy as np
+from threading import Lock
+from math import pi
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from classes.gameobject import GameObject
+
+# (pos, scale, rotation) of a transform as plain floats, so later changes to the transform can't alter it
+TransformValues = tuple[tuple[float, float, float], tuple[float, float, float], tuple[float, float, float]]
+
+class TransformInterpolator:
+    """Remembers where objects moved in the last fixed update tick were before it, so frames drawn between ticks can show them part way there.
+    Values changed by per frame updates since the tick (like mouse look) are drawn as they are"""
+    def __init__(self) -> None:
+        self.is_recording = False
+        self.alpha = 1.0 # How far the frame is between the last tick and the next one
+        # Objects moved during the last tick: (values before the tick, values after it)
+        self.moved: dict[GameObject, tuple[TransformValues, TransformValues | None]] = {}
+        self.lock = Lock() # fixed_update scripts on the scheduler's pool record at the same time
+
+    def begin_tick(self):
+        self.moved.clear()
+        self.is_recording = True
+
+    def end_tick(self):
+        self.is_recording = False
+        for game_object, (before, _) in self.moved.items():
+            self.moved[game_object] = (before, get_values(game_object.local_transform))
+
+    def record(self, game_object: GameObject):
+        """Called before a game object's transform changes"""
+        with self.lock:
+            if game_object not in self.moved:
+                self.moved[game_object] = (get_values(game_object.local_transform), None)
+
+    def is_interpolating(self) -> bool:
+        return bool(self.moved) and self.alpha < 1
+
+    def get_moved_objects(self) -> set[GameObject]:
+        """The objects moved during the last tick and everything under them, whose drawn matrices differ from their transforms'"""
+        moved_objects: set[GameObject] = set()
+        game_objects = list(self.moved)
+        while game_objects:
+            game_object = game_objects.pop()
+            if game_object not in moved_objects:
+                moved_objects.add(game_object)
+                game_objects.extend(game_object.children)
+        return moved_objects
+
+    def get_local_matrix(self, game_object: GameObject) -> np.ndarray:
+        """The local matrix to draw game_object with"""
+        transform = game_object.local_transform
+        movement = self.moved.get(game_object)
+        if movement is None or movement[1] is None:
+            transform.model_matrix # Makes sure the local matrix is built
+            return transform.local_matrix
+        (before, after), current = movement, get_values(transform)
+        pos, scale, rotation = (
+            lerp(previous_value, value, self.alpha, is_angle) if value == tick_value else value
+            for previous_value, tick_value, value, is_angle in zip(before, after, current, (False, False, True))
+        )
+        return create_model_matrix(Transform(Vec3(*pos), Vec3(*scale), Vec3(*rotation)))
+
+    def get_model_matrix(self, game_object: GameObject) -> np.ndarray:
+        """The world matrix to draw game_object with"""
+        if not self.is_interpolating():
+            return game_object.local_transform.model_matrix
+        model_matrix = self.get_local_matrix(game_object)
+        parent = game_object.parent
+        while parent:
+            model_matrix = mat4.multiply(model_matrix, self.get_local_matrix(parent))
+            parent = parent.parent
+        return model_matrix
+
+def get_values(transform: Transform) -> TransformValues:
+    pos, scale, rotation = transform.pos, transform.scale, transform.rotation
+    return (pos.x, pos.y, pos.z), (scale.x, scale.y, scale.z), (rotation.x, rotation.y, rotation.z)
+
+def lerp(a: tuple[float, float, float], b: tuple[float, float, float], t: float, is_angle: bool = False) -> tuple[float, float, float]:
+    if is_angle:
+        # The short way round, for angles that wrap
+        return tuple(x + ((y - x + pi) % (2 * pi) - pi) * t for x, y in zip(a, b))
+    return tuple(x + (y - x) * t for x, y in zip(a, b))
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Grid cells along the longest side of the mesh for each simplified level
+LOD_GRID_SIZES = (40, 20, 10)
+# A level is used once the object's bounding sphere covers less than this fraction of the viewport height
+LOD_SCREEN_SIZES = (0.4, 0.15, 0.05)
+# Levels that don't drop at least this fraction of the previous level's triangles aren't worth drawing
+LOD_MIN_REDUCTION = 0.25
+
+def simplify_vertices(vertices: np.ndarray, indices: np.ndarray, grid_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Vertex clustering: snaps every vertex of an indexed interleaved vertex buffer to the average of its grid cell, then drops the triangles that collapsed.
+    Returns the new (vertices, indices)"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 8)
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) == 0:
+        return vertices.reshape(-1), indices.astype(np.uint32)
+    positions = vertices[:, 0:3]
+    bounds_min = positions.min(axis=0)
+    cell_size = float((positions.max(axis=0) - bounds_min).max()) / grid_size
+    if cell_size == 0:
+        return vertices.reshape(-1).copy(), indices.astype(np.uint32)
+
+    cells = np.minimum(((positions - bounds_min) / cell_size).astype(np.int64), grid_size)
+    cell_ids = (cells[:, 0] * (grid_size + 1) + cells[:, 1]) * (grid_size + 1) + cells[:, 2]
+    _, clusters = np.unique(cell_ids, return_inverse=True)
+    clusters = clusters.reshape(-1)
+
+    # Keep triangles with three different clusters, once per set of clusters
+    triangles = clusters[indices].reshape(-1, 3)
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])]
+    _, first_indices = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    triangles = triangles[np.sort(first_indices)]
+
+    # Average of everything in each cluster, keeping only the clusters still used
+    cluster_counts = np.bincount(clusters).astype(np.float32)
+    cluster_vertices = np.stack([np.bincount(clusters, weights=vertices[:, i]) for i in range(8)], axis=1).astype(np.float32) / cluster_counts[:, None]
+    lengths = np.linalg.norm(cluster_vertices[:, 3:6], axis=1, keepdims=True)
+    cluster_vertices[:, 3:6] /= np.where(lengths == 0, 1, lengths)
+    used_clusters, new_indices = np.unique(triangles.reshape(-1), return_inverse=True)
+    return cluster_vertices[used_clusters].reshape(-1), new_indices.reshape(-1).astype(np.uint32)
+
+def build_lods(vertices: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, ...]:
+    """The vertices and indices of every simplified level, from least to most simplified (vertices 1, indices 1, vertices 2...)"""
+    return tuple(array for grid_size in LOD_GRID_SIZES for array in simplify_vertices(vertices, indices, grid_size))
+
+def get_lod_levels(centers: np.ndarray, radii: np.ndarray, projection_matrix: np.ndarray, view_matrix: np.ndarray) -> np.ndarray:
+    """The level to draw each world space bounding sphere with, from the fraction of the viewport height it covers"""
+    view_matrix = np.asarray(view_matrix, dtype=np.float32)
+    distances = np.linalg.norm(centers @ view_matrix[0:3, 0:3] + view_matrix[3, 0:3], axis=1)
+    # projection_matrix[1][1] is 1 / tan(half the vertical fov)
+    screen_sizes = radii * float(projection_matrix[1][1]) / np.maximum(distances, 1e-6)
+    return (screen_sizes[:, None] < np.array(LOD_SCREEN_SIZES, dtype=np.float32)).sum(axis=1)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from classes import meshcache
+from classes.bvh import BVH
+from classes.lod import build_lods, LOD_GRID_SIZES, LOD_MIN_REDUCTION
+import numpy as np
+import re
+from OpenGL.GL import *
+
+class Mesh:
+    """The vertex and index buffers and vao of an obj file, shared by every RenderComponent that uses it.
+    Simplified versions for drawing far away are Meshes too, made from vertices with a lod_level above 0"""
+    def __init__(self, obj_path: str, vertices: np.ndarray | None = None, indices: np.ndarray | None = None, lod_level: int = 0) -> None:
+        self.obj_path = obj_path
+        self.lod_level = lod_level
+        self.vertice_data_size = 8
+        if vertices is None or indices is None:
+            vertices, indices = load_mesh_arrays(obj_path)
+        self.vertices = vertices
+        self.vertex_count = len(self.vertices) // self.vertice_data_size
+        # Meshes that welding didn't shrink come without indices and are drawn with glDrawArrays.
+        # indices still lists their corners in order, for ray casting and building lods
+        self.is_indexed = len(indices) > 0
+        if not self.is_indexed:
+            indices = np.arange(self.vertex_count)
+        self.indices = np.asarray(indices).astype(get_index_dtype(self.vertex_count), copy=False)
+        self.index_count = len(self.indices)
+        self.index_type = GL_UNSIGNED_SHORT if self.indices.dtype == np.uint16 else GL_UNSIGNED_INT
+        self.lods: list[Mesh] | None = None
+        self.triangles: np.ndarray | None = None
+        self.bvh: BVH | None = None
+        self.bounds: np.ndarray | None = None
+        self.bounding_sphere: np.ndarray | None = None
+
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        
+        # The element buffer binding is part of the vao
+        self.ebo: int | None = None
+        if self.is_indexed:
+            self.ebo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(0))
+        
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(3 * 4))
+
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, 8 * 4, ctypes.c_void_p(6 * 4))
+
+        # Per instance model matrices for instanced drawing, one column per attribute
+        self.instance_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for column in range(4):
+            glEnableVertexAttribArray(3 + column)
+            glVertexAttribPointer(3 + column, 4, GL_FLOAT, GL_FALSE, 16 * 4, ctypes.c_void_p(column * 4 * 4))
+            glVertexAttribDivisor(3 + column, 1)
+
+    def get_triangles(self) -> np.ndarray:
+        """The vertex positions of each triangle the indices make as an (n, 3, 3) array, for ray casting"""
+        if self.triangles is None:
+            positions = np.asarray(self.vertices).reshape(-1, self.vertice_data_size)[:, 0:3]
+            self.triangles = np.ascontiguousarray(positions[np.asarray(self.indices)], dtype=np.float32).reshape(-1, 3, 3)
+        return self.triangles
+
+    def get_bounds(self) -> np.ndarray:
+        """The model space bounding box of the vertices as (min x, min y, min z, max x, max y, max z)"""
+        if self.bounds is None:
+            positions = np.asarray(self.vertices).reshape(-1, self.vertice_data_size)[:, 0:3]
+            if len(positions):
+                self.bounds = np.concatenate((positions.min(axis=0), positions.max(axis=0))).astype(np.float32)
+            else:
+                self.bounds = np.zeros(6, dtype=np.float32)
+        return self.bounds
+
+    def get_bounding_sphere(self) -> tuple[np.ndarray, float]:
+        """(center x, y, z, radius) of the sphere around the bounding box, for culling. One array, so many can be stacked at once"""
+        if self.bounding_sphere is None:
+            bounds = self.get_bounds()
+            self.bounding_sphere = np.append((bounds[0:3] + bounds[3:6]) / 2, np.linalg.norm(bounds[3:6] - bounds[0:3]) / 2).astype(np.float32)
+        return self.bounding_sphere
+
+    def get_bvh(self) -> BVH:
+        """The BVH of the triangles, built the first time it's needed and cached with the vertices"""
+        if self.bvh is None:
+            build = lambda obj_path: BVH.build(self.get_triangles())
+            suffix = f"_lod{self.lod_level}" if self.lod_level else ""
+            node_bounds, node_data, triangle_order = meshcache.load_cached_arrays(self.obj_path, (f"bvh_bounds{suffix}", f"bvh_data{suffix}", f"bvh_order{suffix}"), build)
+            self.bvh = BVH(self.get_triangles(), node_bounds, node_data, triangle_order)
+        return self.bvh
+
+    def get_lods(self) -> list[Mesh]:
+        """This mesh followed by its simplified versions, which are built the first time they're needed and cached with the vertices.
+        Levels that barely simplify the one before them are left out"""
+        if self.lods is None:
+            self.lods = [self]
+            if self.lod_level == 0:
+                names = tuple(f"lod{level}_{name}" for level in range(1, len(LOD_GRID_SIZES) + 1) for name in ("vertices", "indices"))
+                arrays = meshcache.load_cached_arrays(self.obj_path, names, lambda obj_path: build_lods(self.vertices, self.indices))
+                for level, (vertices, indices) in enumerate(zip(arrays[0::2], arrays[1::2]), 1):
+                    if 0 < len(indices) <= self.lods[-1].index_count * (1 - LOD_MIN_REDUCTION):
+                        self.lods.append(Mesh(self.obj_path, vertices, indices, level))
+        return self.lods
+
+    def destroy(self):
+        buffers = (self.vbo, self.instance_vbo) if self.ebo is None else (self.vbo, self.ebo, self.instance_vbo)
+        glDeleteBuffers(len(buffers), buffers)
+        glDeleteVertexArrays(1, (self.vao,))
+        if self.lods:
+            for lod in self.lods[1:]:
+                lod.destroy()
+
+def load_mesh_arrays(obj_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """The (vertices, indices) of an obj file from the cache, loading it if needed. Makes no GL calls, so it can run on any thread"""
+    return meshcache.load_cached_arrays(obj_path, ("vertices", "indices"), load_indexed_obj)
+
+def load_indexed_obj(file_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Loads an obj file into a buffer of unique interleaved vertices and the indices of each triangle's corners.
+    Meshes that welding doesn't make smaller, like ones with split normals and uvs everywhere, keep the expanded vertices
+    and no indices, as the index buffer would only add to them"""
+    vertices = load_obj(file_path)
+    unique_vertices, indices = weld_vertices(vertices)
+    if unique_vertices.nbytes + indices.nbytes >= vertices.nbytes:
+        return vertices, np.zeros(0, dtype=np.uint16)
+    return unique_vertices, indices
+
+def weld_vertices(vertices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Merges the identical vertices of an interleaved vertex buffer, keeping them in the order they first appear.
+    Returns (unique vertices, index of each original vertex)"""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 8) + np.float32(0) # -0.0 becomes 0.0 so they match
+    if len(vertices) == 0:
+        return vertices.reshape(-1), np.zeros(0, dtype=np.uint16)
+    # Compare whole rows at once as opaque 32 byte values
+    rows = vertices.view(np.dtype((np.void, vertices.itemsize * 8))).reshape(-1)
+    _, first_indices, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    order = np.argsort(first_indices)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    indices = ranks[inverse.reshape(-1)]
+    return vertices[first_indices[order]].reshape(-1), indices.astype(get_index_dtype(len(order)))
+
+def get_index_dtype(vertex_count: int) -> type:
+    """The smallest index type that can address vertex_count vertices"""
+    return np.uint16 if vertex_count <= 65536 else np.uint32
+
+def load_obj(file_path: str) -> np.ndarray:
+    """Loads an obj file into an interleaved vertex buffer (x y z nx ny nz u v x y z nx ny nz u v...)"""
+    with open(file_path) as file:
+        data = "\n" + re.sub(r"#[^\n]*", "", file.read()) # Without comments, which can follow a record
+
+    # The bodies of each record type ("x y z", "1/6/3 2/4/3 5/1/3"...)
+    positions = parse_obj_floats(re.findall(r"\nv[ \t]+([^\n]*)", data), 3)
+    uvs = parse_obj_floats(re.findall(r"\nvt[ \t]+([^\n]*)", data), 2)
+    normals = parse_obj_floats(re.findall(r"\nvn[ \t]+([^\n]*)", data), 3)
+    faces = re.findall(r"\nf[ \t]+([^\n]*)", data)
+    if len(faces) == 0 or len(positions) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    # Face corners, one row per corner: [position, uv, normal] (-1 when missing)
+    face_text = "\n".join(faces)
+    corner_counts = count_obj_face_corners(face_text, len(faces))
+    corners = parse_obj_face_corners(face_text, int(corner_counts.sum()), len(positions), len(uvs), len(normals))
+
+    # Triangulate each polygon as a fan around its first corner
+    triangle_counts = np.maximum(corner_counts - 2, 0)
+    face_starts = np.cumsum(corner_counts) - corner_counts
+    triangle_faces = np.repeat(np.arange(len(corner_counts)), triangle_counts)
+    triangle_offsets = np.arange(len(triangle_faces)) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts)
+    first = face_starts[triangle_faces]
+    triangle_corners = np.stack((first, first + triangle_offsets + 1, first + triangle_offsets + 2), axis=1).reshape(-1)
+    corners = corners[triangle_corners]
+
+    vertices = np.empty((len(corners), 8), dtype=np.float32)
+    vertices[:, 0:3] = positions[corners[:, 0]]
+
+    # Normals, falling back to flat face normals for corners without one
+    has_normal = corners[:, 2] >= 0
+    if not np.all(has_normal):
+        triangles = vertices[:, 0:3].reshape(-1, 3, 3)
+        face_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(face_normals, axis=1, keepdims=True)
+        face_normals /= np.where(lengths == 0, 1, lengths)
+        vertices[:, 3:6] = np.repeat(face_normals, 3, axis=0)
+    vertices[has_normal, 3:6] = normals[corners[has_normal, 2]]
+
+    # Uvs, falling back to stretching the texture over each triangle for corners without one
+    has_uv = corners[:, 1] >= 0
+    if not np.all(has_uv):
+        vertices[:, 6:8] = np.tile(np.array([[0, 0], [1, 0], [0, 1]], dtype=np.float32), (len(corners) // 3, 1))
+    vertices[has_uv, 6:8] = uvs[corners[has_uv, 1]]
+
+    return vertices.reshape(-1)
+
+def parse_obj_floats(lines: list[str], size: int) -> np.ndarray:
+    """Parses the bodies of v/vt/vn records into an (n, size) array, ignoring any extra components"""
+    if len(lines) == 0:
+        return np.zeros((0, size), dtype=np.float32)
+    values = np.fromstring(" ".join(lines), dtype=np.float32, sep=" ")
+    row_size = len(lines[0].split())
+    if row_size >= size and len(values) == row_size * len(lines):
+        return values.reshape(-1, row_size)[:, :size]
+    # Rows have varying lengths (optional w components etc.)
+    return np.array([line.split()[:size] for line in lines], dtype=np.float32)
+
+def count_obj_face_corners(face_text: str, face_count: int) -> np.ndarray:
+    """Counts the whitespace separated corners on each line of face_text"""
+    characters = np.frombuffer(face_text.encode(), dtype=np.uint8)
+    is_space = (characters == ord(" ")) | (characters == ord("\t")) | (characters == ord("\n")) | (characters == ord("\r"))
+    corner_starts = ~is_space
+    corner_starts[1:] &= is_space[:-1]
+    line_numbers = np.cumsum(characters == ord("\n"))
+    return np.bincount(line_numbers[corner_starts], minlength=face_count)
+
+def parse_obj_face_corners(corner_text: str, corner_count: int, position_count: int, uv_count: int, normal_count: int) -> np.ndarray:
+    """Parses face corners ("p", "p/t", "p//n" or "p/t/n") into an (n, 3) array of zero based [p, t, n] indices"""
+    # Missing indices become 0, which is never a valid obj index
+    corner_text = corner_text.replace("//", "/0/")
+    slash_count = corner_text.split(None, 1)[0].count("/")
+    corners = np.zeros((corner_count, 3), dtype=np.int64)
+    if corner_text.count("/") == slash_count * corner_count:
+        # Every corner has the first one's format
+        corners[:, :slash_count + 1] = np.fromstring(corner_text.replace("/", " "), dtype=np.int64, sep=" ").reshape(-1, slash_count + 1)
+    else:
+        # Faces with different formats, parsed in groups of corners with the same one
+        corner_strings = np.array(corner_text.split())
+        slash_counts = np.char.count(corner_strings, "/")
+        for slash_count in np.unique(slash_counts).tolist():
+            has_format = slash_counts == slash_count
+            group_text = " ".join(corner_strings[has_format].tolist()).replace("/", " ")
+            corners[has_format, :slash_count + 1] = np.fromstring(group_text, dtype=np.int64, sep=" ").reshape(-1, slash_count + 1)
+
+    # Convert from one based / negative relative indices
+    counts = np.array([position_count, uv_count, normal_count], dtype=np.int64)
+    corners = np.where(corners > 0, corners - 1, np.where(corners < 0, corners + counts, -1))
+    return corners
@@ -0,0 +1,57 @@
+import numpy as np
+import hashlib
+import os
+import typing
+
+CACHE_DIRECTORY = ".meshcache"
+CACHE_VERSION = 4 # Bump when the format of anything built from an obj changes
+
+def get_cache_path(obj_path: str, name: str, cache_directory: str = CACHE_DIRECTORY) -> tuple[str, str]:
+    """Returns (cache file path, prefix shared by every version of this obj's cache file)"""
+    stat = os.stat(obj_path)
+    path_hash = hashlib.sha1(os.path.abspath(obj_path).encode()).hexdigest()[:16]
+    state_hash = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}:{CACHE_VERSION}".encode()).hexdigest()[:16]
+    prefix = f"{path_hash}-{name}-"
+    return os.path.join(cache_directory, f"{prefix}{state_hash}.npy"), prefix
+
+def load_cached_array(obj_path: str, name: str, build: typing.Callable[[str], np.ndarray], cache_directory: str = CACHE_DIRECTORY) -> np.ndarray:
+    """Returns the array build(obj_path) would, memory mapping it from the cache if the obj hasn't changed since it was saved"""
+    return load_cached_arrays(obj_path, (name,), lambda path: (build(path),), cache_directory)[0]
+
+def load_cached_arrays(obj_path: str, names: tuple[str, ...], build: typing.Callable[[str], tuple[np.ndarray, ...]], cache_directory: str = CACHE_DIRECTORY) -> tuple[np.ndarray, ...]:
+    """load_cached_array for something made of several arrays, build returns one array per name"""
+    cache_paths = [get_cache_path(obj_path, name, cache_directory) for name in names]
+    if all(os.path.exists(cache_path) for cache_path, _ in cache_paths):
+        return tuple(load_array(cache_path) for cache_path, _ in cache_paths)
+
+    arrays = build(obj_path)
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        for (cache_path, prefix), array in zip(cache_paths, arrays):
+            save_array(cache_path, prefix, array, cache_directory)
+    except OSError:
+        pass
+    return arrays
+
+def load_array(cache_path: str) -> np.ndarray:
+    try:
+        return np.load(cache_path, mmap_mode="r")
+    except ValueError: # Empty arrays can't be memory mapped
+        return np.load(cache_path)
+
+def save_array(cache_path: str, prefix: str, array: np.ndarray, cache_directory: str):
+    # Remove the outdated versions of this file
+    for file_name in os.listdir(cache_directory):
+        if file_name.startswith(prefix):
+            os.remove(os.path.join(cache_directory, file_name))
+    # Write to a temporary file first so other processes never see a half written cache
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        np.save(file, array)
+    os.replace(temp_path, cache_path)
+
+def clear_cache(cache_directory: str = CACHE_DIRECTORY):
+    if os.path.isdir(cache_directory):
+        for file_name in os.listdir(cache_directory):
+            if file_name.endswith(".npy"):
+                os.remove(os.path.join(cache_directory, file_name))
@@ -5,6 +5,15 @@ if TYPE_CHECKING:
     from main import App
     
 class MonoBehaviour:
+    # What update and fixed_update touch, so scripts that don't conflict can run at the same time on other threads.
+    # Names starting with "own." are this game object's, any other name is shared by every script.
+    # "own.transform" is shared with the object's parents and children, since their world matrices depend on each other.
+    # Scripts that leave writes as None run alone, after every script before them
+    reads: frozenset[str] | None = None
+    writes: frozenset[str] | None = None
+    # Scripts that use OpenGL or pygame always run on the main thread
+    main_thread = False
+
     def __init__(self, game_object: GameObject, app: App) -> None:
         self.game_object = game_object
         self.app = app
@@ -12,6 +21,10 @@ class MonoBehaviour:
     def start(self):
         pass
     def update(self):
+        """Called once per frame, delta_time is the time since the last frame"""
+        pass
+    def fixed_update(self):
+        """Called at the app's fixed rate, delta_time is the fixed time step. Movement here doesn't depend on the frame rate"""
         pass
     def end(self):
         pass
\ No newline at end of file
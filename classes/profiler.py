@@ -0,0 +1,220 @@
+from __future__ import annotations
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v as raw_glGetQueryObjectui64v
+import ctypes
+import pygame as pg
+import numpy as np
+from threading import Lock, get_ident
+import json
+import time
+import os
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from classes.renderer import Renderer
+
+class NullScope:
+    """What scopes return while the profiler is disabled"""
+    __slots__ = ()
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exception):
+        pass
+
+NULL_SCOPE = NullScope()
+GPU_THREAD = -1 # Thread id GPU timings are recorded under
+
+class Profiler:
+    """Scoped timers kept in a ring buffer of the last capacity events, with optional GL timer queries.
+    Disabled, a scope only costs a flag check, so the timers can stay in the main loop"""
+    def __init__(self, capacity: int = 1 << 16, enabled: bool = False) -> None:
+        self.capacity = capacity
+        self.enabled = enabled
+        self.use_gpu_timers = False
+        # (name, start, duration, thread, frame) of each event, tuples in a list as they're far cheaper to write than array elements
+        self.events: list[tuple[str, float, float, int, int] | None] = [None] * capacity
+        self.event_count = 0 # Every event ever recorded, the next one goes at event_count % capacity
+        self.frame = 0
+        self.lock = Lock()
+
+        # GL timestamp queries waiting for their results: (name, cpu start, start query, end query, frame)
+        self.pending_gpu_scopes: list[tuple[str, float, int, int, int]] = []
+        self.free_queries: list[int] = []
+
+    def scope(self, name: str) -> ProfileScope | NullScope:
+        """Times the with block under name"""
+        if not self.enabled:
+            return NULL_SCOPE
+        return ProfileScope(self, name)
+
+    def gpu_scope(self, name: str) -> GpuProfileScope | NullScope:
+        """Times the GL commands issued in the with block on the GPU, the result is recorded a frame or two later"""
+        if not self.enabled or not self.use_gpu_timers:
+            return NULL_SCOPE
+        return GpuProfileScope(self, name)
+
+    def record(self, name: str, start: float, duration: float, thread: int | None = None, frame: int | None = None):
+        event = (name, start, duration, get_ident() if thread is None else thread, self.frame if frame is None else frame)
+        with self.lock:
+            self.events[self.event_count % self.capacity] = event
+            self.event_count += 1
+
+    def end_frame(self):
+        if self.pending_gpu_scopes:
+            self.collect_gpu_scopes()
+        self.frame += 1
+
+    def collect_gpu_scopes(self):
+        """Records the GPU scopes whose queries have finished"""
+        still_pending = []
+        for scope in self.pending_gpu_scopes:
+            name, cpu_start, start_query, end_query, frame = scope
+            if not glGetQueryObjectiv(end_query, GL_QUERY_RESULT_AVAILABLE):
+                still_pending.append(scope)
+                continue
+            duration = (get_query_result(end_query) - get_query_result(start_query)) / 1e9
+            self.record(name, cpu_start, duration, GPU_THREAD, frame)
+            self.free_queries.extend((start_query, end_query))
+        self.pending_gpu_scopes = still_pending
+
+    def get_query(self) -> int:
+        return self.free_queries.pop() if self.free_queries else int(glGenQueries(1)[0])
+
+    def get_events(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(names, starts, durations, threads, frames) of the events in the buffer, oldest first"""
+        count = min(self.event_count, self.capacity)
+        first = (self.event_count - count) % self.capacity
+        events = self.events[first:] + self.events[:first] if count == self.capacity else self.events[:count]
+        if not events:
+            return [], np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        names, starts, durations, threads, frames = zip(*events)
+        return list(names), np.array(starts), np.array(durations), np.array(threads, dtype=np.int64), np.array(frames, dtype=np.int64)
+
+    def get_frame_averages(self, frame_count: int = 60) -> dict[str, float]:
+        """Seconds per frame spent in each scope over the last frame_count finished frames, slowest first"""
+        names, _, durations, _, frames = self.get_events()
+        first_frame = max(self.frame - frame_count, 0)
+        frame_count = self.frame - first_frame
+        totals: dict[str, float] = {}
+        if frame_count == 0:
+            return totals
+        in_range = (frames >= first_frame) & (frames < self.frame)
+        for name, duration in zip(np.array(names, dtype=object)[in_range], durations[in_range].tolist()):
+            totals[name] = totals.get(name, 0.0) + duration
+        return {name: total / frame_count for name, total in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def export_chrome_trace(self, path: str):
+        """Writes the buffer as a Chrome trace, open it in chrome://tracing or Perfetto"""
+        names, starts, durations, threads, frames = self.get_events()
+        origin = float(starts.min()) if len(starts) else 0.0
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": GPU_THREAD, "args": {"name": "GPU"}}]
+        for name, start, duration, thread, frame in zip(names, starts.tolist(), durations.tolist(), threads.tolist(), frames.tolist()):
+            events.append({
+                "name": name,
+                "cat": "gpu" if thread == GPU_THREAD else "cpu",
+                "ph": "X",
+                "ts": (start - origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": thread,
+                "args": {"frame": frame}
+            })
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def clear(self):
+        self.event_count = 0
+
+    def destroy(self):
+        queries = self.free_queries + [query for scope in self.pending_gpu_scopes for query in scope[2:4]]
+        if queries:
+            glDeleteQueries(len(queries), queries)
+        self.free_queries.clear()
+        self.pending_gpu_scopes.clear()
+
+def get_query_result(query: int) -> int:
+    """A finished query's 64 bit result, through the raw binding as PyOpenGL's wrapper has no array type for it"""
+    result = ctypes.c_uint64()
+    raw_glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(result))
+    return result.value
+
+class ProfileScope:
+    __slots__ = ("profiler", "name", "start")
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exception):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+
+class GpuProfileScope:
+    __slots__ = ("profiler", "name", "start", "start_query")
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.start_query = self.profiler.get_query()
+        glQueryCounter(self.start_query, GL_TIMESTAMP)
+
+    def __exit__(self, *exception):
+        end_query = self.profiler.get_query()
+        glQueryCounter(end_query, GL_TIMESTAMP)
+        self.profiler.pending_gpu_scopes.append((f"{self.name} (gpu)", self.start, self.start_query, end_query, self.profiler.frame))
+
+class ProfilerOverlay:
+    """The profiler's time per frame of each scope, drawn in the top left corner of the screen"""
+    def __init__(self, profiler: Profiler, width: int = 360, line_count: int = 20, refresh_interval: float = 0.25) -> None:
+        self.profiler = profiler
+        self.is_visible = False
+        self.line_count = line_count
+        self.refresh_interval = refresh_interval
+        self.last_refresh = 0.0
+        self.width = width
+        # Made the first time the overlay is shown, looking up fonts is slow
+        self.font: pg.font.Font | None = None
+        self.surface: pg.Surface | None = None
+        self.texture: int | None = None
+
+    def create_texture(self):
+        pg.font.init()
+        self.font = pg.font.Font(pg.font.match_font("dejavusansmono,couriernew,monospace"), 14) # The default font if none are installed
+        self.line_height = self.font.get_linesize()
+        self.surface = pg.Surface((self.width, self.line_height * (self.line_count + 1)), pg.SRCALPHA)
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+
+    def update_texture(self):
+        """Redraws the text, only a few times a second so the overlay doesn't slow the frames it measures"""
+        averages = self.profiler.get_frame_averages()
+        self.surface.fill((0, 0, 0, 160))
+        lines = [f"{'scope':<24}{'ms/frame':>10}"] + [f"{name[:24]:<24}{seconds * 1000:10.3f}" for name, seconds in list(averages.items())[:self.line_count]]
+        for i, line in enumerate(lines):
+            self.surface.blit(self.font.render(line, True, (255, 255, 255)), (6, i * self.line_height))
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.surface.get_width(), self.surface.get_height(), 0, GL_RGBA, GL_UNSIGNED_BYTE, pg.image.tobytes(self.surface, "RGBA", True))
+
+    def draw(self, renderer: Renderer):
+        if not self.is_visible:
+            return
+        if self.texture is None:
+            self.create_texture()
+        now = time.perf_counter()
+        if now - self.last_refresh > self.refresh_interval:
+            self.last_refresh = now
+            self.update_texture()
+        width, height = self.surface.get_size()
+        renderer.render_texture_to_rect(self.texture, (0, renderer.height - height, width, height))
+
+    def destroy(self):
+        if self.texture is not None:
+            glDeleteTextures(1, (self.texture,))
+
+profiler = Profiler()
@@ -1,6 +1,10 @@
+from __future__ import annotations
 from classes.rendercomponent import RenderComponent
 from classes.vec3 import Vec3
 from classes.gameobject import GameObject
+from classes.bvh import ray_triangles_intersection
+from classes.broadphase import Broadphase
+import pyrr.matrix44 as mat4
 import numpy as np
 
 def ray_triangle_intersection(origin: Vec3, dir: Vec3, triangle_points: list[Vec3]) -> float | None:
@@ -35,52 +39,115 @@ def ray_triangle_intersection(origin: Vec3, dir: Vec3, triangle_points: list[Vec
         return t
     return None
 
-def find_t_of_game_object(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix, default_render_component: RenderComponent | None = None) -> float:
-    """Returns the t value of the intersection, if it exists, between a ray in camera space and a game object"""
-    smallest_t = None
+class RayHit:
+    """The closest intersection of a ray with a game object. u and v are the barycentric coordinates of the hit on the triangle"""
+    def __init__(self, game_object: GameObject, t: float, triangle_index: int, u: float, v: float) -> None:
+        self.game_object = game_object
+        self.t = t
+        self.triangle_index = triangle_index
+        self.u = u
+        self.v = v
+
+def ray_to_model_space(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix) -> tuple[np.ndarray, np.ndarray] | None:
+    """Moves a camera space ray into the object's model space. t values stay the same as dir isn't normalized"""
+    model_view_matrix = mat4.multiply(np.asarray(game_object.local_transform.model_matrix, dtype=np.float64), np.asarray(view_matrix, dtype=np.float64))
+    try:
+        inverse = np.linalg.inv(model_view_matrix)
+    except np.linalg.LinAlgError: # Zero scale
+        return None
+    model_origin = np.array([origin.x, origin.y, origin.z, 1]) @ inverse
+    model_dir = np.array([dir.x, dir.y, dir.z, 0]) @ inverse
+    return model_origin[0:3] / model_origin[3], model_dir[0:3]
+
+def get_model_ray(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix, default_render_component: RenderComponent | None) -> tuple[RenderComponent, np.ndarray, np.ndarray] | None:
+    """The render component to test against and the model space ray, if the object can be hit"""
     render_component = game_object.render_component
     if not render_component.is_active and default_render_component:
         render_component = default_render_component
-    if render_component.is_active:
-        triangle_count = len(render_component.vertices) // 3 // render_component.vertice_data_size
-        triangle_data_size = 3 * render_component.vertice_data_size
-        for triangle_start_index in range(0, triangle_data_size * (triangle_count - 1) + 1, 8):
-            model_triangle_points: list[Vec3] = [
-                Vec3(render_component.vertices[triangle_start_index], render_component.vertices[triangle_start_index + 1], render_component.vertices[triangle_start_index + 2]),
-                Vec3(render_component.vertices[triangle_start_index + render_component.vertice_data_size], render_component.vertices[triangle_start_index + render_component.vertice_data_size + 1], render_component.vertices[triangle_start_index + render_component.vertice_data_size + 2]),
-                Vec3(render_component.vertices[triangle_start_index + render_component.vertice_data_size * 2], render_component.vertices[triangle_start_index + render_component.vertice_data_size * 2 + 1], render_component.vertices[triangle_start_index + render_component.vertice_data_size * 2 + 2])
-            ]
-            world_triangle_points: list[Vec3] = [
-                model_triangle_points[0].mat_mul(game_object.local_transform.model_matrix, True),
-                model_triangle_points[1].mat_mul(game_object.local_transform.model_matrix, True),
-                model_triangle_points[2].mat_mul(game_object.local_transform.model_matrix, True)
-            ]
-            view_triangle_points: list[Vec3] = [
-                world_triangle_points[0].mat_mul(view_matrix, True),
-                world_triangle_points[1].mat_mul(view_matrix, True),
-                world_triangle_points[2].mat_mul(view_matrix, True)
-            ]
-            t_value = ray_triangle_intersection(origin, dir, view_triangle_points)
-            if t_value and smallest_t:
-                if t_value < smallest_t:
-                    smallest_t = t_value
-            elif not smallest_t and t_value:
-                smallest_t = t_value
-    return smallest_t
+    if not render_component.is_active:
+        return None
+    model_ray = ray_to_model_space(origin, dir, game_object, view_matrix)
+    if model_ray is None:
+        return None
+    return render_component, *model_ray
+
+def ray_cast_game_object(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix, default_render_component: RenderComponent | None = None, check_children = True, t_max: float = np.inf) -> RayHit | None:
+    """Returns the closest hit before t_max, if it exists, between a ray in camera space and a game object or its children"""
+    closest_hit = None
+    model_ray = get_model_ray(origin, dir, game_object, view_matrix, default_render_component)
+    if model_ray:
+        render_component, model_origin, model_dir = model_ray
+        intersection = render_component.mesh.get_bvh().closest_hit(model_origin, model_dir, t_max)
+        if intersection:
+            closest_hit = RayHit(game_object, *intersection)
+            t_max = closest_hit.t
+    if check_children:
+        for child in game_object.children:
+            hit = ray_cast_game_object(origin, dir, child, view_matrix, default_render_component, t_max=t_max)
+            if hit: # Always closer, as t_max is passed on
+                closest_hit = hit
+                t_max = hit.t
+    return closest_hit
+
+def ray_hits_game_object(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix, default_render_component: RenderComponent | None = None, check_children = True, t_max: float = np.inf) -> bool:
+    """Whether a ray in camera space hits a game object or its children before t_max, for occlusion checks where the closest hit doesn't matter"""
+    model_ray = get_model_ray(origin, dir, game_object, view_matrix, default_render_component)
+    if model_ray:
+        render_component, model_origin, model_dir = model_ray
+        if render_component.mesh.get_bvh().any_hit(model_origin, model_dir, t_max):
+            return True
+    if check_children:
+        return any(ray_hits_game_object(origin, dir, child, view_matrix, default_render_component, t_max=t_max) for child in game_object.children)
+    return False
 
-# FIXME No children check
-# NOTE Way too slow with bigger meshes
-def ray_cast_game_objects(origin: Vec3, dir: Vec3, game_objects: list[GameObject], view_matrix, default_render_component: RenderComponent | None = None) -> GameObject | None:
-    """Given a ray in camera space, returns the hit game object if it exists"""
-    smallest_t = None
-    closest_object = None
+def find_t_of_game_object(origin: Vec3, dir: Vec3, game_object: GameObject, view_matrix, default_render_component: RenderComponent | None = None) -> float:
+    """Returns the t value of the intersection, if it exists, between a ray in camera space and a game object"""
+    hit = ray_cast_game_object(origin, dir, game_object, view_matrix, default_render_component, check_children=False)
+    if hit:
+        return hit.t
+    return None
+
+def ray_cast_game_objects(origin: Vec3, dir: Vec3, game_objects: list[GameObject], view_matrix, default_render_component: RenderComponent | None = None, broadphase: Broadphase | None = None) -> GameObject | None:
+    """Given a ray in camera space, returns the hit game object (which may be a child of one in game_objects) if it exists.
+    With a broadphase only objects whose world bounds the ray enters are tested, closest first"""
+    if broadphase is not None:
+        return ray_cast_broadphase(origin, dir, game_objects, view_matrix, default_render_component, broadphase)
+    closest_hit = None
+    t_max = np.inf
     for game_object in game_objects:
-        t_value = find_t_of_game_object(origin, dir, game_object, view_matrix, default_render_component)
-        if t_value and smallest_t:
-            if t_value < smallest_t:
-                smallest_t = t_value
-                closest_object = game_object
-        elif not smallest_t and t_value:
-            smallest_t = t_value
-            closest_object = game_object
-    return closest_object
\ No newline at end of file
+        # Objects further than the closest hit so far are skipped by their BVHs
+        hit = ray_cast_game_object(origin, dir, game_object, view_matrix, default_render_component, t_max=t_max)
+        if hit:
+            closest_hit = hit
+            t_max = hit.t
+    if closest_hit:
+        return closest_hit.game_object
+    return None
+
+def ray_cast_broadphase(origin: Vec3, dir: Vec3, game_objects: list[GameObject], view_matrix, default_render_component: RenderComponent | None, broadphase: Broadphase) -> GameObject | None:
+    inverse_view_matrix = np.linalg.inv(np.asarray(view_matrix, dtype=np.float64))
+    world_origin = np.array([origin.x, origin.y, origin.z, 1]) @ inverse_view_matrix
+    world_dir = np.array([dir.x, dir.y, dir.z, 0]) @ inverse_view_matrix # Same t values, as the view matrix doesn't scale
+    top_level_objects = set(game_objects)
+    closest_hit = None
+    t_max = np.inf
+    for t_enter, game_object in broadphase.ray_query(world_origin[0:3] / world_origin[3], world_dir[0:3]):
+        if t_enter >= t_max: # Every box after this one is further than the closest hit
+            break
+        top_level_object = game_object
+        while top_level_object.parent:
+            top_level_object = top_level_object.parent
+        if top_level_object not in top_level_objects:
+            continue
+        # Children have their own boxes
+        hit = ray_cast_game_object(origin, dir, game_object, view_matrix, default_render_component, check_children=False, t_max=t_max)
+        if hit:
+            closest_hit = hit
+            t_max = hit.t
+    if closest_hit:
+        return closest_hit.game_object
+    return None
+
+def ray_hits_game_objects(origin: Vec3, dir: Vec3, game_objects: list[GameObject], view_matrix, default_render_component: RenderComponent | None = None, t_max: float = np.inf) -> bool:
+    """Any hit version of ray_cast_game_objects"""
+    return any(ray_hits_game_object(origin, dir, game_object, view_matrix, default_render_component, t_max=t_max) for game_object in game_objects)
@@ -1,31 +1,74 @@
 import pygame as pg
 import pygame_gui as pgui
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
 from classes.gameobject import GameObject
 from classes.rendercomponent import RenderComponent
+from classes.mesh import Mesh
+from classes.texture import Texture2D
+from classes.shaderprogram import ShaderProgram
+from classes.renderstate import RenderState
+from classes.frustum import get_frustum_planes, get_world_spheres, get_spheres_in_frustum
+from classes.lod import get_lod_levels, LOD_GRID_SIZES
+from classes.profiler import profiler
+from classes.interpolation import TransformInterpolator
 import pyrr.matrix44 as mat4
 import numpy as np
 from math import tan, radians
+import time
+
+# An object to draw: (object, render component, model matrix, mesh to draw it with)
+Drawable = tuple[GameObject, RenderComponent, np.ndarray, Mesh]
 
 class Renderer:
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, headless: bool = False) -> None:
+        """headless hides the window. To run without a display or GPU, also set SDL_VIDEODRIVER=offscreen and PYOPENGL_PLATFORM=egl
+        before pygame and OpenGL are imported, Mesa then renders on the CPU"""
         self.width = width
         self.height = height
+        self.headless = headless
         pg.init()
-        self.screen = pg.display.set_mode((width, height), pg.OPENGL|pg.DOUBLEBUF).convert_alpha()
+        flags = pg.OPENGL|pg.DOUBLEBUF|(pg.HIDDEN if headless else 0)
+        self.screen = pg.display.set_mode((width, height), flags).convert_alpha()
         self.clear_color = (0.4, 0.4, 0.4, 1)
         glClearColor(*self.clear_color)
         glActiveTexture(GL_TEXTURE0)
         glEnable(GL_DEPTH_TEST)
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.state = RenderState()
         self.shader = self.create_shader("shaders/vertex.glsl", "shaders/fragment.glsl")
-        glUseProgram(self.shader)
-        glUniform1i(glGetUniformLocation(self.shader, "tex"), 0)
+        self.state.use_program(self.shader)
+        self.state.set_uniform_int("tex", 0)
+
+        # Objects sharing a mesh and texture are drawn with one call
+        self.use_instancing = True
+        self.instanced_shader = self.create_shader("shaders/instanced_vertex.glsl", "shaders/fragment.glsl")
+        self.state.use_program(self.instanced_shader)
+        self.state.set_uniform_int("tex", 0)
+
+        # Objects whose bounding spheres are outside the camera's view aren't drawn, counted each frame
+        self.use_culling = True
+        self.culled_count = 0
+        self.drawn_count = 0
+
+        # Far away objects are drawn with simplified meshes, lod_counts is how many were drawn at each level last frame
+        self.use_lods = True
+        self.lod_counts = [0] * (len(LOD_GRID_SIZES) + 1)
+
+        # Draws objects moved by fixed updates part way between their last two ticks, set by the app
+        self.interpolator: TransformInterpolator | None = None
+
+        # Seconds the last render_objects_to_fbo spent deciding what to draw, culling and picking lods
+        self.cull_time = 0.0
 
         self.quad_shader = self.create_shader("shaders/quad_vertex.glsl", "shaders/quad_fragment.glsl")
-        glUniform1i(glGetUniformLocation(self.quad_shader, "image"), 0)
+        self.state.use_program(self.quad_shader)
+        self.state.set_uniform_int("image", 0)
+
+        # Draws textures as they are, for overlays
+        self.overlay_shader = self.create_shader("shaders/quad_vertex.glsl", "shaders/overlay_fragment.glsl")
+        self.state.use_program(self.overlay_shader)
+        self.state.set_uniform_int("image", 0)
 
         self.quad_vertices = [
             # Top right
@@ -54,65 +97,140 @@ class Renderer:
         glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(3 * 4))
     
     def render_objects_to_fbo(self, objects: list[GameObject], projection_matrix, view_matrix, fbo: int = 0, viewport: tuple[int, int, int, int] | None = None, flip = True, default_render_component: RenderComponent | None = None):
-        # Frame setup
-        glUseProgram(self.shader)
-        glUniformMatrix4fv(glGetUniformLocation(self.shader, "viewMatrix"), 1, GL_FALSE, view_matrix)
-        glUniformMatrix4fv(glGetUniformLocation(self.shader, "projectionMatrix"), 1, GL_TRUE, projection_matrix)
+        # Frame setup, anything could have been bound since the last frame
+        self.state.reset()
+        self.state.use_program(self.instanced_shader if self.use_instancing else self.shader)
+        self.state.set_uniform_matrix("viewMatrix", view_matrix)
+        self.state.set_uniform_matrix("projectionMatrix", projection_matrix, transpose=True)
         glBindFramebuffer(GL_FRAMEBUFFER, fbo)
         if viewport == None:
             viewport = (0, 0, self.width, self.height)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glUseProgram(self.shader)
         glViewport(*viewport)
 
-        for object in objects:
-            self.render_object(object, default_render_component)
+        start = time.perf_counter()
+        with profiler.scope("cull"):
+            drawables = self.get_drawables(objects, default_render_component)
+            self.culled_count = 0
+            if drawables and (self.use_culling or self.use_lods):
+                centers, radii = self.get_world_spheres(drawables)
+                if self.use_culling:
+                    drawables, centers, radii = self.cull(drawables, centers, radii, projection_matrix, view_matrix)
+                if self.use_lods:
+                    drawables = self.select_lods(drawables, centers, radii, projection_matrix, view_matrix)
+            self.drawn_count = len(drawables)
+            self.lod_counts = np.bincount([mesh.lod_level for _, _, _, mesh in drawables], minlength=len(self.lod_counts)).tolist()
+        self.cull_time = time.perf_counter() - start
+        with profiler.scope("draw"):
+            if self.use_instancing:
+                self.render_batches(self.create_batches(drawables))
+            else:
+                for drawable in drawables:
+                    self.render_object(*drawable)
         if flip:
             pg.display.flip()
         
         viewport = (0, 0, self.width, self.height)
         glViewport(*viewport)
 
-    def render_object(self, object: GameObject, default_render_component: RenderComponent | None = None):
-            if object.render_component.is_active or default_render_component:
-                if not object.render_component.is_active:
-                    vao = default_render_component.vao
-                    texture2d = default_render_component.texture2d
-                    vertices = default_render_component.vertices
-                else:
-                    vao = object.render_component.vao
-                    texture2d = object.render_component.texture2d
-                    vertices = object.render_component.vertices
-                glUniformMatrix4fv(glGetUniformLocation(self.shader, "modelMatrix"), 1, GL_FALSE, object.local_transform.model_matrix)
-                glUniform1i(glGetUniformLocation(self.shader, "isBright"), object.render_component.is_bright)
-                texture2d.use()
-                glBindVertexArray(vao)
-                glDrawArrays(GL_TRIANGLES, 0, len(vertices))
-            for child in object.children:
-                self.render_object(child, default_render_component)
+    def render_object(self, object: GameObject, render_component: RenderComponent, model_matrix: np.ndarray, mesh: Mesh):
+        self.state.set_uniform_matrix("modelMatrix", model_matrix)
+        self.state.set_uniform_int("isBright", object.render_component.is_bright)
+        self.state.bind_texture(render_component.texture2d.ref)
+        self.state.bind_vertex_array(mesh.vao)
+        if mesh.is_indexed:
+            glDrawElements(GL_TRIANGLES, mesh.index_count, mesh.index_type, None)
+        else:
+            glDrawArrays(GL_TRIANGLES, 0, mesh.vertex_count)
+
+    def get_drawables(self, objects: list[GameObject], default_render_component: RenderComponent | None = None) -> list[Drawable]:
+        """The objects and children that can be drawn, each with its full detail mesh"""
+        drawables: list[Drawable] = []
+        objects_to_visit = list(reversed(objects))
+        while objects_to_visit:
+            object = objects_to_visit.pop()
+            render_component = object.render_component
+            if not render_component.is_active:
+                render_component = default_render_component
+            if render_component:
+                drawables.append((object, render_component, object.local_transform.model_matrix, render_component.mesh))
+            objects_to_visit.extend(reversed(object.children))
+        if self.interpolator and self.interpolator.is_interpolating():
+            moved_objects = self.interpolator.get_moved_objects()
+            drawables = [
+                (object, render_component, self.interpolator.get_model_matrix(object), mesh) if object in moved_objects else (object, render_component, model_matrix, mesh)
+                for object, render_component, model_matrix, mesh in drawables
+            ]
+        return drawables
+
+    def get_world_spheres(self, drawables: list[Drawable]) -> tuple[np.ndarray, np.ndarray]:
+        """(centers, radii) of the world space bounding spheres of the drawables"""
+        # Converting thousands of small arrays is the slow part, so only each mesh's sphere is converted, and the matrices
+        # are joined as one flat list of rows
+        mesh_indices: dict[Mesh, int] = {}
+        indices = [mesh_indices.setdefault(mesh, len(mesh_indices)) for _, _, _, mesh in drawables]
+        spheres = np.array([mesh.get_bounding_sphere() for mesh in mesh_indices], dtype=np.float32)[indices]
+        model_matrices = np.concatenate([model_matrix for _, _, model_matrix, _ in drawables]).reshape(-1, 4, 4).astype(np.float32, copy=False)
+        return get_world_spheres(spheres[:, 0:3], spheres[:, 3], model_matrices)
+
+    def cull(self, drawables: list[Drawable], centers: np.ndarray, radii: np.ndarray, projection_matrix, view_matrix) -> tuple[list[Drawable], np.ndarray, np.ndarray]:
+        """Removes the drawables whose bounding spheres are outside the view frustum, testing them all at once.
+        Each object is tested on its own, as children can be anywhere relative to their parents"""
+        is_visible = get_spheres_in_frustum(get_frustum_planes(projection_matrix, view_matrix), centers, radii)
+        self.culled_count = len(drawables) - int(is_visible.sum())
+        return [drawables[i] for i in np.flatnonzero(is_visible).tolist()], centers[is_visible], radii[is_visible]
+
+    def select_lods(self, drawables: list[Drawable], centers: np.ndarray, radii: np.ndarray, projection_matrix, view_matrix) -> list[Drawable]:
+        """Swaps in the simplified mesh for how big each drawable is on screen"""
+        levels = get_lod_levels(centers, radii, projection_matrix, view_matrix)
+        return [(object, render_component, model_matrix, render_component.get_lod(level)) for (object, render_component, model_matrix, _), level in zip(drawables, levels.tolist())]
+
+    def create_batches(self, drawables: list[Drawable]) -> dict[tuple[Mesh, Texture2D, bool], list[np.ndarray]]:
+        """Groups the model matrices of the drawables by (mesh, texture, is bright)"""
+        batches: dict[tuple[Mesh, Texture2D, bool], list[np.ndarray]] = {}
+        for object, render_component, model_matrix, mesh in drawables:
+            key = (mesh, render_component.texture2d, bool(object.render_component.is_bright))
+            batches.setdefault(key, []).append(model_matrix)
+        return batches
+
+    def render_batches(self, batches: dict[tuple[Mesh, Texture2D, bool], list[np.ndarray]]):
+        for (mesh, texture2d, is_bright), model_matrices in batches.items():
+            instance_data = np.array(model_matrices, dtype=np.float32)
+            glBindBuffer(GL_ARRAY_BUFFER, mesh.instance_vbo)
+            glBufferData(GL_ARRAY_BUFFER, instance_data.nbytes, instance_data, GL_STREAM_DRAW)
+            self.state.set_uniform_int("isBright", is_bright)
+            self.state.bind_texture(texture2d.ref)
+            self.state.bind_vertex_array(mesh.vao)
+            if mesh.is_indexed:
+                glDrawElementsInstanced(GL_TRIANGLES, mesh.index_count, mesh.index_type, None, len(model_matrices))
+            else:
+                glDrawArraysInstanced(GL_TRIANGLES, 0, mesh.vertex_count, len(model_matrices))
     
-    def render_texture_to_screen(self, texture: int, clear=True):
+    def render_texture_to_screen(self, texture: int, clear=True, flip=True, flip_y=False):
+        """flip_y draws the texture upside down, for textures stored top row first"""
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
         if clear:
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glBindTexture(GL_TEXTURE_2D, texture)
-        glUseProgram(self.quad_shader)
-        glBindVertexArray(self.vao)
+        self.state.reset()
+        self.state.bind_texture(texture)
+        self.state.use_program(self.quad_shader)
+        self.state.set_uniform_int("flipY", flip_y)
+        self.state.bind_vertex_array(self.vao)
         glDrawArrays(GL_TRIANGLES, 0, 6)
-        pg.display.flip()
+        if flip:
+            pg.display.flip()
 
-    def create_shader(self, vertex_path: str, fragment_path: str):
-        vertex_src = ""
-        with open(vertex_path) as vertex_file:
-            vertex_src = vertex_file.readlines()
-        
-        fragment_src = ""
-        with open(fragment_path) as fragment_file:
-            fragment_src = fragment_file.readlines()
-        
-        shader = compileProgram(
-            compileShader(vertex_src, GL_VERTEX_SHADER),
-            compileShader(fragment_src, GL_FRAGMENT_SHADER)
-        )
+    def render_texture_to_rect(self, texture: int, rect: tuple[int, int, int, int]):
+        """Blends texture over the screen in rect (x, y, width, height from the bottom left), on top of everything"""
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(*rect)
+        glDisable(GL_DEPTH_TEST)
+        self.state.bind_texture(texture)
+        self.state.use_program(self.overlay_shader)
+        self.state.bind_vertex_array(self.vao)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        glEnable(GL_DEPTH_TEST)
+        glViewport(0, 0, self.width, self.height)
 
-        return shader
+    def create_shader(self, vertex_path: str, fragment_path: str) -> ShaderProgram:
+        return ShaderProgram(vertex_path, fragment_path)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from classes.shaderprogram import ShaderProgram
+from OpenGL.GL import *
+import numpy as np
+
+class RenderState:
+    """Skips GL calls that would set state to what it already is, counting the skipped calls in skipped_calls"""
+    def __init__(self) -> None:
+        self.program: ShaderProgram | None = None
+        self.texture: int | None = None
+        self.vao: int | None = None
+        self.uniform_values: dict[tuple[ShaderProgram, str], int | np.ndarray] = {}
+        self.issued_calls: dict[str, int] = {}
+        self.skipped_calls: dict[str, int] = {}
+
+    def reset(self):
+        """Forgets the bindings, for when code outside the renderer may have changed them. Uniform values are kept as only the renderer sets them"""
+        self.program = None
+        self.texture = None
+        self.vao = None
+
+    def use_program(self, program: ShaderProgram):
+        if self.count(self.program is program, "glUseProgram"):
+            glUseProgram(program.ref)
+            self.program = program
+
+    def bind_texture(self, texture: int):
+        if self.count(self.texture == texture, "glBindTexture"):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            self.texture = texture
+
+    def bind_vertex_array(self, vao: int):
+        if self.count(self.vao == vao, "glBindVertexArray"):
+            glBindVertexArray(vao)
+            self.vao = vao
+
+    def set_uniform_int(self, name: str, value: int):
+        """Sets an int uniform of the program in use"""
+        key = (self.program, name)
+        value = int(value)
+        if self.count(self.uniform_values.get(key) == value, "glUniform1i"):
+            glUniform1i(self.program.get_uniform_location(name), value)
+            self.uniform_values[key] = value
+
+    def set_uniform_matrix(self, name: str, matrix: np.ndarray, transpose: bool = False):
+        """Sets a mat4 uniform of the program in use"""
+        key = (self.program, name)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if transpose:
+            matrix = matrix.T
+        previous = self.uniform_values.get(key)
+        if self.count(previous is not None and np.array_equal(previous, matrix), "glUniformMatrix4fv"):
+            glUniformMatrix4fv(self.program.get_uniform_location(name), 1, GL_FALSE, np.ascontiguousarray(matrix))
+            self.uniform_values[key] = matrix.copy()
+
+    def count(self, is_redundant: bool, call_name: str) -> bool:
+        """Records the call, returns whether it needs to be made"""
+        counts = self.skipped_calls if is_redundant else self.issued_calls
+        counts[call_name] = counts.get(call_name, 0) + 1
+        return not is_redundant
+
+    def reset_counts(self):
+        self.issued_calls.clear()
+        self.skipped_calls.clear()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+from classes.assetregistry import registry
+from classes.rendercomponent import RenderComponent
+from classes.gameobject import GameObject
+from typing import Any, Iterator, TextIO, TYPE_CHECKING
+import json
+import time
+import re
+if TYPE_CHECKING:
+    from main import App
+
+class SceneStreamer:
+    """Creates the game objects of a scene file a few at a time, within a time budget each frame, so frames are drawn while a large scene loads.
+    Meshes load in the background and are drawn as a placeholder until they're ready"""
+    def __init__(self, app: App, path: str, time_budget: float = 0.005) -> None:
+        self.app = app
+        self.time_budget = time_budget
+        self.file = open(path)
+        self.items: Iterator[dict] | None = iter_json_array_items(self.file, "objects")
+        self.created_count = 0
+        # Game objects whose render component is drawing the placeholder mesh
+        self.waiting_objects: dict[RenderComponent, GameObject] = {}
+
+    def update(self) -> bool:
+        """Creates game objects until the time budget runs out and swaps in the meshes that have loaded. Returns whether the whole scene has loaded"""
+        start = time.perf_counter()
+        for render_component in registry.load_finished_meshes():
+            game_object = self.waiting_objects.pop(render_component, None)
+            if game_object:
+                game_object.invalidate_bounds()
+
+        while self.items is not None and time.perf_counter() - start < self.time_budget:
+            item = next(self.items, None)
+            if item is None:
+                self.close()
+                break
+            game_object = self.app.create_game_object_from_json(item, stream_assets=True)
+            self.app.game_objects.append(game_object)
+            self.app.init_game_object(game_object)
+            self.add_waiting_objects(game_object)
+        return self.items is None and not registry.is_loading()
+
+    def add_waiting_objects(self, game_object: GameObject):
+        game_objects = [game_object]
+        while game_objects:
+            game_object = game_objects.pop()
+            self.created_count += 1
+            render_component = game_object.render_component
+            if render_component.is_active and render_component.mesh.obj_path != render_component.obj_path:
+                self.waiting_objects[render_component] = game_object
+            game_objects.extend(game_object.children)
+
+    def close(self):
+        self.items = None
+        self.file.close()
+
+def iter_json_array_items(file: TextIO, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yields the objects in the array under key in a JSON file one at a time, reading the file in chunks instead of all at once.
+    The items must be objects or arrays, so a complete one can't be mistaken for the start of a longer one"""
+    decoder = json.JSONDecoder()
+    separator = re.compile(r"[\s,]*")
+    buffer = ""
+    position = None
+    array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while position is None:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            raise ValueError(f'No "{key}" array in {getattr(file, "name", "the file")}')
+        buffer += chunk
+        match = array_start.search(buffer)
+        if match:
+            position = match.end()
+
+    read_size = chunk_size
+    while True:
+        position = separator.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                pass # The item continues past the buffer
+            else:
+                yield item
+                position = end
+                read_size = chunk_size
+                continue
+
+        # Read more, doubling the amount while a single item doesn't fit so large items aren't parsed over and over
+        chunk = file.read(read_size)
+        if not chunk:
+            raise ValueError(f'The "{key}" array in {getattr(file, "name", "the file")} is cut off')
+        buffer = buffer[position:] + chunk
+        position = 0
+        read_size = max(read_size, len(buffer))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+from classes.monobehaviour import MonoBehaviour
+from classes.profiler import profiler
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from classes.gameobject import GameObject
+
+class ScriptScheduler:
+    """Calls a method of every script in the hierarchy. Scripts are split into levels where nothing conflicts with anything else in the level,
+    levels run one after another and the scripts in a level run at the same time on a thread pool, apart from main thread ones.
+    Conflicting scripts still run in hierarchy order, so the result is the same as running them one by one"""
+    def __init__(self, worker_count: int | None = None) -> None:
+        self.worker_count = worker_count or os.cpu_count() or 1
+        self.pool: ThreadPoolExecutor | None = None
+        # Levels of each method: [(scripts for the pool, scripts for the main thread)], rebuilt after the hierarchy changes
+        self.levels: dict[str, list[tuple[list[MonoBehaviour], list[MonoBehaviour]]]] = {}
+
+    def mark_dirty(self):
+        """Call when game objects or scripts are added, removed or moved"""
+        self.levels.clear()
+
+    def run(self, game_objects: list[GameObject], method_name: str, delta_time: float):
+        levels = self.levels.get(method_name)
+        if levels is None:
+            levels = self.levels[method_name] = get_levels(get_scripts(game_objects, method_name))
+        for pool_scripts, main_thread_scripts in levels:
+            for script in pool_scripts:
+                script.delta_time = delta_time
+            for script in main_thread_scripts:
+                script.delta_time = delta_time
+            if self.worker_count > 1 and len(pool_scripts) > 1:
+                if self.pool is None:
+                    self.pool = ThreadPoolExecutor(self.worker_count, thread_name_prefix="scripts")
+                futures = [self.pool.submit(run_script, script, method_name) for script in pool_scripts]
+                for script in main_thread_scripts:
+                    run_script(script, method_name)
+                for future in futures:
+                    future.result() # Raises the script's exception here
+            else:
+                for script in pool_scripts + main_thread_scripts:
+                    run_script(script, method_name)
+
+    def destroy(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+def run_script(script: MonoBehaviour, method_name: str):
+    if profiler.enabled:
+        with profiler.scope(f"{type(script).__name__}.{method_name}"):
+            getattr(script, method_name)()
+    else:
+        getattr(script, method_name)()
+
+def get_scripts(game_objects: list[GameObject], method_name: str) -> list[MonoBehaviour]:
+    """The scripts that override the method on the game objects and their children, parents first"""
+    base_method = getattr(MonoBehaviour, method_name)
+    scripts: list[MonoBehaviour] = []
+    objects_to_visit = list(reversed(game_objects))
+    while objects_to_visit:
+        game_object = objects_to_visit.pop()
+        for script in game_object.components:
+            if getattr(type(script), method_name) is not base_method:
+                scripts.append(script)
+        objects_to_visit.extend(reversed(game_object.children))
+    return scripts
+
+def get_levels(scripts: list[MonoBehaviour]) -> list[tuple[list[MonoBehaviour], list[MonoBehaviour]]]:
+    """Puts each script one level after the last earlier script it conflicts with, reading something it writes or writing something it reads or writes"""
+    last_write_levels: dict[str | tuple[int, str], int] = {}
+    last_read_levels: dict[str | tuple[int, str], int] = {}
+    first_free_level = 0 # Scripts without declared writes take a level of their own
+    level_count = 0
+    script_levels: list[int] = []
+    for script in scripts:
+        if script.writes is None:
+            level = level_count
+            first_free_level = level + 1
+        else:
+            reads = [get_resource(script, name) for name in script.reads or ()]
+            writes = [get_resource(script, name) for name in script.writes]
+            level = first_free_level
+            for resource in reads:
+                level = max(level, last_write_levels.get(resource, -1) + 1)
+            for resource in writes:
+                level = max(level, last_write_levels.get(resource, -1) + 1, last_read_levels.get(resource, -1) + 1)
+            for resource in reads:
+                last_read_levels[resource] = max(last_read_levels.get(resource, -1), level)
+            for resource in writes:
+                last_write_levels[resource] = level
+        script_levels.append(level)
+        level_count = max(level_count, level + 1)
+
+    levels: list[tuple[list[MonoBehaviour], list[MonoBehaviour]]] = [([], []) for _ in range(level_count)]
+    for script, level in zip(scripts, script_levels):
+        pool_scripts, main_thread_scripts = levels[level]
+        (main_thread_scripts if script.main_thread or script.writes is None else pool_scripts).append(script)
+    return levels
+
+def get_resource(script: MonoBehaviour, name: str) -> str | tuple[int, str]:
+    if name == "own.transform":
+        # Moving an object moves everything under it, so a transform is shared with the whole hierarchy it's in
+        root = script.game_object
+        while root.parent:
+            root = root.parent
+        return (id(root), name)
+    if name.startswith("own."):
+        return (id(script.game_object), name)
+    return name
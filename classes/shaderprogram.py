@@ -0,0 +1,30 @@
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+
+class ShaderProgram:
+    """A compiled shader program with its uniform locations looked up once"""
+    def __init__(self, vertex_path: str, fragment_path: str) -> None:
+        vertex_src = ""
+        with open(vertex_path) as vertex_file:
+            vertex_src = vertex_file.readlines()
+        
+        fragment_src = ""
+        with open(fragment_path) as fragment_file:
+            fragment_src = fragment_file.readlines()
+        
+        self.ref = compileProgram(
+            compileShader(vertex_src, GL_VERTEX_SHADER),
+            compileShader(fragment_src, GL_FRAGMENT_SHADER)
+        )
+
+        self.uniform_locations: dict[str, int] = {}
+        for i in range(glGetProgramiv(self.ref, GL_ACTIVE_UNIFORMS)):
+            name = glGetActiveUniform(self.ref, i)[0].decode()
+            self.uniform_locations[name] = glGetUniformLocation(self.ref, name)
+
+    def get_uniform_location(self, name: str) -> int:
+        """Returns -1 (ignored by glUniform*) for uniforms the compiler removed or that don't exist"""
+        return self.uniform_locations.get(name, -1)
+
+    def destroy(self):
+        glDeleteProgram(self.ref)
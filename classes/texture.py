@@ -3,6 +3,7 @@ from OpenGL.GL import *
 
 class Texture2D:
     def __init__(self, image_path: str) -> None:
+        self.image_path = image_path
         image = pg.image.load(image_path).convert_alpha()
         image_data = pg.image.tostring(image, "RGBA")
 
@@ -1,23 +1,97 @@
 from __future__ import annotations
-from classes.vec3 import Vec3
+from classes.vec3 import Vec3, BoundVec3
 import pyrr.matrix44 as mat4
 import numpy as np
-from typing import TYPE_CHECKING
+from typing import Callable, TYPE_CHECKING
 if TYPE_CHECKING:
     from classes.gameobject import GameObject
 
 class Transform:
+    is_stored = False # Whether the values live in a TransformStore
+
     def __init__(self, pos: Vec3, scale: Vec3, rotation: Vec3) -> None:
+        self.parent: Transform | None = None # Set by the game object
+        # Set by the game object, called after pos, scale or rotation (or one of their components) is set
+        self.on_change: Callable[[], None] | None = None
+
+        # Rebuilt when needed, None when out of date
+        self.local_matrix: np.ndarray | None = None
+        self.world_matrix: np.ndarray | None = None
+
+        # Copies bound to this transform, so setting a component (transform.pos.x = 5) marks it dirty
         self.pos = pos
         self.scale = scale
         self.rotation = rotation
-        self.model_matrix = mat4.create_identity()
+
+    @property
+    def pos(self) -> Vec3:
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: Vec3):
+        self._pos = bind(value, self, "pos")
+        self.changed()
+
+    @property
+    def scale(self) -> Vec3:
+        return self._scale
+
+    @scale.setter
+    def scale(self, value: Vec3):
+        self._scale = bind(value, self, "scale")
+        self.changed()
+
+    @property
+    def rotation(self) -> Vec3:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value: Vec3):
+        self._rotation = bind(value, self, "rotation")
+        self.changed()
+
+    @property
+    def model_matrix(self) -> np.ndarray:
+        """The world matrix, only rebuilt if this transform or a parent changed since it was last used"""
+        if self.world_matrix is None:
+            # Out of date parents first, reusing the world matrix of the first up to date one
+            out_of_date: list[Transform] = []
+            transform = self
+            while transform and transform.world_matrix is None:
+                out_of_date.append(transform)
+                transform = transform.parent
+            for transform in reversed(out_of_date):
+                if transform.local_matrix is None:
+                    transform.local_matrix = create_model_matrix(transform)
+                if transform.parent:
+                    transform.world_matrix = mat4.multiply(transform.local_matrix, transform.parent.world_matrix)
+                else:
+                    transform.world_matrix = transform.local_matrix
+        return self.world_matrix
+
+    def set_dirty(self):
+        self.local_matrix = None
+        self.world_matrix = None
+
+    def changed(self):
+        """Marks the matrices built from the values out of date, along with the game object's children and bounds"""
+        self.local_matrix = None
+        if self.on_change is not None:
+            self.on_change()
+        else:
+            self.world_matrix = None
     
     @staticmethod
     def identity():
         return Transform(Vec3.zero(), Vec3.one(), Vec3.zero())
         
         
+def bind(vector: Vec3, owner: Transform, name: str) -> BoundVec3:
+    """vector itself if it's already the owner's, otherwise a copy bound to it"""
+    if type(vector) is BoundVec3 and vector.owner is owner and vector.name == name:
+        return vector
+    return BoundVec3(vector.x, vector.y, vector.z, owner, name)
+
 @staticmethod
 def create_model_matrix(transform: Transform) -> np.ndarray:
     model_matrix = mat4.create_identity(dtype=np.float32)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+from classes.transform import Transform
+from classes.vec3 import Vec3, BoundVec3
+from threading import Lock
+import numpy as np
+
+class TransformStore:
+    """Keeps the transforms of every game object in contiguous arrays and builds all their matrices in one batched pass.
+    Slots are handed out as TransformViews, which game objects use in place of a Transform"""
+    def __init__(self, capacity: int = 64) -> None:
+        self.count = 0 # Slots used so far, including freed ones
+        self.free_slots: list[int] = []
+        self.views: list[TransformView | None] = []
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.scales = np.ones((capacity, 3), dtype=np.float32)
+        self.rotations = np.zeros((capacity, 3), dtype=np.float32)
+        self.parents = np.full(capacity, -1, dtype=np.int64) # -1 for top level transforms
+        self.is_used = np.zeros(capacity, dtype=bool)
+        self.local_matrices = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.world_matrices = np.zeros((capacity, 4, 4), dtype=np.float32)
+
+        self.is_dirty = False
+        self.is_hierarchy_dirty = False
+        self.levels: list[np.ndarray] = [] # Slot indices of each depth, parents before children
+        self.lock = Lock() # Scripts on the scheduler's pool read matrices, and so update, at the same time
+
+    def create_view(self, transform: Transform) -> TransformView:
+        """Stores a copy of transform, returning the view to use instead of it"""
+        if self.free_slots:
+            index = self.free_slots.pop()
+        else:
+            if self.count == len(self.positions):
+                self.grow()
+            index = self.count
+            self.count += 1
+            self.views.append(None)
+        self.is_used[index] = True
+        view = TransformView(self, index, transform)
+        self.views[index] = view
+        self.is_hierarchy_dirty = True
+        return view
+
+    def remove(self, index: int):
+        self.is_used[index] = False
+        self.views[index] = None
+        self.parents[self.parents == index] = -1
+        self.parents[index] = -1
+        self.free_slots.append(index)
+        self.is_hierarchy_dirty = True
+
+    def set_parent(self, index: int, parent_index: int):
+        if self.parents[index] != parent_index:
+            self.parents[index] = parent_index
+            self.is_hierarchy_dirty = True
+        self.is_dirty = True
+
+    def grow(self):
+        capacity = len(self.positions) * 2
+        for name, fill in (("positions", 0), ("scales", 1), ("rotations", 0), ("parents", -1), ("is_used", False), ("local_matrices", 0), ("world_matrices", 0)):
+            old_array = getattr(self, name)
+            new_array = np.full((capacity,) + old_array.shape[1:], fill, dtype=old_array.dtype)
+            new_array[:len(old_array)] = old_array
+            setattr(self, name, new_array)
+
+    def sort_hierarchy(self):
+        """Groups the used slots by depth"""
+        count = self.count
+        parents = self.parents[:count]
+        has_parent = parents >= 0
+        depths = np.zeros(count, dtype=np.int64)
+        for _ in range(count + 1):
+            new_depths = np.where(has_parent, depths[parents] + 1, 0)
+            if np.array_equal(new_depths, depths):
+                break
+            depths = new_depths
+        else:
+            raise ValueError("Transform hierarchy has a cycle")
+
+        used = np.flatnonzero(self.is_used[:count])
+        order = used[np.argsort(depths[used], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(depths[order])) + 1
+        self.levels = np.split(order, boundaries) if len(order) else []
+        self.is_hierarchy_dirty = False
+
+    def update(self):
+        """Rebuilds every local and world matrix if anything changed"""
+        if not self.is_dirty and not self.is_hierarchy_dirty:
+            return
+        with self.lock:
+            if not self.is_dirty and not self.is_hierarchy_dirty: # Another thread just did
+                return
+            # Cleared first, so values written by other threads while this runs mark the store dirty again
+            self.is_dirty = False
+            if self.is_hierarchy_dirty:
+                self.sort_hierarchy()
+            count = self.count
+            self.local_matrices[:count] = create_model_matrices(self.positions[:count], self.scales[:count], self.rotations[:count])
+            for level in self.levels:
+                parents = self.parents[level]
+                if parents[0] < 0: # Top level
+                    self.world_matrices[level] = self.local_matrices[level]
+                else:
+                    self.world_matrices[level] = np.matmul(self.local_matrices[level], self.world_matrices[parents])
+
+class TransformView(Transform):
+    """A Transform whose values live in a TransformStore. pos, scale and rotation return copies bound to the view,
+    so setting one of their components writes it back to the store"""
+    is_stored = True
+
+    def __init__(self, store: TransformStore, index: int, transform: Transform) -> None:
+        self.store = store
+        self.index = index
+        super().__init__(transform.pos, transform.scale, transform.rotation)
+
+    @property
+    def pos(self) -> Vec3:
+        return BoundVec3(*self.store.positions[self.index].tolist(), self, "pos")
+
+    @pos.setter
+    def pos(self, value: Vec3):
+        self.store.positions[self.index] = value.to_list()
+        self.changed()
+
+    @property
+    def scale(self) -> Vec3:
+        return BoundVec3(*self.store.scales[self.index].tolist(), self, "scale")
+
+    @scale.setter
+    def scale(self, value: Vec3):
+        self.store.scales[self.index] = value.to_list()
+        self.changed()
+
+    @property
+    def rotation(self) -> Vec3:
+        return BoundVec3(*self.store.rotations[self.index].tolist(), self, "rotation")
+
+    @rotation.setter
+    def rotation(self, value: Vec3):
+        self.store.rotations[self.index] = value.to_list()
+        self.changed()
+
+    @property
+    def parent(self) -> TransformView | None:
+        parent_index = self.store.parents[self.index]
+        return self.store.views[parent_index] if parent_index >= 0 else None
+
+    @parent.setter
+    def parent(self, value: TransformView | None):
+        if value is not None and value.store is not self.store:
+            raise TypeError
+        self.store.set_parent(self.index, value.index if value else -1)
+
+    @property
+    def local_matrix(self) -> np.ndarray:
+        self.store.update()
+        return self.store.local_matrices[self.index]
+
+    @local_matrix.setter
+    def local_matrix(self, value: None):
+        """Only None (out of date) can be set"""
+        self.store.is_dirty = True
+
+    @property
+    def world_matrix(self) -> np.ndarray:
+        self.store.update()
+        return self.store.world_matrices[self.index]
+
+    @world_matrix.setter
+    def world_matrix(self, value: None):
+        """Only None (out of date) can be set"""
+        self.store.is_dirty = True
+
+    def set(self, transform: Transform):
+        """Copies the values of transform, leaving the game object to mark what depends on them"""
+        self.store.positions[self.index] = transform.pos.to_list()
+        self.store.scales[self.index] = transform.scale.to_list()
+        self.store.rotations[self.index] = transform.rotation.to_list()
+        self.store.is_dirty = True
+
+def create_model_matrices(positions: np.ndarray, scales: np.ndarray, rotations: np.ndarray) -> np.ndarray:
+    """Batched create_model_matrix, (n, 3) arrays to (n, 4, 4) matrices"""
+    count = len(positions)
+    cos = np.cos(rotations)
+    sin = np.sin(rotations)
+
+    # Same order as create_model_matrix: scale, x rotation, rotation.y around z, rotation.z around y, translation
+    x_rotations = np.zeros((count, 3, 3), dtype=np.float32)
+    x_rotations[:, 0, 0] = 1
+    x_rotations[:, 1, 1] = cos[:, 0]
+    x_rotations[:, 1, 2] = sin[:, 0]
+    x_rotations[:, 2, 1] = -sin[:, 0]
+    x_rotations[:, 2, 2] = cos[:, 0]
+
+    z_rotations = np.zeros((count, 3, 3), dtype=np.float32)
+    z_rotations[:, 0, 0] = cos[:, 1]
+    z_rotations[:, 0, 1] = sin[:, 1]
+    z_rotations[:, 1, 0] = -sin[:, 1]
+    z_rotations[:, 1, 1] = cos[:, 1]
+    z_rotations[:, 2, 2] = 1
+
+    y_rotations = np.zeros((count, 3, 3), dtype=np.float32)
+    y_rotations[:, 0, 0] = cos[:, 2]
+    y_rotations[:, 0, 2] = -sin[:, 2]
+    y_rotations[:, 1, 1] = 1
+    y_rotations[:, 2, 0] = sin[:, 2]
+    y_rotations[:, 2, 2] = cos[:, 2]
+
+    matrices = np.zeros((count, 4, 4), dtype=np.float32)
+    matrices[:, :3, :3] = np.matmul(np.matmul(x_rotations, z_rotations), y_rotations) * scales[:, :, None]
+    matrices[:, 3, :3] = positions
+    matrices[:, 3, 3] = 1
+    return matrices
@@ -0,0 +1,120 @@
+from OpenGL.GL import *
+import pygame as pg
+import numpy as np
+import ctypes
+
+class UICompositor:
+    """Keeps a GL texture in sync with a pygame surface, uploading only the tiles whose pixels changed since the last upload.
+    The texture is stored top row first like the surface, draw it with flip_y. Uploads go through two pixel buffers in turn,
+    so filling one doesn't wait for the GPU to finish reading the other"""
+    def __init__(self, surface: pg.Surface, tile_size: int = 64, use_pbos: bool = True) -> None:
+        self.surface = surface
+        self.width, self.height = surface.get_size()
+        self.tile_size = tile_size
+        self.use_pbos = use_pbos
+        masks = surface.get_masks()
+        if surface.get_bitsize() != 32 or masks[3] != 0xff000000:
+            raise ValueError("The UI surface needs 32 bit pixels with alpha in the top byte")
+        self.pixel_format = GL_RGBA if masks[0] == 0xff else GL_BGRA
+
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0, self.pixel_format, GL_UNSIGNED_BYTE, None)
+
+        self.pbos = [int(pbo) for pbo in glGenBuffers(2)] if use_pbos else []
+        self.pbo_index = 0
+
+        # What the texture holds, to compare the surface with
+        self.uploaded_pixels = np.zeros((self.height, self.width), dtype=np.uint32)
+        self.needs_full_upload = True
+
+        # Of the last update, for profiling
+        self.dirty_rects: list[pg.Rect] = []
+        self.uploaded_bytes = 0
+
+    def update(self) -> bool:
+        """Uploads the parts of the surface that changed, returns whether there were any"""
+        pixels = pg.surfarray.pixels2d(self.surface).T # Locks the surface until it's deleted
+        if self.needs_full_upload:
+            self.dirty_rects = [pg.Rect(0, 0, self.width, self.height)]
+            self.needs_full_upload = False
+        else:
+            self.dirty_rects = self.get_dirty_rects(pixels)
+        self.uploaded_bytes = sum(rect.width * rect.height * 4 for rect in self.dirty_rects)
+        if self.dirty_rects:
+            regions = [pixels[rect.top:rect.bottom, rect.left:rect.right] for rect in self.dirty_rects]
+            if self.use_pbos:
+                self.upload_through_pbo(regions)
+            else:
+                glBindTexture(GL_TEXTURE_2D, self.texture)
+                for rect, region in zip(self.dirty_rects, regions):
+                    # As bytes, PyOpenGL would convert each uint32 to a byte
+                    glTexSubImage2D(GL_TEXTURE_2D, 0, rect.left, rect.top, rect.width, rect.height, self.pixel_format, GL_UNSIGNED_BYTE, np.ascontiguousarray(region).view(np.uint8))
+            for rect, region in zip(self.dirty_rects, regions):
+                self.uploaded_pixels[rect.top:rect.bottom, rect.left:rect.right] = region
+        del pixels
+        return bool(self.dirty_rects)
+
+    def get_dirty_rects(self, pixels: np.ndarray) -> list[pg.Rect]:
+        """Rects covering the tiles that differ from the texture, runs of changed tiles in a row of tiles merged with
+        the same run in the rows below"""
+        changed = pixels != self.uploaded_pixels
+        tile_starts = np.arange(0, self.height, self.tile_size), np.arange(0, self.width, self.tile_size)
+        changed_tiles = np.logical_or.reduceat(np.logical_or.reduceat(changed, tile_starts[0], axis=0), tile_starts[1], axis=1)
+        if not changed_tiles.any():
+            return []
+
+        rects: list[pg.Rect] = []
+        open_rects: dict[tuple[int, int], pg.Rect] = {} # (first column, last column) of the runs in the row above
+        for row, row_tiles in enumerate(changed_tiles.tolist()):
+            top = row * self.tile_size
+            bottom = min(top + self.tile_size, self.height)
+            runs: dict[tuple[int, int], pg.Rect] = {}
+            column = 0
+            while column < len(row_tiles):
+                if not row_tiles[column]:
+                    column += 1
+                    continue
+                first = column
+                while column < len(row_tiles) and row_tiles[column]:
+                    column += 1
+                rect = open_rects.pop((first, column), None)
+                if rect is None:
+                    left = first * self.tile_size
+                    rect = pg.Rect(left, top, min(column * self.tile_size, self.width) - left, 0)
+                    rects.append(rect)
+                rect.height = bottom - rect.top
+                runs[(first, column)] = rect
+            open_rects = runs
+        return rects
+
+    def upload_through_pbo(self, regions: list[np.ndarray]):
+        """Packs the regions one after another into the next pixel buffer and copies them from there into the texture"""
+        pbo = self.pbos[self.pbo_index]
+        self.pbo_index = (self.pbo_index + 1) % len(self.pbos)
+        size = sum(region.nbytes for region in regions)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, size, None, GL_STREAM_DRAW) # Orphans the old storage so the GPU can keep reading it
+        address = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, size, GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT)
+        buffer = np.frombuffer((ctypes.c_uint32 * (size // 4)).from_address(address), dtype=np.uint32)
+        offset = 0
+        for region in regions:
+            buffer[offset:offset + region.size].reshape(region.shape)[:] = region
+            offset += region.size
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        offset = 0
+        for rect, region in zip(self.dirty_rects, regions):
+            glTexSubImage2D(GL_TEXTURE_2D, 0, rect.left, rect.top, rect.width, rect.height, self.pixel_format, GL_UNSIGNED_BYTE, ctypes.c_void_p(offset))
+            offset += region.nbytes
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def destroy(self):
+        glDeleteTextures(1, (self.texture,))
+        if self.pbos:
+            glDeleteBuffers(len(self.pbos), self.pbos)
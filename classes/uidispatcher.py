@@ -0,0 +1,25 @@
+from __future__ import annotations
+import pygame as pg
+import pygame_gui as pgui
+from typing import Callable
+
+class UIDispatcher:
+    """Maps UI elements to the functions that handle their events, so handling an event is a lookup however many elements there are.
+    Whatever makes an element registers its handlers and unregisters them when it kills the element"""
+    def __init__(self) -> None:
+        self.handlers: dict[pgui.core.UIElement, dict[int, Callable[[pg.event.Event], None]]] = {}
+
+    def register(self, event_type: int, element: pgui.core.UIElement, handler: Callable[[pg.event.Event], None]):
+        self.handlers.setdefault(element, {})[event_type] = handler
+
+    def unregister(self, element: pgui.core.UIElement):
+        """Removes every handler of the element"""
+        self.handlers.pop(element, None)
+
+    def dispatch(self, event: pg.event.Event) -> bool:
+        """Calls the handler of the event's element, returns whether there was one"""
+        handler = self.handlers.get(getattr(event, "ui_element", None), {}).get(event.type)
+        if handler is None:
+            return False
+        handler(event)
+        return True
@@ -1,85 +1,125 @@
+from __future__ import annotations
 from math import sqrt
-from collections import namedtuple
 import numpy as np
 
+# Types that scale a vector, as a set so checking a type is one lookup
+SCALAR_TYPES = frozenset((float, int, np.float64, np.float32))
+
 class Vec3:
+    __slots__ = ("x", "y", "z")
 
     def __init__(self, x: float, y: float, z: float) -> None:
         self.x = x
         self.y = y
         self.z = z
-    
+
     def __add__(self, other):
-        if type(other) == Vec3:
+        if type(other) in VECTOR_TYPES:
             return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
         raise TypeError
-    
+
     def __sub__(self, other):
-        if type(other) == Vec3:
+        if type(other) in VECTOR_TYPES:
             return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
         raise TypeError
-    
+
     def __mul__(self, other):
-        a = type(other)
-        if type(other) in [float, int, np.float64, np.float32]:
+        if type(other) in SCALAR_TYPES:
             return Vec3(self.x * other, self.y * other, self.z * other)
-        elif type(other) == Vec3: # Dot product
+        elif type(other) in VECTOR_TYPES: # Dot product
             return self.x * other.x + self.y * other.y + self.z * other.z
         raise TypeError
-    
+
     def __truediv__(self, other):
-        if type(other) in [float, int]:
+        if type(other) in SCALAR_TYPES:
             return Vec3(self.x / other, self.y / other, self.z / other)
-    
+        raise TypeError
+
+    # In place versions, changing self instead of creating a new vector. The operators (+= etc.) stay copying, since vectors
+    # are shared with transforms, which wouldn't know they changed. Only use these on vectors nothing else holds
+    def add_in_place(self, other: Vec3) -> Vec3:
+        if type(other) in VECTOR_TYPES:
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
+            return self
+        raise TypeError
+
+    def sub_in_place(self, other: Vec3) -> Vec3:
+        if type(other) in VECTOR_TYPES:
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
+            return self
+        raise TypeError
+
+    def mul_in_place(self, other: float) -> Vec3:
+        """Scalars only, as multiplying by a vector is the dot product"""
+        if type(other) in SCALAR_TYPES:
+            self.x *= other
+            self.y *= other
+            self.z *= other
+            return self
+        raise TypeError
+
+    def div_in_place(self, other: float) -> Vec3:
+        if type(other) in SCALAR_TYPES:
+            self.x /= other
+            self.y /= other
+            self.z /= other
+            return self
+        raise TypeError
+
     def __abs__(self):
-        return sqrt(self.x**2 + self.y**2 + self.z**2)
-    
+        return sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
     def __len__(self):
         return 3
-    
+
     def to_list(self):
         return [self.x, self.y, self.z]
-    
+
     def normalize(self):
-        if abs(self) != 0:
-            return self / abs(self)
+        length = abs(self)
+        if length != 0:
+            return Vec3(self.x / length, self.y / length, self.z / length)
         return self
-    
+
     def cross(self, other):
-        if type(other) != Vec3:
+        if type(other) not in VECTOR_TYPES:
             raise TypeError
         return Vec3(self.y * other.z - self.z * other.y, self.z * other.x - self.x * other.z, self.x * other.y - self.y * other.x)
-    
+
     def vec_mul(self, other):
         """Multiplies each component of self by the corrosponding component in other"""
-        if type(other) != Vec3:
+        if type(other) not in VECTOR_TYPES:
             raise TypeError
         return Vec3(self.x * other.x, self.y * other.y, self.z * other.z)
-    
+
     def vec_div(self, other):
         """Divides each component of self by the corrosponding component in other"""
-        if type(other) != Vec3:
+        if type(other) not in VECTOR_TYPES:
             raise TypeError
         return Vec3(self.x / other.x, self.y / other.y, self.z / other.z)
-    
+
     def mat_mul(self, other, transpose = False):
         """Vec3 times a 4x4 row-majored matrix. Returns a Vec3"""
-        if type(other) == np.ndarray and type(other[0]) == np.ndarray:
-            Vec4 = namedtuple('Vec4', "x y z w")
-            self4 = Vec4(self.x, self.y, self.z, 1)
+        if type(other) is np.ndarray and other.shape == (4, 4):
+            m = other.tolist() # Python floats are much faster to index and multiply than numpy scalars
+            x, y, z = self.x, self.y, self.z
             if transpose:
                 return Vec3(
-                    self4.x * other[0][0] + self4.y * other[1][0] + self4.z * other[2][0] + self4.w * other[3][0],
-                    self4.x * other[0][1] + self4.y * other[1][1] + self4.z * other[2][1] + self4.w * other[3][1],
-                    self4.x * other[0][2] + self4.y * other[1][2] + self4.z * other[2][2] + self4.w * other[3][2]
+                    x * m[0][0] + y * m[1][0] + z * m[2][0] + m[3][0],
+                    x * m[0][1] + y * m[1][1] + z * m[2][1] + m[3][1],
+                    x * m[0][2] + y * m[1][2] + z * m[2][2] + m[3][2]
                 )
             return Vec3(
-                self4.x * other[0][0] + self4.y * other[0][1] + self4.z * other[0][2] + self4.w * other[0][3],
-                self4.x * other[1][0] + self4.y * other[1][1] + self4.z * other[1][2] + self4.w * other[1][3],
-                self4.x * other[2][0] + self4.y * other[2][1] + self4.z * other[2][2] + self4.w * other[2][3]
+                x * m[0][0] + y * m[0][1] + z * m[0][2] + m[0][3],
+                x * m[1][0] + y * m[1][1] + z * m[1][2] + m[1][3],
+                x * m[2][0] + y * m[2][1] + z * m[2][2] + m[2][3]
             )
         raise TypeError
-    
+
     @staticmethod
     def zero():
         return Vec3(0, 0, 0)
@@ -87,27 +127,151 @@ class Vec3:
     @staticmethod
     def one():
         return Vec3(1, 1, 1)
-    
+
     @staticmethod
     def up():
         return Vec3(0, 1, 0)
-    
+
     @staticmethod
     def down():
         return Vec3(0, -1, 0)
-    
+
     @staticmethod
     def left():
         return Vec3(-1, 0, 0)
-    
+
     @staticmethod
     def right():
         return Vec3(1, 0, 0)
-    
+
     @staticmethod
     def forward():
         return Vec3(0, 0, 1)
-    
+
     @staticmethod
     def backward():
-        return Vec3(0, 0, -1)
\ No newline at end of file
+        return Vec3(0, 0, -1)
+
+class BoundVec3(Vec3):
+    """A vector belonging to an owner, like a transform's pos, that assigns itself back to the owner's attribute whenever
+    x, y or z is set, so the owner sees the change"""
+    __slots__ = ("owner", "name")
+
+    def __init__(self, x: float, y: float, z: float, owner: object, name: str) -> None:
+        set_slot = object.__setattr__ # Without telling the owner
+        set_slot(self, "x", x)
+        set_slot(self, "y", y)
+        set_slot(self, "z", z)
+        set_slot(self, "owner", owner)
+        set_slot(self, "name", name)
+
+    def __setattr__(self, name: str, value: float):
+        object.__setattr__(self, name, value)
+        setattr(self.owner, self.name, self)
+
+# Types that are vectors, so they can be mixed in math
+VECTOR_TYPES = frozenset((Vec3, BoundVec3))
+
+class Vec3Array:
+    """Many vectors in an (n, 3) float32 array, for doing the same math on all of them at once"""
+    __slots__ = ("data",)
+
+    def __init__(self, data) -> None:
+        if type(data) is list and data and type(data[0]) in VECTOR_TYPES:
+            data = [vector.to_list() for vector in data]
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 3)
+
+    @staticmethod
+    def zeros(count: int) -> Vec3Array:
+        return Vec3Array(np.zeros((count, 3), dtype=np.float32))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Vec3:
+        return Vec3(*self.data[index].tolist())
+
+    def __setitem__(self, index: int, value: Vec3):
+        self.data[index] = value.to_list()
+
+    def to_list(self) -> list[Vec3]:
+        return [Vec3(x, y, z) for x, y, z in self.data.tolist()]
+
+    @staticmethod
+    def operand(other) -> np.ndarray | float:
+        """The array form of a Vec3Array, Vec3 (applied to every vector), scalar or per vector array of scalars"""
+        if isinstance(other, Vec3Array):
+            return other.data
+        if type(other) in VECTOR_TYPES:
+            return np.array(other.to_list(), dtype=np.float32)
+        if type(other) in SCALAR_TYPES:
+            return other
+        if type(other) is np.ndarray and other.ndim == 1:
+            return other[:, None] # One scalar per vector
+        raise TypeError
+
+    def __add__(self, other):
+        return Vec3Array(self.data + self.operand(other))
+
+    def __sub__(self, other):
+        return Vec3Array(self.data - self.operand(other))
+
+    def __mul__(self, other):
+        """Scales the vectors, use dot for dot products"""
+        if isinstance(other, VECTOR_CLASSES):
+            raise TypeError
+        return Vec3Array(self.data * self.operand(other))
+
+    def __truediv__(self, other):
+        if isinstance(other, VECTOR_CLASSES):
+            raise TypeError
+        return Vec3Array(self.data / self.operand(other))
+
+    def __iadd__(self, other):
+        self.data += self.operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= self.operand(other)
+        return self
+
+    def __imul__(self, other):
+        if isinstance(other, VECTOR_CLASSES):
+            raise TypeError
+        self.data *= self.operand(other)
+        return self
+
+    def add_in_place(self, other) -> Vec3Array:
+        return self.__iadd__(other)
+
+    def mul_in_place(self, other) -> Vec3Array:
+        return self.__imul__(other)
+
+    def __abs__(self) -> np.ndarray:
+        """Length of each vector"""
+        return np.sqrt(np.einsum("ij,ij->i", self.data, self.data))
+
+    def dot(self, other) -> np.ndarray:
+        other = np.broadcast_to(self.operand(other), self.data.shape)
+        return np.einsum("ij,ij->i", self.data, other)
+
+    def cross(self, other) -> Vec3Array:
+        return Vec3Array(np.cross(self.data, self.operand(other)))
+
+    def vec_mul(self, other) -> Vec3Array:
+        return Vec3Array(self.data * self.operand(other))
+
+    def normalize(self) -> Vec3Array:
+        """Zero length vectors are left as they are"""
+        lengths = abs(self)
+        return Vec3Array(self.data / np.where(lengths == 0, 1, lengths)[:, None])
+
+    def mat_mul(self, other: np.ndarray, transpose = False) -> Vec3Array:
+        """Vec3.mat_mul for every vector"""
+        other = np.asarray(other, dtype=np.float32)
+        if not transpose:
+            other = other.T
+        return Vec3Array(self.data @ other[:3, :3] + other[3, :3])
+
+# Vectors and arrays of them, for isinstance checks, which also match subclasses like BoundVec3
+VECTOR_CLASSES = (Vec3, Vec3Array)
@@ -10,7 +10,12 @@ from OpenGL.GL import *
 from typing import TypedDict
 from typing import Any
 import json
+import numpy as np
 from classes import raytracing
+from classes.profiler import profiler
+from classes.uicompositor import UICompositor
+from classes.uidispatcher import UIDispatcher
+from classes.directoryindex import DirectoryIndex
 from math import tan, radians
 from pathlib import Path
 import pyperclip
@@ -21,6 +26,7 @@ class Editor(App):
 
     def init_ui(self):
         self.default_render_component = RenderComponent("assets/objects/Default.obj", "assets/images/grey.png")
+        self.broadphase.set_default_render_component(self.default_render_component)
         self.window_name = "Editor"
         self.unsaved_window_name = "*Editor"
         self.is_saved = True
@@ -32,18 +38,35 @@ class Editor(App):
         self.camera = EditorCamera(5, 0.005, self.width, self.height, self.viewport, 0.1, 10000, 90, self.width/self.height)
         self.is_moving = False
 
-        # UI Texture
-        self.ui_texture = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.ui_texture)
+        # The viewport is drawn into its own framebuffer only when what it shows changes, and copied to the screen when a frame is shown
+        self.viewport_fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.viewport_fbo)
+        self.viewport_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.viewport_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.viewport_texture, 0)
+        self.viewport_depth_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.viewport_depth_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_DEPTH_COMPONENT32F, self.width, self.height, 0, GL_DEPTH_COMPONENT, GL_FLOAT, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.viewport_depth_texture, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        self.needs_viewport_redraw = True
+        self.needs_present = True
+        # While nothing moves or waits to be drawn, the main loop sleeps until an event arrives or idle_timeout seconds pass
+        self.idle_timeout = 0.5
 
         # Setting up
         self.colors = Colors()
         self.ui_surface = pg.surface.Surface((self.width, self.height), pg.SRCALPHA)
+        # Uploads only the parts of the UI that changed each frame
+        self.ui_compositor = UICompositor(self.ui_surface)
         self.ui_manager = pgui.UIManager((self.width, self.height), "theme.json")
+        # The handler of each button and text field, kept up to date by the widgets that make them
+        self.ui_dispatcher = UIDispatcher()
 
         element_width_percent = 0.2
         element_padding = 25
@@ -53,21 +76,25 @@ class Editor(App):
 
         # Hierarchy
         hierarchy_rect = pg.Rect(element_padding, element_padding + element_top_padding, element_width, self.height - element_padding * 2 - element_top_padding)
-        self.hierarchy =  Hierarchy(hierarchy_rect, self.ui_manager, self.game_objects)
+        self.hierarchy =  Hierarchy(hierarchy_rect, self.ui_manager, self.game_objects, self.ui_dispatcher, self.on_hierarchy_pressed)
 
         # Inspector
         inspector_rect = pg.Rect(self.width - element_padding - element_width, element_padding, element_width, self.height - element_padding * 2)
-        self.inspector = Inspector(inspector_rect, self.ui_manager)
+        self.inspector = Inspector(inspector_rect, self.ui_manager, self.ui_dispatcher, self.on_inspector_input, self.on_delete_component, self.delete_selected_object)
 
         # Create buttons
-        self.creation_buttons = CreationButtons(self.hierarchy.rect, self.ui_manager)
+        self.creation_buttons = CreationButtons(self.hierarchy.rect, self.ui_manager, self.ui_dispatcher, self.create_game_object, self.create_child_game_object)
 
         # File display
         file_display_y_padding = 25
         file_display_rect = pg.Rect(self.viewport_rect.left, self.viewport_rect.bottom + file_display_y_padding, self.viewport_rect.width, self.height - file_display_y_padding * 2 - self.viewport_rect.bottom)
-        self.file_display = FileDisplay(file_display_rect, self.ui_manager, "./assets")
+        # Lists the assets on a worker thread and keeps the listing current
+        self.directory_index = DirectoryIndex("./assets")
+        self.directory_index.is_ready.wait(1) # Most trees are listed by then, otherwise the display fills in once they are
+        self.file_display = FileDisplay(file_display_rect, self.ui_manager, "./assets", self.directory_index, self.ui_dispatcher, pyperclip.copy)
 
     def select_game_object(self, game_object: GameObject):
+        self.invalidate_viewport() # The selected object is drawn bright
         if game_object is None:
             game_object = self.selected_game_object # Deselect
         self.inspector.set_game_object(game_object)
@@ -90,46 +117,88 @@ class Editor(App):
         game_object.render_component.is_bright = True
         self.hierarchy.build(self.selected_game_object)
 
+    def invalidate_viewport(self):
+        """Redraws the viewport next frame, call after changing anything it shows"""
+        self.needs_viewport_redraw = True
+
+    def is_idle(self) -> bool:
+        return not (self.is_moving or self.needs_viewport_redraw or self.needs_present or self.profiler_overlay.is_visible)
+
+    def get_events(self) -> list[pg.event.Event]:
+        """The events since the last frame. While idle, first sleeps until one arrives or idle_timeout passes, so an untouched editor uses next to no CPU"""
+        if not self.is_idle():
+            return pg.event.get()
+        event = pg.event.wait(int(self.idle_timeout * 1000))
+        self.delta_time += self.clock.tick() / 1000 # UI timers count the wait
+        return ([] if event.type == pg.NOEVENT else [event]) + pg.event.get()
+
     def main_loop(self):
         self.running = True
         self.delta_time = self.clock.tick(self.FPS) / 1000
         while self.running:
-            keys = pg.key.get_pressed()
-            if keys[pg.K_s] and keys[pg.K_LCTRL]:
-                self.save()
-            self.check_events(keys)
+            with profiler.scope("events"):
+                events = self.get_events()
+                keys = pg.key.get_pressed()
+                if keys[pg.K_s] and keys[pg.K_LCTRL]:
+                    self.save()
+                self.check_events(keys, events)
 
-            self.ui_manager.update(self.delta_time)
-            self.ui_manager.rebuild_all_from_changed_theme_data()
+            with profiler.scope("ui update"):
+                self.file_display.update()
+                self.ui_manager.update(self.delta_time) # Also reloads the theme when its file changes
 
             # Render scene
-            self.renderer.render_objects_to_fbo(
-                objects=self.game_objects,
-                projection_matrix=self.camera.projection_matrix,
-                view_matrix=self.camera.get_view_matrix(),
-                fbo=0,
-                viewport=self.viewport,
-                flip=False,
-                default_render_component=self.default_render_component
-                )
+            if self.needs_viewport_redraw:
+                with profiler.scope("render"), profiler.gpu_scope("render"):
+                    self.renderer.render_objects_to_fbo(
+                        objects=self.game_objects,
+                        projection_matrix=self.camera.projection_matrix,
+                        view_matrix=self.camera.get_view_matrix(),
+                        fbo=self.viewport_fbo,
+                        viewport=self.viewport,
+                        flip=False,
+                        default_render_component=self.default_render_component
+                        )
+                self.needs_viewport_redraw = False
+                self.needs_present = True
             
             # UI
-            pg.draw.rect(self.ui_surface, self.colors.dark_green, pg.Rect(0, 0, self.width, self.height))
-            pg.draw.rect(self.ui_surface, (0, 0, 0, 0), self.viewport_rect)
+            with profiler.scope("ui draw"):
+                pg.draw.rect(self.ui_surface, self.colors.dark_green, pg.Rect(0, 0, self.width, self.height))
+                pg.draw.rect(self.ui_surface, (0, 0, 0, 0), self.viewport_rect)
 
-            self.ui_manager.draw_ui(self.ui_surface)
-            self.ui_surface = pg.transform.flip(self.ui_surface, False, True)
+                self.ui_manager.draw_ui(self.ui_surface)
 
-            glBindTexture(GL_TEXTURE_2D, self.ui_texture)
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.width, self.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, pg.image.tobytes(self.ui_surface, "RGBA"))
+            with profiler.scope("ui upload"):
+                if self.ui_compositor.update():
+                    self.needs_present = True
 
-            self.renderer.render_texture_to_screen(self.ui_texture, False)
+            # Nothing is drawn to the screen unless the viewport or UI changed
+            if self.needs_present or self.profiler_overlay.is_visible:
+                with profiler.scope("present"):
+                    self.present()
+                self.needs_present = False
+            profiler.end_frame()
 
             # Move
             if self.is_moving:
-                self.camera.update(self.delta_time)
+                view_matrix = self.camera.get_view_matrix()
+                self.camera.update(min(self.delta_time, 0.1)) # After an idle wait the frame time includes the wait
+                if not np.array_equal(view_matrix, self.camera.get_view_matrix()):
+                    self.invalidate_viewport()
             self.delta_time = self.clock.tick(self.FPS) / 1000
 
+    def present(self):
+        """Shows the last drawn viewport with the UI over it"""
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.viewport_fbo)
+        x, y, width, height = self.viewport
+        glBlitFramebuffer(x, y, x + width, y + height, x, y, x + width, y + height, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        self.renderer.render_texture_to_screen(self.ui_compositor.texture, False, flip=False, flip_y=True)
+        self.profiler_overlay.draw(self.renderer)
+        pg.display.flip()
+
     def dir_from_pixels(self, pos):
         distance_from_center = [pos[0] - self.viewport_rect.centerx, pos[1] - self.viewport_rect.centery]
         result = Vec3(
@@ -137,8 +206,8 @@ class Editor(App):
         )
         return result
 
-    def check_events(self, keys):
-        for event in pg.event.get():
+    def check_events(self, keys, events: list[pg.event.Event]):
+        for event in events:
             match event.type:
 
                 # Closing
@@ -148,18 +217,25 @@ class Editor(App):
                 case pg.KEYDOWN:
                     if event.key == pg.K_ESCAPE:# and self.is_saved:
                         self.running = False
+                    self.check_profiler_keys(event.key)
+                    if event.key == pg.K_F3:
+                        self.needs_present = True # Draws over the hidden overlay
                     # Delete
                     if event.key == pg.K_DELETE:
                         if self.selected_game_object:
                             self.delete_selected_object()
                             self.unsave()
 
+                # The window was uncovered
+                case pg.WINDOWEXPOSED:
+                    self.needs_present = True
+
                 # Move in scene
                 case pg.MOUSEBUTTONDOWN:
 
                     # Select object with raycasting
                     if event.button == 1 and self.viewport_rect.collidepoint(pg.mouse.get_pos()):
-                        self.select_game_object(raytracing.ray_cast_game_objects(Vec3.zero(), self.dir_from_pixels(pg.mouse.get_pos()), self.game_objects, self.camera.get_view_matrix(), self.default_render_component))
+                        self.select_game_object(raytracing.ray_cast_game_objects(Vec3.zero(), self.dir_from_pixels(pg.mouse.get_pos()), self.game_objects, self.camera.get_view_matrix(), self.default_render_component, self.broadphase))
 
                     if event.button == 3 and self.viewport_rect.collidepoint(pg.mouse.get_pos()):
                         self.camera.prev_mouse_position = pg.mouse.get_pos()
@@ -182,90 +258,66 @@ class Editor(App):
                             hovered_object.update_x_scroll(event.y * 200)
                         else:
                             hovered_object.update_y_scroll(event.y * 20)
-                        hovered_object.build(self.selected_game_object)
+                        hovered_object.scroll()
                 
-                # Buttons
-                case pgui.UI_BUTTON_PRESSED:
-                    
-                    # File display
-                    for folder_button in self.file_display.folder_buttons:
-                        if event.ui_element == folder_button:
-                            self.file_display.current_path = Path(self.file_display.folder_buttons[folder_button])
-                            self.file_display.build()
-                    for file_button in self.file_display.file_buttons:
-                        if event.ui_element == file_button:
-                            pyperclip.copy(self.file_display.file_buttons[file_button])
-
-                    # Hierarchy
-                    for button in self.hierarchy.game_object_buttons:
-                        if event.ui_element == button:
-
-                            # Move object in hierarchy to clicked on object
-                            if self.hierarchy.moving:
-                                self.unsave()
-                                new_parent = self.hierarchy.game_object_buttons[button]
-                                if new_parent in self.selected_game_object.children: # Swap parent and child (not implemented)
-                                    pass
-                                else:
-                                    new_parent.add_child(self.selected_game_object, 0)
-                                    self.selected_game_object.update_transform(self.selected_game_object.local_transform)
-                                    self.hierarchy.build(self.selected_game_object)
-                                    self.hierarchy.toggle_move_button()
-                            else:
-                                # Select game object
-                                self.select_game_object(self.hierarchy.game_object_buttons[button])
-                            break
-                    
-                    # Delete component
-                    for input_panel in self.inspector.input_panels:
-                        if event.ui_element == input_panel.delete_button:
-                            input_panel.delete_function(self.inspector.game_object, input_panel.rows, input_panel.func_data)
-                            self.inspector.build(self.inspector.game_object)
-                            self.inspector.update_y_scroll(0)
-
-                    match event.ui_element:
-                        # Create object
-                        case self.creation_buttons.create_top_level_button:
-                            new_object = GameObject(self, "New Object")
-                            self.game_objects.append(new_object)
-                            self.select_game_object(new_object)
-                            self.unsave()
-                        
-                        # Create child
-                        case self.creation_buttons.child_button:
-                            if self.selected_game_object:
-                                new_object = GameObject(self, "New Child Object")
-                                self.selected_game_object.add_child(new_object, 0)
-                                self.select_game_object(new_object)
-                                self.unsave()
-
-                        # Delete object
-                        case self.inspector.delete_button:
-                            self.delete_selected_object()
-
-                        # Toggle moving
-                        case self.hierarchy.move_button:
-                            self.hierarchy.toggle_move_button()
-
-                case pgui.UI_TEXT_ENTRY_FINISHED:
-                    # Set value in inspector
-                    for input_panel in self.inspector.input_panels:
-                        for row in input_panel.rows:
-                            for input_field in row:
-                                if event.ui_element == input_field:
-                                    input_panel.function(self.inspector.game_object, input_panel.rows, input_panel.func_data)
-                                    self.hierarchy.build()
-                                    self.inspector.set_game_object(self.selected_game_object) # Refresh
-                                    self.unsave()
-                                    break
+                # Buttons and text fields
+                case pgui.UI_BUTTON_PRESSED | pgui.UI_TEXT_ENTRY_FINISHED:
+                    self.ui_dispatcher.dispatch(event)
 
             self.ui_manager.process_events(event)
 
+    def on_hierarchy_pressed(self, game_object: GameObject):
+        # Move the selected object under the pressed one
+        if self.hierarchy.moving:
+            # Not under itself or anything under it, that would make a loop (swapping them isn't implemented)
+            parent = game_object
+            while parent is not None and parent is not self.selected_game_object:
+                parent = parent.parent
+            if parent is None:
+                self.unsave()
+                self.hierarchy.remove_object(self.selected_game_object)
+                if self.selected_game_object.parent is None:
+                    self.game_objects.remove(self.selected_game_object)
+                game_object.add_child(self.selected_game_object, 0)
+                self.hierarchy.add_object(self.selected_game_object)
+                self.selected_game_object.update_transform(self.selected_game_object.local_transform)
+                self.hierarchy.build(self.selected_game_object)
+                self.hierarchy.toggle_move_button()
+        else:
+            self.select_game_object(game_object)
+
+    def on_inspector_input(self, input_panel: InputPanel):
+        input_panel.function(self.inspector.game_object, input_panel.rows, input_panel.func_data)
+        self.hierarchy.build(self.selected_game_object) # Shows a new name
+        self.inspector.set_game_object(self.selected_game_object) # Refresh
+        self.unsave()
+
+    def on_delete_component(self, input_panel: InputPanel):
+        input_panel.delete_function(self.inspector.game_object, input_panel.rows, input_panel.func_data)
+        self.inspector.set_game_object(self.inspector.game_object)
+        self.inspector.update_y_scroll(0)
+
+    def create_game_object(self):
+        new_object = GameObject(self, "New Object")
+        self.game_objects.append(new_object)
+        self.hierarchy.add_object(new_object)
+        self.select_game_object(new_object)
+        self.unsave()
+
+    def create_child_game_object(self):
+        if self.selected_game_object:
+            new_object = GameObject(self, "New Child Object")
+            self.selected_game_object.add_child(new_object, 0)
+            self.hierarchy.add_object(new_object)
+            self.select_game_object(new_object)
+            self.unsave()
+
     def delete_selected_object(self):
         if self.selected_game_object:
             game_object_to_destroy = self.selected_game_object
             self.select_game_object(self.selected_game_object)
             game_object_to_destroy.destroy()
+            self.hierarchy.remove_object(game_object_to_destroy)
             self.hierarchy.build(self.selected_game_object)
             if game_object_to_destroy.parent is not None:
                 self.select_game_object(game_object_to_destroy.parent)
@@ -290,6 +342,8 @@ class Editor(App):
             json.dump({"objects": game_object_dicts}, file, indent=2)
     
     def unsave(self):
+        """Marks the scene as edited"""
+        self.invalidate_viewport()
         self.is_saved = False
         pg.display.set_caption(self.unsaved_window_name)
 
@@ -333,5 +387,13 @@ class Editor(App):
 
         return game_object_dict
 
+    def destroy(self):
+        self.directory_index.destroy()
+        self.ui_compositor.destroy()
+        glDeleteFramebuffers(1, (self.viewport_fbo,))
+        glDeleteTextures(2, (self.viewport_texture, self.viewport_depth_texture))
+        super().destroy()
+
 if __name__ == "__main__":
-    editor = Editor(1920, 1080, 144)
\ No newline at end of file
+    editor = Editor(1920, 1080, 144)
+    editor.run()
\ No newline at end of file
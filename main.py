@@ -3,10 +3,20 @@ from classes.transform import Transform
 from classes.rendercomponent import RenderComponent
 from classes.vec3 import Vec3
 from classes.renderer import Renderer
-import classes.transform as transform
+from classes.assetregistry import registry
+from classes.transformstore import TransformStore
+from classes.broadphase import Broadphase
+from classes.profiler import profiler, ProfilerOverlay
+from classes.interpolation import TransformInterpolator
+from classes.scheduler import ScriptScheduler
+from classes.componentindex import ComponentIndex
+from classes.scenestreamer import SceneStreamer
+from classes.monobehaviour import MonoBehaviour
 from assets.scripts.camera import Camera
 import pygame as pg
+from OpenGL.GL import glFinish
 import json
+import time
 from typing import TypedDict
 from typing import Any
 from pydoc import locate
@@ -16,19 +26,50 @@ import os
 os.environ["SDL_VIDEO_X11_FORCE_EGL"] = "1"
 
 class App:
-    def __init__(self, width: int, height: int, FPS: int) -> None:
+    def __init__(self, width: int, height: int, FPS: int, use_transform_store: bool = False, headless: bool = False, scene_path: str = "gameobjects.json", fixed_rate: int = 60, stream_scene: bool = False) -> None:
+        """Loads the scene, call run to start the main loop.
+        stream_scene loads the scene over the first frames instead, with meshes loading in the background"""
         self.width = width
         self.height = height
         self.FPS = FPS
-        self.renderer = Renderer(self.width, self.height)
+        self.scene_path = scene_path
+        self.stream_scene = stream_scene
+        self.scene_streamer: SceneStreamer | None = None
+        # Keeps every transform in arrays and builds all the matrices at once, for scenes with many moving objects
+        self.transform_store: TransformStore | None = TransformStore() if use_transform_store else None
+        # World bounds of every game object, for ray casts and spatial queries
+        self.broadphase = Broadphase()
+        self.renderer = Renderer(self.width, self.height, headless)
         self.clock = pg.time.Clock()
+        self.delta_time = 0.0
+
+        # Scripts' fixed_update runs fixed_rate times a second of frame time, however fast frames are drawn
+        self.fixed_time_step = 1 / fixed_rate
+        self.fixed_time_accumulator = 0.0
+        self.max_fixed_steps = 5 # Per frame, past this the simulation slows down instead of every frame taking longer to catch up
+        self.interpolator = TransformInterpolator()
+        self.renderer.interpolator = self.interpolator
+        # Runs the scripts of every game object, independent ones in parallel
+        self.scheduler = ScriptScheduler()
+        # Every live script by type
+        self.component_index = ComponentIndex()
+        # Seconds each phase of the last update_frame took
+        self.phase_times: dict[str, float] = {}
+        # F3 shows the profiler overlay and F4 saves a Chrome trace of the last frames
+        self.profiler_overlay = ProfilerOverlay(profiler)
         self.init_game_objects()
         self.init_ui()
+
+    def run(self):
         self.main_loop()
         self.destroy()
 
     def init_game_objects(self):
-        self.game_objects = self.load_json("gameobjects.json")
+        if self.stream_scene:
+            self.game_objects = []
+            self.scene_streamer = SceneStreamer(self, self.scene_path)
+            return
+        self.game_objects = self.load_json(self.scene_path)
         for game_object in self.game_objects:
             self.init_game_object(game_object)
 
@@ -53,7 +94,7 @@ class App:
     """
     Takes in a game object json dictionary and returns a gameobject with the info from the json put in. Calls itself to create children
     """
-    def create_game_object_from_json(self, game_object_dict: dict):
+    def create_game_object_from_json(self, game_object_dict: dict, stream_assets: bool = False):
         # Types
         Vec3Dict = TypedDict('Vec3Dict', {"x": float, "y": float, "z": float})
         TransformDict = TypedDict('TransformDict', {"pos": Vec3Dict, "scale": Vec3Dict, "rot": Vec3Dict})
@@ -67,7 +108,7 @@ class App:
         children_dicts: list[ObjectDict] = game_object_dict["children"]
         children: list[GameObject] = []
         for child_dict in children_dicts:
-            children.append(self.create_game_object_from_json(child_dict))
+            children.append(self.create_game_object_from_json(child_dict, stream_assets))
 
         # Scripts
         scripts = []
@@ -79,7 +120,7 @@ class App:
         # Render component
         render_component = None
         if game_object_dict["render_component"]:
-            render_component = RenderComponent(game_object_dict["render_component"]["obj_path"], game_object_dict["render_component"]["image_path"])
+            render_component = RenderComponent(game_object_dict["render_component"]["obj_path"], game_object_dict["render_component"]["image_path"], stream=stream_assets)
         else:
             render_component = RenderComponent("", "", False)
 
@@ -112,7 +153,6 @@ class App:
     def init_game_object(self, game_object: GameObject):
         for component in game_object.components:
             component.start()
-        game_object.local_transform.model_matrix = transform.create_entire_model_matrix(game_object.local_transform, game_object.parent)
         for child in game_object.children:
             self.init_game_object(child)
 
@@ -130,39 +170,110 @@ class App:
                 elif event.type == pg.KEYDOWN:
                     if event.key == pg.K_ESCAPE:
                         running = False
+                    self.check_profiler_keys(event.key)
+
+            self.update_frame()
+            self.delta_time = self.clock.tick(self.FPS) / 1000
 
+    def update_frame(self):
+        """Loads more of a streamed scene, runs the fixed updates that are due and the scripts, updates the transforms and shows the first camera's view, timing each phase into phase_times"""
+        start = time.perf_counter()
+        if self.scene_streamer:
+            with profiler.scope("loading"):
+                if self.scene_streamer.update():
+                    self.scene_streamer = None
+        loading_end = time.perf_counter()
+        with profiler.scope("fixed update"):
+            self.run_fixed_updates()
+        fixed_update_end = time.perf_counter()
+        with profiler.scope("scripts"):
             self.update_game_objects()
+        scripts_end = time.perf_counter()
+        with profiler.scope("transforms"):
+            self.update_transforms()
+        transforms_end = time.perf_counter()
 
-            # Rendering
-            camera = None
-            for game_object in self.game_objects:
-                camera: Camera | None = self.get_camera(game_object)
-                if camera: break
+        # Rendering
+        camera = self.find_camera()
+        if camera:
+            with profiler.scope("render"), profiler.gpu_scope("render"):
+                camera.render()
+        render_end = time.perf_counter()
+        with profiler.scope("present"):
             if camera:
-                self.renderer.render_texture_to_screen(camera.color_texture)
+                self.renderer.render_texture_to_screen(camera.color_texture, flip=False)
+            self.profiler_overlay.draw(self.renderer)
+            pg.display.flip()
+            if self.renderer.headless:
+                glFinish() # A hidden window's flip may not wait for the frame to be drawn
+        end = time.perf_counter()
+        profiler.end_frame()
 
-            self.delta_time = self.clock.tick(self.FPS) / 1000
+        cull_time = self.renderer.cull_time if camera else 0.0
+        self.phase_times = {
+            "loading": loading_end - start,
+            "fixed_update": fixed_update_end - loading_end,
+            "scripts": scripts_end - fixed_update_end,
+            "transforms": transforms_end - scripts_end,
+            "cull": cull_time,
+            "draw": render_end - transforms_end - cull_time,
+            "present": end - render_end
+        }
 
-    def update_game_objects(self):
-        for game_object in self.game_objects:
-            for custom_object in game_object.components:
-                custom_object.delta_time = self.delta_time
-                custom_object.update()
+    def run_fixed_updates(self):
+        """Runs a fixed update for every fixed time step that has passed, then sets how far the frame is towards the next one"""
+        self.fixed_time_accumulator += self.delta_time
+        step_count = 0
+        while self.fixed_time_accumulator >= self.fixed_time_step:
+            if step_count == self.max_fixed_steps:
+                # Too far behind, drop the rest rather than spiral into ever longer frames
+                self.fixed_time_accumulator %= self.fixed_time_step
+                break
+            self.interpolator.begin_tick()
+            self.fixed_update_game_objects()
+            self.interpolator.end_tick()
+            self.fixed_time_accumulator -= self.fixed_time_step
+            step_count += 1
+        self.interpolator.alpha = self.fixed_time_accumulator / self.fixed_time_step
 
-    """
-    Returns the camera component of the gameobject / its children, if it exists
-    """
-    def get_camera(self, game_object: GameObject):
-        camera = game_object.get_component(Camera)
-        if not camera:
-            for child in game_object.children:
-                return self.get_camera(child)
-        return camera
+    def fixed_update_game_objects(self):
+        self.scheduler.run(self.game_objects, "fixed_update", self.fixed_time_step)
+
+    def check_profiler_keys(self, key: int):
+        if key == pg.K_F3:
+            self.profiler_overlay.is_visible = not self.profiler_overlay.is_visible
+            profiler.enabled = self.profiler_overlay.is_visible
+        elif key == pg.K_F4 and profiler.event_count:
+            profiler.export_chrome_trace("profile_trace.json")
+
+    def update_transforms(self):
+        """Brings the world matrices of everything that moved up to date, instead of on first use.
+        The broadphase refits the bounds of moved objects when it's next queried, not every frame"""
+        if self.transform_store is not None:
+            self.transform_store.update()
+
+    def find_camera(self) -> Camera | None:
+        """The camera shown on screen, the oldest one in the scene"""
+        return self.component_index.get_component(Camera)
+
+    def get_components(self, wanted_type: type) -> list[MonoBehaviour]:
+        """Every live script that is a wanted_type, including subclasses"""
+        return self.component_index.get_components(wanted_type)
+
+    def update_game_objects(self):
+        self.scheduler.run(self.game_objects, "update", self.delta_time)
 
     def destroy(self):
+        if self.scene_streamer:
+            self.scene_streamer.close()
         for obj in self.game_objects:
             obj.destroy()
+        registry.destroy()
+        self.scheduler.destroy()
+        self.profiler_overlay.destroy()
+        profiler.destroy()
         pg.quit()
 
 if __name__ == "__main__":
-    app = App(1920, 1080, 144)
\ No newline at end of file
+    app = App(1920, 1080, 144)
+    app.run()
\ No newline at end of file
@@ -7,7 +7,7 @@ uniform sampler2D image;
 
 out vec4 color;
 
-bool isClose(float x, float y, float tol = 0.000001) {
+bool isClose(float x, float y, float tol) {
     return abs(x-y) < tol;
 }
 
@@ -15,7 +15,7 @@ bool isClose(float x, float y, float tol = 0.000001) {
 // Works
 float calcBlend(float dist) {
     if (dist < 0 || dist > 1) {
-        return 0;
+        return 0.0;
     }
     float x = 2*(dist - 0.5);
     x = cos(dist*PI);
@@ -5,7 +5,10 @@ layout (location=1) in vec2 texCoords;
 
 out vec2 fragTexCoords;
 
+// For images stored top row first, like pygame surfaces
+uniform bool flipY;
+
 void main() {
     gl_Position = vec4(vertexPos, 1);
-    fragTexCoords = texCoords;
+    fragTexCoords = flipY ? vec2(texCoords.x, 1 - texCoords.y) : texCoords;
 }
\ No newline at end of file
@@ -0,0 +1,33 @@
+from classes.mesh import load_obj
+import numpy as np
+
+POSITIONS_AND_UVS = """v 0 0 0
+v 1 0 0
+v 0 1 0
+vt 0.25 0.5
+vt 0.75 0.5
+vt 0.5 1
+vn 0 0 1
+"""
+
+def write_obj(tmp_path, text: str) -> str:
+    path = tmp_path / "mesh.obj"
+    path.write_text(text)
+    return str(path)
+
+def test_mixed_face_formats(tmp_path):
+    vertices = load_obj(write_obj(tmp_path, POSITIONS_AND_UVS + "f 1 2 3\nf 1/1/1 2/2/1 3/3/1\nf 3//1 2//1 1//1\nf 1/3 2/2 3/1\n")).reshape(-1, 8)
+    assert len(vertices) == 12
+    triangle = [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+    np.testing.assert_array_equal(vertices[0:3, 0:3], triangle)
+    np.testing.assert_array_equal(vertices[3:6, 0:3], triangle)
+    np.testing.assert_array_equal(vertices[6:9, 0:3], triangle[::-1])
+    np.testing.assert_array_equal(vertices[9:12, 0:3], triangle)
+    np.testing.assert_array_equal(vertices[3:6, 6:8], [[0.25, 0.5], [0.75, 0.5], [0.5, 1]])
+    np.testing.assert_array_equal(vertices[9:12, 6:8], [[0.5, 1], [0.75, 0.5], [0.25, 0.5]])
+    np.testing.assert_array_equal(vertices[6:9, 3:6], [[0, 0, 1]] * 3)
+
+def test_trailing_comments(tmp_path):
+    commented = load_obj(write_obj(tmp_path, "# A triangle\nv 0 0 0 # origin\nv 1 0 0\nv 0 1 0\nvn 0 0 1\nf 1//1 2//1 3//1 # the only face\n"))
+    plain = load_obj(write_obj(tmp_path, "v 0 0 0\nv 1 0 0\nv 0 1 0\nvn 0 0 1\nf 1//1 2//1 3//1\n"))
+    np.testing.assert_array_equal(commented, plain)
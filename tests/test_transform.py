@@ -0,0 +1,52 @@
+from classes.gameobject import GameObject
+from classes.transform import Transform
+from classes.transformstore import TransformStore
+from classes.vec3 import Vec3
+import numpy as np
+import pytest
+
+class AppStub:
+    def __init__(self, use_transform_store: bool) -> None:
+        self.game_objects: list[GameObject] = []
+        self.transform_store = TransformStore() if use_transform_store else None
+
+def create_chain(app: AppStub) -> list[GameObject]:
+    """A parent with a child with a grandchild, each moved and turned a little"""
+    game_objects = [GameObject(app, str(i), Transform(Vec3(1, 2, 3), Vec3(1, 1, 1), Vec3(0.1, 0.2, 0.3))) for i in range(3)]
+    game_objects[0].add_child(game_objects[1])
+    game_objects[1].add_child(game_objects[2])
+    return game_objects
+
+def edit_components(game_objects: list[GameObject]):
+    parent, child, grandchild = game_objects
+    parent.local_transform.pos.x = 5
+    child.local_transform.scale.y = 2
+    rotation = grandchild.local_transform.rotation
+    rotation.z += 1
+    parent.local_transform.rotation.add_in_place(Vec3(0, 0.5, 0))
+
+def get_matrices(game_objects: list[GameObject]) -> list[np.ndarray]:
+    return [np.array(game_object.local_transform.model_matrix) for game_object in game_objects]
+
+@pytest.mark.parametrize("use_transform_store", (False, True))
+def test_component_edits_mark_matrices_dirty(use_transform_store):
+    game_objects = create_chain(AppStub(use_transform_store))
+    get_matrices(game_objects) # Builds and caches the matrices before the edits
+    edit_components(game_objects)
+    assert game_objects[0].local_transform.pos.x == 5
+    assert game_objects[1].local_transform.scale.y == 2
+
+    expected = create_chain(AppStub(use_transform_store))
+    for game_object, expected_object in zip(game_objects, expected):
+        transform = game_object.local_transform
+        expected_object.update_transform(Transform(transform.pos, transform.scale, transform.rotation))
+    np.testing.assert_allclose(get_matrices(game_objects), get_matrices(expected), atol=1e-5)
+
+def test_backends_agree_after_component_edits():
+    lazy_objects = create_chain(AppStub(False))
+    stored_objects = create_chain(AppStub(True))
+    for game_objects in (lazy_objects, stored_objects):
+        get_matrices(game_objects)
+        edit_components(game_objects)
+    assert lazy_objects[0].local_transform.pos.x == stored_objects[0].local_transform.pos.x == 5
+    np.testing.assert_allclose(get_matrices(lazy_objects), get_matrices(stored_objects), atol=1e-5)
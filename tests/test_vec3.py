@@ -0,0 +1,55 @@
+from classes.transform import Transform
+from classes.vec3 import Vec3, Vec3Array
+import numpy as np
+import pytest
+
+def test_vec3_array_arithmetic():
+    array = Vec3Array([[1, 2, 3], [4, 5, 6]])
+    np.testing.assert_allclose((array + Vec3(1, 1, 1)).data, [[2, 3, 4], [5, 6, 7]])
+    np.testing.assert_allclose((array - array).data, np.zeros((2, 3)))
+    np.testing.assert_allclose((array + 1).data, [[2, 3, 4], [5, 6, 7]])
+    np.testing.assert_allclose((array * 2.0).data, [[2, 4, 6], [8, 10, 12]])
+    np.testing.assert_allclose((array / 2).data, [[0.5, 1, 1.5], [2, 2.5, 3]])
+    np.testing.assert_allclose((array * np.array([1.0, 0.0])).data, [[1, 2, 3], [0, 0, 0]])
+    np.testing.assert_allclose(array.dot(Vec3(1, 0, 0)), [1, 4])
+
+def test_vec3_array_takes_transform_vectors():
+    transform = Transform(Vec3(1, 2, 3), Vec3(1, 1, 1), Vec3(0, 0, 0))
+    array = Vec3Array([transform.pos, Vec3(0, 0, 0)])
+    np.testing.assert_allclose((array + transform.pos).data, [[2, 4, 6], [1, 2, 3]])
+    array += transform.pos
+    np.testing.assert_allclose(array.data, [[2, 4, 6], [1, 2, 3]])
+
+def test_vec3_array_rejects_vector_scaling():
+    transform = Transform(Vec3(0, 0, 0), Vec3(1, 2, 3), Vec3(0, 0, 0))
+    array = Vec3Array([[1, 2, 3]])
+    for operand in (Vec3(1, 2, 3), transform.scale, array):
+        for operation in (lambda: array * operand, lambda: array / operand, lambda: array.mul_in_place(operand)):
+            with pytest.raises(TypeError):
+                operation()
+
+def test_vec3_operators_copy():
+    a = Vec3(1, 2, 3)
+    b = a
+    b += Vec3(1, 1, 1)
+    b -= Vec3(0, 0, 1)
+    b *= 2
+    b /= 4
+    assert a.to_list() == [1, 2, 3]
+    assert b.to_list() == [1, 1.5, 1.5]
+    assert Vec3(1, 2, 3) * Vec3(4, 5, 6) == 32
+
+def test_vec3_in_place_methods():
+    a = Vec3(1, 2, 3)
+    b = a
+    assert a.add_in_place(Vec3(1, 1, 1)) is a
+    a.sub_in_place(Vec3(0, 0, 1)).mul_in_place(2).div_in_place(4)
+    assert b.to_list() == [1, 1.5, 1.5]
+
+def test_transform_vectors_are_not_changed_through_operators():
+    transform = Transform(Vec3(1, 2, 3), Vec3(1, 1, 1), Vec3(0, 0, 0))
+    transform.model_matrix
+    pos = transform.pos
+    pos += Vec3(1, 0, 0)
+    assert transform.pos.to_list() == [1, 2, 3]
+    assert transform.world_matrix is not None # Still up to date